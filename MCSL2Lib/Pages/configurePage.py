@@ -14,7 +14,7 @@
 Configure new server page.
 """
 
-from json import loads, dumps
+from json import dumps
 from os import getcwd, mkdir, remove, path as osp
 from shutil import copy, rmtree
 
@@ -49,11 +49,18 @@ from qfluentwidgets import (
 )
 
 from MCSL2Lib.ProgramControllers import javaDetector
+from MCSL2Lib.ProgramControllers.javaInventory import javaInventory
 
 from MCSL2Lib.ProgramControllers.interfaceController import ChildStackedWidget
+from MCSL2Lib.ServerControllers.javaCompatibility import (
+    javaMajorVersion,
+    pickCompatibleJava,
+    serverJavaRequirement,
+)
 from MCSL2Lib.ServerControllers.processCreator import _MinecraftEULA
 from MCSL2Lib.ProgramControllers.serverImporter import NoShellArchivesImporter
 from MCSL2Lib.ServerControllers.serverInstaller import ForgeInstaller
+from MCSL2Lib.ProgramControllers.serverRegistry import serverRegistry
 from MCSL2Lib.ProgramControllers.serverValidator import ServerValidator
 from MCSL2Lib.ProgramControllers.settingsController import cfg
 
@@ -92,8 +99,15 @@ class ConfigurePage(QWidget):
         self.javaFindWorkThreadFactory = javaDetector.JavaFindWorkThreadFactory()
         self.javaFindWorkThreadFactory.fSearch = True
         self.javaFindWorkThreadFactory.signalConnect = self.autoDetectJavaFinished
+        self.javaFindWorkThreadFactory.javaFoundSignalConnect = self.onJavaFound
         self.javaFindWorkThreadFactory.finishSignalConnect = self.onJavaFindWorkThreadFinished
-        self.javaFindWorkThreadFactory.create().start()
+        javaInventory.javaAdded.connect(self.onJavaFound)
+        javaInventory.javaRemoved.connect(self.onJavaRemoved)
+        # 已有Java列表时由javaInventory保持更新，只在首次使用时全盘查找
+        if javaList := javaInventory.javas():
+            configureServerVariables.javaPath = javaList
+        else:
+            self.javaFindWorkThreadFactory.create().start()
 
         self.gridLayout = QGridLayout(self)
         self.gridLayout.setObjectName("gridLayout")
@@ -1369,6 +1383,7 @@ class ConfigurePage(QWidget):
                         parent=self,
                     )
                 javaDetector.saveJavaList(currentJavaPaths)
+                javaInventory.setJavas(currentJavaPaths)
             else:
                 InfoBar.error(
                     title=self.tr("添加失败"),
@@ -1411,6 +1426,7 @@ class ConfigurePage(QWidget):
         javaDetector.sortJavaList(javaList, reverse=False)
         configureServerVariables.javaPath = javaList
         javaDetector.saveJavaList(javaList)
+        javaInventory.setJavas(javaList)
         for java in invaildJavaList:
             InfoBar.error(
                 title=self.tr("Java: ") + str(java.version) + self.tr(" 已失效"),
@@ -1423,6 +1439,17 @@ class ConfigurePage(QWidget):
                 duration=3000,
             )
 
+    @pyqtSlot(object)
+    def onJavaFound(self, java):
+        """查找过程中每探测到一个Java就加入列表，不必等查找结束"""
+        if java not in configureServerVariables.javaPath:
+            configureServerVariables.javaPath.append(java)
+
+    @pyqtSlot(object)
+    def onJavaRemoved(self, java):
+        if java in configureServerVariables.javaPath:
+            configureServerVariables.javaPath.remove(java)
+
     @pyqtSlot(int)
     def onJavaFindWorkThreadFinished(self, sequenceNumber):
         """自动查找Java结束后的处理"""
@@ -1462,6 +1489,7 @@ class ConfigurePage(QWidget):
                 duration=3000,
                 parent=self,
             )
+            self.matchJavaToCore()
         else:
             InfoBar.warning(
                 title=self.tr("未添加"),
@@ -1512,6 +1540,7 @@ class ConfigurePage(QWidget):
                 duration=3000,
                 parent=self,
             )
+            self.matchJavaToCore()
         else:
             InfoBar.warning(
                 title=self.tr("未添加"),
@@ -1543,6 +1572,57 @@ class ConfigurePage(QWidget):
         javaVersionLabelItems[self.newServerStackedWidget.currentIndex()].setText(
             self.tr("已选择，版本") + str(selectedJavaVer)
         )
+        if configureServerVariables.corePath:
+            self.matchJavaToCore(autoSelect=False)
+
+    def matchJavaToCore(self, autoSelect=True):
+        """
+        按核心需要的Java检查所选的Java\n
+        不兼容时，autoSelect为True则自动改选已检测到的合适Java，否则只提示
+        """
+        requirement = serverJavaRequirement(
+            configureServerVariables.corePath,
+            configureServerVariables.serverType,
+            configureServerVariables.extraData,
+        )
+        selectedJavaVer = configureServerVariables.selectedJavaVersion
+        if requirement is None or (
+            selectedJavaVer and requirement.accepts(javaMajorVersion(selectedJavaVer))
+        ):
+            return
+        java = pickCompatibleJava(requirement, configureServerVariables.javaPath)
+        if autoSelect and java is not None:
+            self.setJavaPath(java.path)
+            self.setJavaVer(java.version)
+            InfoBar.info(
+                title=self.tr("已自动选择Java"),
+                content=self.tr("该核心需要")
+                + str(requirement)
+                + self.tr("，已选择Java ")
+                + java.version,
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=3000,
+                parent=self,
+            )
+            return
+        InfoBar.warning(
+            title=self.tr("Java可能不兼容"),
+            content=self.tr("该核心需要")
+            + str(requirement)
+            + (
+                self.tr("，当前选择的是Java ") + selectedJavaVer
+                if selectedJavaVer
+                else self.tr("，但没有检测到满足要求的Java")
+            )
+            + (self.tr("。\n可改用Java ") + java.version if java is not None else ""),
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=5000,
+            parent=self,
+        )
 
     def finishNewServer(self):
         """完成新建服务器的检查触发器"""
@@ -1779,19 +1859,9 @@ class ConfigurePage(QWidget):
 
         # 写入全局配置
         try:
-            with open(
-                r"MCSL2/MCSL2_ServerList.json", "r", encoding="utf-8"
-            ) as globalServerListFile:
-                # old
-                globalServerList = loads(globalServerListFile.read())
-                globalServerListFile.close()
-
-            with open(
-                r"MCSL2/MCSL2_ServerList.json", "w+", encoding="utf-8"
-            ) as newGlobalServerListFile:
-                # 添加新的
-                globalServerList["MCSLServerList"].append(serverConfig)
-                newGlobalServerListFile.write(dumps(globalServerList, indent=4))
+            serverRegistry.add(serverConfig)
+            if not serverRegistry.flush():
+                raise OSError(self.tr("写入全局服务器配置失败"))
             exitCode = 0
         except Exception as e:
             exitCode = 1
@@ -1914,19 +1984,9 @@ class ConfigurePage(QWidget):
             # 删除文件夹
             rmtree(serverDir)
             # 删除全局配置
-            with open(
-                r"MCSL2/MCSL2_ServerList.json", "r", encoding="utf-8"
-            ) as globalServerListFile:
-                # old
-                globalServerList = loads(globalServerListFile.read())
-                globalServerListFile.close()
-
-            with open(
-                r"MCSL2/MCSL2_ServerList.json", "w+", encoding="utf-8"
-            ) as newGlobalServerListFile:
-                # 删除新的
-                globalServerList["MCSLServerList"].pop()
-                newGlobalServerListFile.write(dumps(globalServerList, indent=4))
+            if (index := serverRegistry.indexOf(configureServerVariables.serverName)) >= 0:
+                serverRegistry.remove(index)
+                serverRegistry.flush()
 
     @pyqtSlot(bool)
     def afterInstallingForge(self, installFinished, args=...):
@@ -15,8 +15,9 @@ Download page with FastMirror and MCSLAPI.
 """
 
 from os import path as osp, remove
+from typing import Optional
 
-from PyQt5.QtCore import Qt, QSize, QRect, pyqtSlot
+from PyQt5.QtCore import Qt, QSize, QRect, QTimer, pyqtSlot
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import (
     QSizePolicy,
@@ -46,13 +47,14 @@ from qfluentwidgets import (
     HyperlinkButton,
     LineEdit,
     PrimaryPushButton,
+    SearchLineEdit,
 )
 
 from MCSL2Lib.Widgets.DownloadEntryViewerWidget import DownloadEntryBox
 from MCSL2Lib.Widgets.DownloadProgressWidget import DownloadCard
 from MCSL2Lib.ProgramControllers.DownloadAPI.FastMirrorAPI import (
-    FetchFastMirrorAPIThreadFactory,
-    FetchFastMirrorAPICoreVersionThreadFactory,
+    FASTMIRROR_API_URL,
+    FastMirrorAPIDownloadURLParser,
 )
 from MCSL2Lib.Widgets.PolarsWidgets import PolarsTypeWidget
 from MCSL2Lib.Widgets.FastMirrorWidgets import (
@@ -60,16 +62,23 @@ from MCSL2Lib.Widgets.FastMirrorWidgets import (
     FastMirrorCorePushButton,
     FastMirrorVersionButton,
 )
-from MCSL2Lib.ProgramControllers.DownloadAPI.MCSLAPI import FetchMCSLAPIDownloadURLThreadFactory
+from MCSL2Lib.ProgramControllers.DownloadAPI.MCSLAPI import (
+    MCSLAPI_LIST_URL,
+    MCSLAPIDownloadURLParser,
+)
 from MCSL2Lib.ProgramControllers.DownloadAPI.PolarsAPI import (
-    FetchPolarsAPICoreThreadFactory,
-    FetchPolarsAPITypeThreadFactory,
+    POLARS_API_URL,
+    PolarsAPIDownloadURLParser,
 )
 from MCSL2Lib.ProgramControllers.DownloadAPI.AkiraCloud import (
-    FetchAkiraTypeThreadFactory,
-    FetchAkiraCoreThreadFactory,
+    AKIRA_CLOUD_URL,
+    AkiraCloudDownloadURLParser,
 )
 from MCSL2Lib.ProgramControllers.aria2ClientController import Aria2Controller
+from MCSL2Lib.ProgramControllers.asyncFetcher import FetchFuture, asyncFetcher
+from MCSL2Lib.ProgramControllers.coreCatalog import CoreCatalogRebuildThread, coreCatalog
+from MCSL2Lib.ProgramControllers.httpCache import httpCache
+from MCSL2Lib.ProgramControllers.mirrorProber import mirrorProber
 from MCSL2Lib.ProgramControllers.interfaceController import (
     MySmoothScrollArea,
 )
@@ -98,16 +107,32 @@ class DownloadPage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         # fmt: off
-        self.fetchFMAPIThreadFactory = FetchFastMirrorAPIThreadFactory()
-        self.fetchFMAPICoreVersionThreadFactory = FetchFastMirrorAPICoreVersionThreadFactory()
-
-        self.fetchMCSLAPIDownloadURLThreadFactory = FetchMCSLAPIDownloadURLThreadFactory()
-
-        self.fetchPolarsAPITypeThreadFactory = FetchPolarsAPITypeThreadFactory()
-        self.fetchPolarsAPICoreThreadFactory = FetchPolarsAPICoreThreadFactory()
-
-        self.fetchAkiraTypeThreadFactory = FetchAkiraTypeThreadFactory()
-        self.fetchAkiraCoreThreadFactory = FetchAkiraCoreThreadFactory()
+        # 各下载源正在进行的请求(FetchFuture)，请求按下载源分组，切换下载源时取消
+        self.fmAPIFuture = None
+        # FastMirror构建分页：(核心, MC版本) -> {偏移: 页}；(核心, MC版本, 偏移) -> 请求
+        self.fmBuildPages = {}
+        self.fmBuildFutures = {}
+        self.fmWaitingBuildPage = None
+
+        self.MCSLAPIFuture = None
+        # MCSLAPI分页：(路径, 页码) -> 已预取的页 / 正在预取的请求；正在等待显示的页
+        self.MCSLAPIPrefetched = {}
+        self.MCSLAPIPrefetchFutures = {}
+        self.MCSLAPIWaitingPage = None
+
+        self.polarsTypeFuture = None
+        self.polarsCoreFuture = None
+
+        self.akiraTypeFuture = None
+        self.akiraCoreFuture = None
+
+        # 核心搜索：当前显示的结果、重建目录的线程
+        self.catalogSearchResults = []
+        self.catalogRebuildThread = None
+
+        # 自动选择下载源：本次打开下载页时选中的下载源、已经失败过的下载源
+        self.autoSelectedSource = None
+        self.failedDownloadSources = set()
         # fmt: on
 
         self.fmBtnGroup = QButtonGroup(self)
@@ -186,6 +211,9 @@ class DownloadPage(QWidget):
         self.subTitleLabel.setTextFormat(Qt.MarkdownText)
         self.subTitleLabel.setObjectName("subTitleLabel")
         self.gridLayout_4.addWidget(self.subTitleLabel, 1, 0, 1, 2)
+        self.catalogSearchLineEdit = SearchLineEdit(self.titleLimitWidget)
+        self.catalogSearchLineEdit.setObjectName("catalogSearchLineEdit")
+        self.gridLayout_4.addWidget(self.catalogSearchLineEdit, 1, 2, 1, 3)
         self.gridLayout.addWidget(self.titleLimitWidget, 1, 2, 2, 3)
         spacerItem1 = QSpacerItem(20, 10, QSizePolicy.Minimum, QSizePolicy.Fixed)
         self.gridLayout.addItem(spacerItem1, 0, 2, 1, 1)
@@ -556,6 +584,43 @@ class DownloadPage(QWidget):
         self.akiraCoreScrollArea.setWidget(self.akiraCoreScrollAreaContents)
         self.gridLayout_10.addWidget(self.akiraCoreScrollArea, 2, 2, 1, 2)
         self.downloadStackedWidget.addWidget(self.downloadWithAkiraCloud)
+
+        self.downloadWithCatalog = QWidget()
+        self.downloadWithCatalog.setObjectName("downloadWithCatalog")
+
+        self.gridLayout_11 = QGridLayout(self.downloadWithCatalog)
+        self.gridLayout_11.setContentsMargins(0, 0, 0, 0)
+        self.gridLayout_11.setObjectName("gridLayout_11")
+
+        self.catalogSearchTitle = SubtitleLabel(self.downloadWithCatalog)
+        self.catalogSearchTitle.setObjectName("catalogSearchTitle")
+        self.gridLayout_11.addWidget(self.catalogSearchTitle, 0, 0, 1, 1)
+        self.catalogSearchTipLabel = BodyLabel(self.downloadWithCatalog)
+        self.catalogSearchTipLabel.setObjectName("catalogSearchTipLabel")
+        self.gridLayout_11.addWidget(self.catalogSearchTipLabel, 0, 1, 1, 1)
+        self.rebuildCatalogBtn = PushButton(
+            icon=FIF.UPDATE, text=self.tr("更新索引"), parent=self.downloadWithCatalog
+        )
+        self.rebuildCatalogBtn.setObjectName("rebuildCatalogBtn")
+        self.gridLayout_11.addWidget(self.rebuildCatalogBtn, 0, 2, 1, 1)
+
+        self.catalogScrollArea = MySmoothScrollArea(self.downloadWithCatalog)
+        self.catalogScrollArea.setFrameShape(QFrame.NoFrame)
+        self.catalogScrollArea.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.catalogScrollArea.setWidgetResizable(True)
+        self.catalogScrollArea.setObjectName("catalogScrollArea")
+
+        self.catalogScrollAreaContents = QWidget()
+        self.catalogScrollAreaContents.setGeometry(QRect(0, 0, 346, 349))
+        self.catalogScrollAreaContents.setObjectName("catalogScrollAreaContents")
+
+        self.catalogLayout = QVBoxLayout(self.catalogScrollAreaContents)
+        self.catalogLayout.setContentsMargins(0, 0, 0, 0)
+        self.catalogLayout.setObjectName("catalogLayout")
+
+        self.catalogScrollArea.setWidget(self.catalogScrollAreaContents)
+        self.gridLayout_11.addWidget(self.catalogScrollArea, 1, 0, 1, 3)
+        self.downloadStackedWidget.addWidget(self.downloadWithCatalog)
         self.gridLayout.addWidget(self.downloadStackedWidget, 3, 2, 1, 1)
 
         self.VerticalSeparator = VerticalSeparator(self)
@@ -597,9 +662,7 @@ class DownloadPage(QWidget):
             self.downloadWithPolarsAPI,
             self.downloadWithAkiraCloud,
         ]
-        self.downloadStackedWidget.setCurrentWidget(
-            self.dsList[settingsVariables.downloadSourceList.index(cfg.get(cfg.downloadSource))]
-        )
+        self.downloadStackedWidget.setCurrentWidget(self.dsList[self.downloadSourceIndex()])
 
         self.setObjectName("DownloadInterface")
 
@@ -611,18 +674,42 @@ class DownloadPage(QWidget):
         self.refreshFastMirrorAPIBtn.setText(self.tr("刷新"))
         self.polarsTitle.setText("核心类型")
         self.akiraTitle.setText("核心类型")
+        self.catalogSearchTitle.setText(self.tr("搜索结果"))
+        self.catalogSearchLineEdit.setPlaceholderText(
+            self.tr("搜索所有下载源，如 paper 1.20.4 最新")
+        )
 
         self.MCSLAPIBreadcrumbBar.addItem("MCSLAPI", "MCSLAPI")
+        # 手动刷新时让缓存过期，强制向镜像站重新验证
+        self.refreshMCSLAPIBtn.clicked.connect(lambda: httpCache.expire(MCSLAPI_LIST_URL))
         self.refreshMCSLAPIBtn.clicked.connect(
             lambda: self.getMCSLAPI(f"/{self.MCSLAPIBreadcrumbBar.currentItem().routeKey}")
         )
+        self.refreshPolarsAPIBtn.clicked.connect(lambda: httpCache.expire(POLARS_API_URL))
         self.refreshPolarsAPIBtn.clicked.connect(self.getPolarsAPI)
+        self.refreshFastMirrorAPIBtn.clicked.connect(lambda: httpCache.expire(FASTMIRROR_API_URL))
         self.refreshFastMirrorAPIBtn.clicked.connect(self.getFastMirrorAPI)
+        httpCache.updated.connect(self.onCatalogUpdated)
+        # 输入停顿后再搜索
+        self.catalogSearchTimer = QTimer(self)
+        self.catalogSearchTimer.setSingleShot(True)
+        self.catalogSearchTimer.setInterval(250)
+        self.catalogSearchTimer.timeout.connect(self.searchCatalog)
+        self.catalogSearchLineEdit.textChanged.connect(self.onCatalogSearchTextChanged)
+        self.catalogSearchLineEdit.searchSignal.connect(self.searchCatalog)
+        self.catalogSearchLineEdit.clearSignal.connect(self.onCatalogSearchTextChanged)
+        self.rebuildCatalogBtn.clicked.connect(self.rebuildCatalog)
+        coreCatalog.catalogUpdated.connect(self.searchCatalog)
         self.refreshMCSLAPIBtn.setEnabled(False)
         self.scrollAreaSpacer = QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding)
         self.createCustomDownloadBtn.clicked.connect(self.downloadCustomURLFile)
         self.openDownloadFolderBtn.clicked.connect(lambda: openLocalFile(".\\MCSL2\\Downloads\\"))
         self.MCSLAPIBreadcrumbBar.currentIndexChanged.connect(self.getMCSLAPI)
+        self.downloadStackedWidget.currentChanged.connect(self.onDownloadTabChanged)
+        self.MCSLAPIScrollArea.verticalScrollBar().valueChanged.connect(self.onMCSLAPIScrolled)
+        self.buildScrollArea.verticalScrollBar().valueChanged.connect(
+            self.onFastMirrorBuildsScrolled
+        )
         self.openDownloadEntriesBtn.clicked.connect(
             lambda: {
                 (box := DownloadEntryBox(self)),
@@ -638,16 +725,133 @@ class DownloadPage(QWidget):
     @pyqtSlot(int)
     def onPageChangedRefresh(self, currentChanged):
         if currentChanged == 3:
-            self.subTitleLabel.setText(
-                self.tr(
-                    f"Aria2引擎高速驱动！ - 当前下载源：{settingsVariables.downloadSourceTextList[settingsVariables.downloadSourceList.index(cfg.get(cfg.downloadSource))]}"  # noqa: E501
-                )
-            )
-            self.downloadStackedWidget.setCurrentWidget(
-                self.dsList[settingsVariables.downloadSourceList.index(cfg.get(cfg.downloadSource))]
+            self.failedDownloadSources.clear()
+            self.autoSelectedSource = None
+            if cfg.get(cfg.autoSelectDownloadSource):
+                mirrorProber.probeAll()
+                self.autoSelectedSource = self.currentDownloadSource()
+            self.switchDownloadSource(self.downloadSourceIndex())
+            if self.catalogSearchLineEdit.text().strip():
+                self.downloadStackedWidget.setCurrentWidget(self.downloadWithCatalog)
+
+    def currentDownloadSource(self) -> str:
+        """设置中的下载源；开启自动选择时为测速最快、本次还没有失败过的下载源"""
+        preferred = cfg.get(cfg.downloadSource)
+        if not cfg.get(cfg.autoSelectDownloadSource):
+            return preferred
+        return mirrorProber.best(preferred, exclude=self.failedDownloadSources) or preferred
+
+    def downloadSourceIndex(self) -> int:
+        return settingsVariables.downloadSourceList.index(self.currentDownloadSource())
+
+    def switchDownloadSource(self, index: int):
+        self.subTitleLabel.setText(
+            self.tr(
+                "Aria2引擎高速驱动！ - 当前下载源："
+                f"{settingsVariables.downloadSourceTextList[index]}"
             )
+        )
+        self.downloadStackedWidget.setCurrentWidget(self.dsList[index])
+        self.refreshDownloads()
+
+    def failoverDownloadSource(self, failedSource: str) -> bool:
+        """
+        下载源获取失败时记录下来；若它是自动选中的，换用下一个最快的可用下载源\n
+        已换源时返回True，调用方不必再显示错误
+        """
+        mirrorProber.recordFailure(failedSource)
+        self.failedDownloadSources.add(failedSource)
+        if failedSource != self.autoSelectedSource or not cfg.get(cfg.autoSelectDownloadSource):
+            return False
+        nextSource = mirrorProber.best(
+            cfg.get(cfg.downloadSource), exclude=self.failedDownloadSources
+        )
+        if nextSource is None:
+            return False
+        self.autoSelectedSource = nextSource
+        sources = settingsVariables.downloadSourceList
+        texts = settingsVariables.downloadSourceTextList
+        index = sources.index(nextSource)
+        InfoBar.info(
+            title=self.tr("已自动换源"),
+            content=self.tr(
+                f"{texts[sources.index(failedSource)]}获取失败，已切换到{texts[index]}。"
+            ),
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=2222,
+            parent=self,
+        )
+        # 等当前的失败处理返回后再切换，避免在其中重入刷新逻辑
+        QTimer.singleShot(0, lambda: self.switchDownloadSource(index))
+        return True
+
+    @staticmethod
+    def isFetching(future: Optional[FetchFuture]) -> bool:
+        return future is not None and future.isPending()
+
+    def finishStateToolTip(self, name: str, content: str):
+        """结束名为name的加载提示（如果有）"""
+        if (tip := getattr(self, name, None)) is not None:
+            tip.setContent(content)
+            tip.setState(True)
+            setattr(self, name, None)
+
+    @pyqtSlot(int)
+    def onDownloadTabChanged(self, index):
+        """
+        切换下载源时取消其他下载源还没完成的请求，它们的结果不会再送达；
+        回到因此没有内容的下载源时重新加载
+        """
+        if index >= len(self.dsList):
+            # 搜索结果页不影响各下载源
+            return
+        for i, source in enumerate(settingsVariables.downloadSourceList):
+            if i != index and asyncFetcher.pendingCount(source):
+                self.cancelDownloadTab(i)
+        source = settingsVariables.downloadSourceList[index]
+        if asyncFetcher.pendingCount(source):
+            return
+        if index == 1 and not downloadVariables.MCSLAPIDownloadUrlDict:
+            self.getMCSLAPI(f"/{self.MCSLAPIBreadcrumbBar.currentItem().routeKey}")
+        elif (index == 0 and not downloadVariables.FastMirrorAPIDict) or (
+            index == 2 and not downloadVariables.PolarTypeDict
+        ):
+            self.refreshDownloads()
+        elif index == 3 and not downloadVariables.AkiraTypeList:
             self.refreshDownloads()
 
+    def cancelDownloadTab(self, index):
+        """取消一个下载源的所有请求，并收起它的加载提示"""
+        asyncFetcher.cancelGroup(settingsVariables.downloadSourceList[index])
+        cancelled = self.tr("已取消")
+        if index == 0:
+            self.fmAPIFuture = None
+            self.fmBuildFutures.clear()
+            self.fmWaitingBuildPage = None
+            self.finishStateToolTip("getFastMirrorStateToolTip", cancelled)
+            self.refreshFastMirrorAPIBtn.setEnabled(True)
+        elif index == 1:
+            if self.MCSLAPIFuture is not None:
+                # 目录没有加载完，回来时重新加载
+                self.MCSLAPIFuture = None
+                downloadVariables.MCSLAPIDownloadUrlDict.clear()
+                self.releaseMCSLAPIMemory()
+            self.MCSLAPIPrefetchFutures.clear()
+            self.MCSLAPIWaitingPage = None
+            self.refreshMCSLAPIBtn.setEnabled(True)
+        elif index == 2:
+            self.polarsTypeFuture = self.polarsCoreFuture = None
+            self.finishStateToolTip("getPolarsStateToolTip", cancelled)
+            self.finishStateToolTip("getPolarsCoreStateToolTip", cancelled)
+            self.refreshPolarsAPIBtn.setEnabled(True)
+        elif index == 3:
+            self.akiraTypeFuture = self.akiraCoreFuture = None
+            self.finishStateToolTip("getAkiraStateToolTip", cancelled)
+            self.finishStateToolTip("getAkiraCoreStateToolTip", cancelled)
+            self.refreshAkiraCloudBtn.setEnabled(True)
+
     def refreshDownloads(self):
         """刷新下载页面主逻辑"""
         # FastMirror
@@ -681,10 +885,7 @@ class DownloadPage(QWidget):
         elif self.downloadStackedWidget.currentIndex() == 1:
             # 如果存在列表且不为空,则不再重新获取
             if downloadVariables.MCSLAPIDownloadUrlDict:
-                if (
-                    str(downloadVariables.MCSLAPIDownloadUrlDict["name"]) != "-2"
-                    or str(downloadVariables.MCSLAPIDownloadUrlDict["name"]) != "-1"
-                ):
+                if type(downloadVariables.MCSLAPIDownloadUrlDict["name"]) is list:
                     self.initMCSLAPIDownloadWidget()
                 else:
                     self.showMCSLAPIFailedWidget()
@@ -692,6 +893,123 @@ class DownloadPage(QWidget):
                 self.getMCSLAPI()
                 self.refreshMCSLAPIBtn.setEnabled(False)
 
+    @pyqtSlot(str)
+    def onCatalogUpdated(self, url):
+        """
+        后台更新缓存后发现镜像站的核心列表有变化：丢弃内存中的旧列表，
+        正在显示的下载源立即重新加载（此时缓存已是新的，不会再访问网络）
+        """
+        catalogs = {
+            FASTMIRROR_API_URL: (downloadVariables.FastMirrorAPIDict, 0),
+            POLARS_API_URL: (downloadVariables.PolarTypeDict, 2),
+            f"{AKIRA_CLOUD_URL}/": (downloadVariables.AkiraTypeList, 3),
+        }
+        if url not in catalogs:
+            return
+        catalog, index = catalogs[url]
+        catalog.clear()
+        if self.isVisible() and self.downloadStackedWidget.currentIndex() == index:
+            self.refreshDownloads()
+
+    ############
+    # 核心搜索 #
+    ############
+
+    def onCatalogSearchTextChanged(self, *_):
+        if self.catalogSearchLineEdit.text().strip():
+            self.catalogSearchTimer.start()
+            return
+        # 清空搜索框时回到当前下载源
+        self.catalogSearchTimer.stop()
+        self.downloadStackedWidget.setCurrentWidget(self.dsList[self.downloadSourceIndex()])
+
+    def searchCatalog(self, *_):
+        """在本地索引中搜索，不访问网络；索引为空或过期时在后台重建"""
+        if not (query := self.catalogSearchLineEdit.text().strip()):
+            return
+        self.downloadStackedWidget.setCurrentWidget(self.downloadWithCatalog)
+        if coreCatalog.isStale():
+            self.rebuildCatalog()
+        self.catalogSearchResults = coreCatalog.search(query)
+        self.releaseCatalogSearchMemory()
+        for i, entry in enumerate(self.catalogSearchResults):
+            details = [entry.updateTime] if entry.updateTime else []
+            if entry.size:
+                details.append(f"{entry.size / 1048576:.1f} MB")
+            details.append("来源：" + "、".join(mirror for mirror, _ in entry.urls))
+            self.catalogLayout.addWidget(
+                FastMirrorBuildListWidget(
+                    buildVer=f"{entry.core} {entry.mcVersion} {entry.build}".strip(),
+                    syncTime=" · ".join(details),
+                    coreVersion=i,
+                    btnSlot=self.downloadCatalogFile,
+                    parent=self,
+                )
+            )
+        self.catalogLayout.addSpacerItem(self.scrollAreaSpacer)
+        self.updateCatalogSearchTip()
+
+    def updateCatalogSearchTip(self):
+        if self.catalogRebuildThread is not None:
+            tip = self.tr("正在更新索引，结果可能不完整…")
+        elif not coreCatalog.entries:
+            tip = self.tr("索引为空，请检查网络后点击“更新索引”")
+        else:
+            tip = self.tr(f"找到{len(self.catalogSearchResults)}个结果")
+        self.catalogSearchTipLabel.setText(tip)
+
+    def releaseCatalogSearchMemory(self):
+        self.catalogLayout.removeItem(self.scrollAreaSpacer)
+        for i in reversed(range(self.catalogLayout.count())):
+            if (widget := self.catalogLayout.itemAt(i).widget()) is not None:
+                widget.setParent(None)
+                widget.deleteLater()
+
+    def rebuildCatalog(self):
+        if self.catalogRebuildThread is not None:
+            return
+        self.catalogRebuildThread = CoreCatalogRebuildThread(coreCatalog, self)
+        self.catalogRebuildThread.rebuildFinished.connect(self.onCatalogRebuilt)
+        self.catalogRebuildThread.finished.connect(self.catalogRebuildThread.deleteLater)
+        self.rebuildCatalogBtn.setEnabled(False)
+        self.catalogRebuildThread.start()
+        self.updateCatalogSearchTip()
+
+    @pyqtSlot(int)
+    def onCatalogRebuilt(self, count):
+        self.catalogRebuildThread = None
+        self.rebuildCatalogBtn.setEnabled(True)
+        self.updateCatalogSearchTip()
+        if not count:
+            InfoBar.warning(
+                title=self.tr("索引更新失败"),
+                content=self.tr("无法从下载源获取核心列表，请稍后再试。"),
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=2222,
+                parent=self,
+            )
+
+    def downloadCatalogFile(self):
+        """下载搜索结果，把各下载源的地址按测速结果排好后一起交给Aria2，分段从多个源下载"""
+        if not self.checkAria2Service():
+            return
+        entry = self.catalogSearchResults[self.sender().property("core_version")]
+        uris = mirrorProber.rankUrls(entry.urls, cfg.get(cfg.downloadSource))
+        uri = uris if len(uris) > 1 else uris[0]
+        fileName, _, fileFormat = entry.fileName.rpartition(".")
+        if not fileName:
+            fileName, fileFormat = entry.fileName, "jar"
+        # 有校验值时交给Aria2校验，某个源提供的文件不一致时下载会失败而不是得到损坏的核心
+        self.checkDownloadFileExists(
+            fileName,
+            fileFormat,
+            uri,
+            (f"{fileName}.{fileFormat}", entry.core, entry.mcVersion, entry.build),
+            options={"checksum": f"sha-1={entry.sha1}"} if entry.sha1 else None,
+        )
+
     ###########
     # MCSLAPI #
     ###########
@@ -717,34 +1035,90 @@ class DownloadPage(QWidget):
             return
         if path == "MCSLAPI" or path == "/MCSLAPI":
             path = ""
-        workThread = self.fetchMCSLAPIDownloadURLThreadFactory.create(
-            _singleton=True, finishSlot=self.updateMCSLAPIDownloadUrlDict, path=path
-        )
+        # 只显示最后进入的目录：先发起新请求再取消旧的，同一目录的请求会合并
+        previous = self.MCSLAPIFuture
+        self.MCSLAPIFuture = asyncFetcher.fetch(
+            MCSLAPIDownloadURLParser.parseDownloaderAPIUrl, path, group="MCSLAPI"
+        ).then(self.updateMCSLAPIDownloadUrlDict)
+        if previous is not None:
+            previous.cancel()
         if path != "" and type(self.sender()) is not PrimaryPushButton:
             path = path.replace("/", "")
             self.MCSLAPIBreadcrumbBar.addItem(path, path)
-        if workThread.isRunning():
-            self.refreshMCSLAPIBtn.setEnabled(False)
-            return
-        else:
-            self.releaseMCSLAPIMemory()
-            self.MCSLAPIScrollAreaLayout.addWidget(MCSLAPILoadingWidget())
-            workThread.start()
-            self.refreshMCSLAPIBtn.setEnabled(False)
+        self.releaseMCSLAPIMemory()
+        self.MCSLAPIScrollAreaLayout.addWidget(MCSLAPILoadingWidget())
+        self.refreshMCSLAPIBtn.setEnabled(False)
 
-    @pyqtSlot(dict)
     def updateMCSLAPIDownloadUrlDict(self, _downloadUrlDict: dict):
-        """更新获取MCSLAPI结果"""
+        """更新获取MCSLAPI结果（目录的第一页）"""
+        self.MCSLAPIFuture = None
+        for future in self.MCSLAPIPrefetchFutures.values():
+            future.cancel()
+        self.MCSLAPIPrefetchFutures.clear()
+        downloadVariables.MCSLAPIDownloadUrlDict.clear()
         downloadVariables.MCSLAPIDownloadUrlDict.update(_downloadUrlDict)
-        if (
-            str(downloadVariables.MCSLAPIDownloadUrlDict["name"]) != "-2"
-            or str(downloadVariables.MCSLAPIDownloadUrlDict["name"]) != "-1"
-        ):
+        self.MCSLAPIPrefetched.clear()
+        self.MCSLAPIWaitingPage = None
+        if type(downloadVariables.MCSLAPIDownloadUrlDict["name"]) is list:
             self.initMCSLAPIDownloadWidget()
         else:
             self.showMCSLAPIFailedWidget()
 
+    def hasMoreMCSLAPIPages(self) -> bool:
+        downloadDict = downloadVariables.MCSLAPIDownloadUrlDict
+        return (
+            type(downloadDict.get("name")) is list
+            and len(downloadDict["name"]) < downloadDict["total"]
+        )
+
+    def prefetchMCSLAPIPage(self, path, page):
+        """在后台获取目录的第page页"""
+        key = (path, page)
+        if key in self.MCSLAPIPrefetched or key in self.MCSLAPIPrefetchFutures:
+            return
+        self.MCSLAPIPrefetchFutures[key] = asyncFetcher.fetch(
+            MCSLAPIDownloadURLParser.parseDownloaderAPIUrl, path, page=page, group="MCSLAPI"
+        ).then(self.onMCSLAPIPagePrefetched)
+
+    def onMCSLAPIPagePrefetched(self, _downloadUrlDict: dict):
+        key = (_downloadUrlDict["path"], _downloadUrlDict["page"])
+        self.MCSLAPIPrefetchFutures.pop(key, None)
+        if type(_downloadUrlDict["name"]) is not list:
+            # 失败的页不保留，滚动到底部时会重新获取
+            if self.MCSLAPIWaitingPage == key:
+                self.MCSLAPIWaitingPage = None
+            return
+        self.MCSLAPIPrefetched[key] = _downloadUrlDict
+        if self.MCSLAPIWaitingPage == key:
+            self.MCSLAPIWaitingPage = None
+            self.loadMoreMCSLAPI()
+
+    def loadMoreMCSLAPI(self):
+        """显示下一页，还没预取到时先发起请求，到达后再显示"""
+        if self.MCSLAPIWaitingPage is not None or not self.hasMoreMCSLAPIPages():
+            return
+        downloadDict = downloadVariables.MCSLAPIDownloadUrlDict
+        key = (downloadDict["path"], downloadDict["page"] + 1)
+        if (nextPage := self.MCSLAPIPrefetched.pop(key, None)) is None:
+            self.MCSLAPIWaitingPage = key
+            self.prefetchMCSLAPIPage(*key)
+            return
+        start = len(downloadDict["name"])
+        for k in ("name", "size", "is_dir"):
+            downloadDict[k].extend(nextPage[k])
+        downloadDict["page"] = nextPage["page"]
+        downloadDict["total"] = nextPage["total"]
+        self.addMCSLAPIDownloadWidgets(start)
+
+    def onMCSLAPIScrolled(self, *_):
+        scrollBar = self.MCSLAPIScrollArea.verticalScrollBar()
+        if scrollBar.value() >= scrollBar.maximum() - self.MCSLAPIScrollArea.height() // 2:
+            self.loadMoreMCSLAPI()
+
     def showMCSLAPIFailedWidget(self):
+        if self.failoverDownloadSource("MCSLAPI"):
+            self.refreshMCSLAPIBtn.setEnabled(True)
+            return
         self.releaseMCSLAPIMemory()
         self.MCSLAPIScrollAreaLayout.addWidget(MCSLAPILoadingErrorWidget())
         self.refreshMCSLAPIBtn.setEnabled(True)
@@ -762,9 +1136,13 @@ class DownloadPage(QWidget):
         """初始化MCSLAPI模式下的UI"""
         self.releaseMCSLAPIMemory()
         self.refreshMCSLAPIBtn.setEnabled(True)
+        self.addMCSLAPIDownloadWidgets(0)
+
+    def addMCSLAPIDownloadWidgets(self, start):
+        """显示第start条及之后的条目，然后预取下一页"""
+        self.MCSLAPIScrollAreaLayout.removeItem(self.scrollAreaSpacer)
         downloadDict = downloadVariables.MCSLAPIDownloadUrlDict
-        # try:
-        for i in range(downloadDict["total"]):
+        for i in range(start, len(downloadDict["name"])):
             self.MCSLAPIScrollAreaLayout.addWidget(
                 MCSLAPIDownloadWidget(
                     link=f"/{downloadDict['name'][i]}"
@@ -781,8 +1159,13 @@ class DownloadPage(QWidget):
                 )
             )
         self.MCSLAPIScrollAreaLayout.addSpacerItem(self.scrollAreaSpacer)
-        # except TypeError:
-        #     self.showMCSLAPIFailedWidget()
+        if start == len(downloadDict["name"]):
+            # 空页说明目录在两次请求之间变了或缓存已过时，total不再可信，不再往后翻页
+            downloadDict["total"] = start
+        if self.hasMoreMCSLAPIPages():
+            self.prefetchMCSLAPIPage(downloadDict["path"], downloadDict["page"] + 1)
+            # 内容不足一屏时没有滚动条，布局完成后检查一次是否需要继续加载
+            QTimer.singleShot(0, self.onMCSLAPIScrolled)
 
     def downloadMCSLAPIFile(self):
         """下载MCSLAPI文件"""
@@ -826,24 +1209,21 @@ class DownloadPage(QWidget):
 
     def getPolarsAPI(self):
         """请求Polars API"""
-        workThread = self.fetchPolarsAPITypeThreadFactory.create(
-            _singleton=True, finishSlot=self.updatePolarsAPIDict
-        )
-        if workThread.isRunning():
-            self.refreshPolarsAPIBtn.setEnabled(False)
+        self.refreshPolarsAPIBtn.setEnabled(False)
+        if self.isFetching(self.polarsTypeFuture):
             return
-        else:
-            self.getPolarsStateToolTip = StateToolTip(
-                self.tr("正在请求极星镜像API"), self.tr("加载中，请稍后..."), self
-            )
-            self.getPolarsStateToolTip.move(self.getPolarsStateToolTip.getSuitablePos())
-            self.getPolarsStateToolTip.show()
-            workThread.start()
-            self.refreshPolarsAPIBtn.setEnabled(False)
+        self.getPolarsStateToolTip = StateToolTip(
+            self.tr("正在请求极星镜像API"), self.tr("加载中，请稍后..."), self
+        )
+        self.getPolarsStateToolTip.move(self.getPolarsStateToolTip.getSuitablePos())
+        self.getPolarsStateToolTip.show()
+        self.polarsTypeFuture = asyncFetcher.fetch(
+            PolarsAPIDownloadURLParser.parsePolarsAPIUrl, group="PolarsAPI"
+        ).then(self.updatePolarsAPIDict)
 
-    @pyqtSlot(dict)
     def updatePolarsAPIDict(self, _APIDict: dict):
         """更新Polars API"""
+        self.polarsTypeFuture = None
         downloadVariables.PolarTypeDict.clear()
         downloadVariables.PolarTypeDict.update(_APIDict)
         if downloadVariables.PolarTypeDict["name"] != -1:
@@ -859,6 +1239,8 @@ class DownloadPage(QWidget):
         self.refreshPolarsAPIBtn.setEnabled(True)
 
     def showPolarsAPIFailedTip(self):
+        if self.failoverDownloadSource("PolarsAPI"):
+            return
         InfoBar.error(
             title=self.tr("错误"),
             content=self.tr("获取极星镜像API失败！\n尝试检查网络后，请再尝试刷新。"),
@@ -890,23 +1272,23 @@ class DownloadPage(QWidget):
         self.getPolarsCoreAPI(idx=self.sender().property("id"))
 
     def getPolarsCoreAPI(self, idx):
-        workThread = self.fetchPolarsAPICoreThreadFactory.create(
-            _singleton=True, idx=idx, finishSlot=self.updatePolarsAPICoreDict
-        )
-        if workThread.isRunning():
-            self.refreshPolarsAPIBtn.setEnabled(False)
+        """请求一个核心类型的列表，只显示最后选择的类型"""
+        self.refreshPolarsAPIBtn.setEnabled(False)
+        previous = self.polarsCoreFuture
+        self.polarsCoreFuture = asyncFetcher.fetch(
+            PolarsAPIDownloadURLParser.parsePolarsAPICoreUrl, idx, group="PolarsAPI"
+        ).then(self.updatePolarsAPICoreDict)
+        if self.isFetching(previous):
+            previous.cancel()
             return
-        else:
-            self.getPolarsCoreStateToolTip = StateToolTip(
-                self.tr("正在进一步请求极星镜像API"), self.tr("加载中，请稍后..."), self
-            )
-            self.getPolarsCoreStateToolTip.move(self.getPolarsCoreStateToolTip.getSuitablePos())
-            self.getPolarsCoreStateToolTip.show()
-            workThread.start()
-            self.refreshPolarsAPIBtn.setEnabled(False)
+        self.getPolarsCoreStateToolTip = StateToolTip(
+            self.tr("正在进一步请求极星镜像API"), self.tr("加载中，请稍后..."), self
+        )
+        self.getPolarsCoreStateToolTip.move(self.getPolarsCoreStateToolTip.getSuitablePos())
+        self.getPolarsCoreStateToolTip.show()
 
-    @pyqtSlot(dict)
     def updatePolarsAPICoreDict(self, _APIDict: dict):
+        self.polarsCoreFuture = None
         downloadVariables.PolarCoreDict.clear()
         downloadVariables.PolarCoreDict.update(_APIDict)
         if downloadVariables.PolarCoreDict["name"] != -1:
@@ -974,23 +1356,20 @@ class DownloadPage(QWidget):
 
     def getAkiraInfo(self):
         """请求Polars API"""
-        workThread = self.fetchAkiraTypeThreadFactory.create(
-            _singleton=True, finishSlot=self.updateAkiraTypeList
-        )
-        if workThread.isRunning():
-            self.refreshAkiraCloudBtn.setEnabled(False)
+        self.refreshAkiraCloudBtn.setEnabled(False)
+        if self.isFetching(self.akiraTypeFuture):
             return
-        else:
-            self.getAkiraStateToolTip = StateToolTip(
-                self.tr("正在请求Akira Cloud镜像站"), self.tr("加载中，请稍后..."), self
-            )
-            self.getAkiraStateToolTip.move(self.getAkiraStateToolTip.getSuitablePos())
-            self.getAkiraStateToolTip.show()
-            workThread.start()
-            self.refreshAkiraCloudBtn.setEnabled(False)
+        self.getAkiraStateToolTip = StateToolTip(
+            self.tr("正在请求Akira Cloud镜像站"), self.tr("加载中，请稍后..."), self
+        )
+        self.getAkiraStateToolTip.move(self.getAkiraStateToolTip.getSuitablePos())
+        self.getAkiraStateToolTip.show()
+        self.akiraTypeFuture = asyncFetcher.fetch(
+            AkiraCloudDownloadURLParser.getDownloadTypeList, group="AkiraCloud"
+        ).then(self.updateAkiraTypeList)
 
-    @pyqtSlot(list)
     def updateAkiraTypeList(self, _APIList):
+        self.akiraTypeFuture = None
         downloadVariables.AkiraTypeList = _APIList
         if len(downloadVariables.AkiraTypeList):
             self.getAkiraStateToolTip.setContent(self.tr("请求Akira Cloud镜像站完毕！"))
@@ -1005,6 +1384,8 @@ class DownloadPage(QWidget):
         self.refreshAkiraCloudBtn.setEnabled(True)
 
     def showAkiraFailedTip(self):
+        if self.failoverDownloadSource("AkiraCloud"):
+            return
         InfoBar.error(
             title=self.tr("错误"),
             content=self.tr("获取Akira Cloud镜像站信息失败！\n尝试检查网络后，请再尝试刷新。"),
@@ -1035,23 +1416,23 @@ class DownloadPage(QWidget):
         self.getAkiraCore(coreType=self.sender().property("name"))
 
     def getAkiraCore(self, coreType):
-        workThread = self.fetchAkiraCoreThreadFactory.create(
-            _singleton=True, coreType=coreType, finishSlot=self.updateAkiraAPICoreDict
-        )
-        if workThread.isRunning():
-            self.refreshAkiraCloudBtn.setEnabled(False)
+        """请求一个核心类型的列表，只显示最后选择的类型"""
+        self.refreshAkiraCloudBtn.setEnabled(False)
+        previous = self.akiraCoreFuture
+        self.akiraCoreFuture = asyncFetcher.fetch(
+            AkiraCloudDownloadURLParser.getDownloadCoreList, coreType, group="AkiraCloud"
+        ).then(self.updateAkiraAPICoreDict)
+        if self.isFetching(previous):
+            previous.cancel()
             return
-        else:
-            self.getAkiraCoreStateToolTip = StateToolTip(
-                self.tr("正在进一步请求Akira Cloud镜像站"), self.tr("加载中，请稍后..."), self
-            )
-            self.getAkiraCoreStateToolTip.move(self.getAkiraCoreStateToolTip.getSuitablePos())
-            self.getAkiraCoreStateToolTip.show()
-            workThread.start()
-            self.refreshAkiraCloudBtn.setEnabled(False)
+        self.getAkiraCoreStateToolTip = StateToolTip(
+            self.tr("正在进一步请求Akira Cloud镜像站"), self.tr("加载中，请稍后..."), self
+        )
+        self.getAkiraCoreStateToolTip.move(self.getAkiraCoreStateToolTip.getSuitablePos())
+        self.getAkiraCoreStateToolTip.show()
 
-    @pyqtSlot(dict)
     def updateAkiraAPICoreDict(self, _APIDict: dict):
+        self.akiraCoreFuture = None
         downloadVariables.AkiraCoreDict.clear()
         downloadVariables.AkiraCoreDict.update(_APIDict)
         if downloadVariables.AkiraCoreDict["name"] != "-1":
@@ -1141,44 +1522,115 @@ class DownloadPage(QWidget):
 
     def getFastMirrorAPI(self):
         """请求FastMirror API"""
+        self.fmBuildPages.clear()
         self.releasePolarsAPIMemory()
         self.releasePolarsAPIMemory(1)
-        workThread = self.fetchFMAPIThreadFactory.create(
-            _singleton=True, finishSlot=self.updateFastMirrorAPIDict
-        )
-        if workThread.isRunning():
-            self.refreshFastMirrorAPIBtn.setEnabled(False)
+        self.refreshFastMirrorAPIBtn.setEnabled(False)
+        if self.isFetching(self.fmAPIFuture):
             return
-        else:
-            self.getFastMirrorStateToolTip = StateToolTip(
-                self.tr("正在请求FastMirror API"), self.tr("加载中，请稍后..."), self
-            )
-            self.getFastMirrorStateToolTip.move(self.getFastMirrorStateToolTip.getSuitablePos())
-            self.getFastMirrorStateToolTip.show()
-            workThread.start()
-            self.refreshFastMirrorAPIBtn.setEnabled(False)
+        self.getFastMirrorStateToolTip = StateToolTip(
+            self.tr("正在请求FastMirror API"), self.tr("加载中，请稍后..."), self
+        )
+        self.getFastMirrorStateToolTip.move(self.getFastMirrorStateToolTip.getSuitablePos())
+        self.getFastMirrorStateToolTip.show()
+        self.fmAPIFuture = asyncFetcher.fetch(
+            FastMirrorAPIDownloadURLParser.parseFastMirrorAPIUrl, group="FastMirror"
+        ).then(self.updateFastMirrorAPIDict)
 
     def getFastMirrorAPICoreVersion(self, name, mcVersion):
-        """请求FastMirror API 核心的版本"""
-        workThread = self.fetchFMAPICoreVersionThreadFactory.create(
-            name=name,
-            mcVersion=mcVersion,
-            _singleton=True,
-            finishSlot=self.updateFastMirrorAPICoreVersionDict,
-        )
-        if workThread.isRunning():
+        """请求FastMirror API 核心的版本，已加载过的直接显示"""
+        self.cancelFastMirrorBuildFetches(keep=(name, mcVersion))
+        downloadVariables.FastMirrorAPICoreVersionDict.clear()
+        self.releaseFMMemory(2)
+        if (page := self.fmBuildPages.get((name, mcVersion), {}).get(0)) is not None:
+            self.showFastMirrorBuildPage(page)
             return
-        else:
+        if getattr(self, "getFastMirrorStateToolTip", None) is None:
             self.getFastMirrorStateToolTip = StateToolTip(
                 self.tr("正在进一步请求FastMirror API"), self.tr("加载中，请稍后..."), self
             )
             self.getFastMirrorStateToolTip.move(self.getFastMirrorStateToolTip.getSuitablePos())
             self.getFastMirrorStateToolTip.show()
-            workThread.start()
+        self.fmWaitingBuildPage = (name, mcVersion, 0)
+        self.fetchFastMirrorBuildPage(name, mcVersion, 0)
+
+    def fetchFastMirrorBuildPage(self, name, mcVersion, offset):
+        """在后台获取一页构建"""
+        key = (name, mcVersion, offset)
+        if key in self.fmBuildFutures:
+            return
+        self.fmBuildFutures[key] = asyncFetcher.fetch(
+            FastMirrorAPIDownloadURLParser.parseFastMirrorAPICoreVersionUrl,
+            name,
+            mcVersion,
+            offset,
+            group="FastMirror",
+        ).then(self.onFastMirrorBuildPageFetched)
+
+    def cancelFastMirrorBuildFetches(self, keep=None):
+        """切换选择时取消其他(核心, MC版本)的构建请求，它们的结果不会再送达"""
+        self.fmWaitingBuildPage = None
+        for key in [k for k in self.fmBuildFutures if k[:2] != keep]:
+            self.fmBuildFutures.pop(key).cancel()
+
+    def onFastMirrorBuildPageFetched(self, _APICoreVersionDict: dict):
+        """一页构建获取完毕"""
+        pageKey = (_APICoreVersionDict["core"], _APICoreVersionDict["mcVersion"])
+        offset = _APICoreVersionDict["offset"]
+        self.fmBuildFutures.pop((*pageKey, offset), None)
+        waited = self.fmWaitingBuildPage == (*pageKey, offset)
+        if waited:
+            self.fmWaitingBuildPage = None
+        if type(_APICoreVersionDict["name"]) is not list:
+            if waited and not offset:
+                self.finishFastMirrorStateToolTip(self.tr("请求FastMirror API失败！"))
+            return
+        self.fmBuildPages.setdefault(pageKey, {})[offset] = _APICoreVersionDict
+        if waited:
+            self.showFastMirrorBuildPage(_APICoreVersionDict)
+
+    def finishFastMirrorStateToolTip(self, content):
+        self.finishStateToolTip("getFastMirrorStateToolTip", content)
+
+    def showFastMirrorBuildPage(self, page: dict):
+        """把一页构建接到列表末尾，偏移为0时重新开始"""
+        buildDict = downloadVariables.FastMirrorAPICoreVersionDict
+        if not page["offset"]:
+            self.finishFastMirrorStateToolTip(self.tr("请求FastMirror API完毕！"))
+            buildDict.clear()
+            buildDict.update(core=page["core"], mcVersion=page["mcVersion"])
+            for k in ("name", "mc_version", "core_version", "update_time", "sha1"):
+                buildDict[k] = []
+        start = len(buildDict["name"])
+        for k in ("name", "mc_version", "core_version", "update_time", "sha1"):
+            buildDict[k].extend(page[k])
+        buildDict["count"] = page["count"]
+        self.addFastMirrorBuildWidgets(start)
+
+    def loadMoreFastMirrorBuilds(self):
+        """显示下一页构建，还没预取到时先发起请求，到达后再显示"""
+        buildDict = downloadVariables.FastMirrorAPICoreVersionDict
+        if (
+            self.fmWaitingBuildPage is not None
+            or not buildDict
+            or len(buildDict["name"]) >= buildDict["count"]
+        ):
+            return
+        key = (buildDict["core"], buildDict["mcVersion"], len(buildDict["name"]))
+        if (page := self.fmBuildPages.get(key[:2], {}).get(key[2])) is not None:
+            self.showFastMirrorBuildPage(page)
+        else:
+            self.fmWaitingBuildPage = key
+            self.fetchFastMirrorBuildPage(*key)
+
+    def onFastMirrorBuildsScrolled(self, *_):
+        scrollBar = self.buildScrollArea.verticalScrollBar()
+        if scrollBar.value() >= scrollBar.maximum() - self.buildScrollArea.height() // 2:
+            self.loadMoreFastMirrorBuilds()
 
-    @pyqtSlot(dict)
     def updateFastMirrorAPIDict(self, _APIDict: dict):
         """更新获取FastMirrorAPI结果"""
+        self.fmAPIFuture = None
         downloadVariables.FastMirrorAPIDict.clear()
         downloadVariables.FastMirrorAPIDict.update(_APIDict)
         if downloadVariables.FastMirrorAPIDict["name"] != -1:
@@ -1193,22 +1645,9 @@ class DownloadPage(QWidget):
             self.showFastMirrorFailedTip()
         self.refreshFastMirrorAPIBtn.setEnabled(True)
 
-    @pyqtSlot(dict)
-    def updateFastMirrorAPICoreVersionDict(self, _APICoreVersionDict: dict):
-        """更新获取FastMirrorAPI结果"""
-        downloadVariables.FastMirrorAPICoreVersionDict.clear()
-        downloadVariables.FastMirrorAPICoreVersionDict.update(_APICoreVersionDict)
-        if downloadVariables.FastMirrorAPICoreVersionDict["name"] != -1:
-            self.getFastMirrorStateToolTip.setContent(self.tr("请求FastMirror API完毕！"))
-            self.getFastMirrorStateToolTip.setState(True)
-            self.getFastMirrorStateToolTip = None
-            self.initFastMirrorCoreVersionListWidget()
-        else:
-            self.getFastMirrorStateToolTip.setContent(self.tr("请求FastMirror API失败！"))
-            self.getFastMirrorStateToolTip.setState(True)
-            self.getFastMirrorStateToolTip = None
-
     def showFastMirrorFailedTip(self):
+        if self.failoverDownloadSource("FastMirror"):
+            return
         i = InfoBar.error(
             title=self.tr("错误"),
             content=self.tr(
@@ -1247,6 +1686,8 @@ class DownloadPage(QWidget):
 
     def fastMirrorCoreNameProcessor(self):
         downloadVariables.selectedName = self.sender().property("name")
+        self.cancelFastMirrorBuildFetches()
+        downloadVariables.FastMirrorAPICoreVersionDict.clear()
         self.initFastMirrorMCVersionsListWidget()
         try:
             self.buildLayout.removeItem(self.scrollAreaSpacer)
@@ -1286,21 +1727,29 @@ class DownloadPage(QWidget):
             mcVersion=downloadVariables.selectedMCVersion,
         )
 
-    def initFastMirrorCoreVersionListWidget(self):
-        self.releaseFMMemory(2)
-        for i in range(len(downloadVariables.FastMirrorAPICoreVersionDict["name"])):
+    def addFastMirrorBuildWidgets(self, start):
+        """显示第start个及之后的构建，然后预取下一页"""
+        self.buildLayout.removeItem(self.scrollAreaSpacer)
+        buildDict = downloadVariables.FastMirrorAPICoreVersionDict
+        for i in range(start, len(buildDict["name"])):
             self.buildLayout.addWidget(
                 FastMirrorBuildListWidget(
-                    buildVer=downloadVariables.FastMirrorAPICoreVersionDict["core_version"][i],
-                    syncTime=downloadVariables.FastMirrorAPICoreVersionDict["update_time"][
-                        i
-                    ].replace("T", " "),
-                    coreVersion=downloadVariables.FastMirrorAPICoreVersionDict["core_version"][i],
+                    buildVer=buildDict["core_version"][i],
+                    syncTime=buildDict["update_time"][i].replace("T", " "),
+                    coreVersion=buildDict["core_version"][i],
                     btnSlot=self.downloadFastMirrorAPIFile,
                     parent=self,
                 )
             )
         self.buildLayout.addSpacerItem(self.scrollAreaSpacer)
+        if start == len(buildDict["name"]):
+            # 空页说明列表在两次请求之间变了或缓存已过时，count不再可信，不再往后翻页
+            buildDict["count"] = start
+        if (offset := len(buildDict["name"])) < buildDict["count"]:
+            if offset not in self.fmBuildPages.get((buildDict["core"], buildDict["mcVersion"]), {}):
+                self.fetchFastMirrorBuildPage(buildDict["core"], buildDict["mcVersion"], offset)
+            # 内容不足一屏时没有滚动条，布局完成后检查一次是否需要继续加载
+            QTimer.singleShot(0, self.onFastMirrorBuildsScrolled)
 
     def downloadFastMirrorAPIFile(self):
         """下载FastMirror API文件"""
@@ -1370,7 +1819,9 @@ class DownloadPage(QWidget):
         else:
             return True
 
-    def checkDownloadFileExists(self, fileName, fileFormat, uri, extraData: tuple) -> bool:
+    def checkDownloadFileExists(
+        self, fileName, fileFormat, uri, extraData: tuple, options: Optional[dict] = None
+    ) -> bool:
         if osp.exists(
             osp.join("MCSL2", "Downloads", f"{fileName}.{fileFormat}")
         ) and not osp.exists(osp.join("MCSL2", "Downloads", f"{fileName}.{fileFormat}.aria2")):
@@ -1380,7 +1831,7 @@ class DownloadPage(QWidget):
                 w.cancelButton.setText(self.tr("覆盖文件"))
                 w.cancelSignal.connect(lambda: remove(f"MCSL2/Downloads/{fileName}.{fileFormat}"))
                 w.cancelSignal.connect(
-                    lambda: self.downloadFile(fileName, fileFormat, uri, extraData)
+                    lambda: self.downloadFile(fileName, fileFormat, uri, extraData, options)
                 )
                 w.exec()
             elif cfg.get(cfg.saveSameFileException) == "overwrite":
@@ -1396,7 +1847,7 @@ class DownloadPage(QWidget):
                     parent=self,
                 )
                 remove(f"MCSL2/Downloads/{fileName}.{fileFormat}")
-                self.downloadFile(fileName, fileFormat, uri, extraData)
+                self.downloadFile(fileName, fileFormat, uri, extraData, options)
             elif cfg.get(cfg.saveSameFileException) == "stop":
                 InfoBar.warning(
                     title=self.tr("警告"),
@@ -1408,9 +1859,11 @@ class DownloadPage(QWidget):
                     parent=self,
                 )
         else:
-            self.downloadFile(fileName, fileFormat, uri, extraData)
+            self.downloadFile(fileName, fileFormat, uri, extraData, options)
 
-    def downloadFile(self, fileName, fileFormat, uri, extraData: tuple):
+    def downloadFile(
+        self, fileName, fileFormat, uri, extraData: tuple, options: Optional[dict] = None
+    ):
         downloadingInfoWidget = DownloadCard(
             fileName=f"{fileName}.{fileFormat}", url=uri, parent=self
         )
@@ -1421,6 +1874,7 @@ class DownloadPage(QWidget):
             stopped=downloadingInfoWidget.onDownloadFinished,
             interval=0.2,
             extraData=extraData,
+            options=options,
         )
         downloadingInfoWidget.canceled.connect(lambda: Aria2Controller.cancelDownloadTask(gid))
         downloadingInfoWidget.paused.connect(
@@ -14,7 +14,7 @@
 Manage exists Minecraft servers.
 """
 
-from json import dump, loads, dumps
+from json import dumps
 from os import getcwd, rename, path as osp, remove
 from shutil import copy, rmtree
 
@@ -49,27 +49,45 @@ from qfluentwidgets import (
     InfoBarPosition,
     StateToolTip,
     isDarkTheme,
-    FlowLayout,
+    SearchLineEdit,
 )
 
 from MCSL2Lib.ProgramControllers import javaDetector
+from MCSL2Lib.ProgramControllers.javaInventory import javaInventory
 from MCSL2Lib.ProgramControllers.interfaceController import ChildStackedWidget
+from MCSL2Lib.ServerControllers.javaCompatibility import (
+    findJava,
+    javaMajorVersion,
+    pickCompatibleJava,
+    serverJavaRequirement,
+)
 from MCSL2Lib.ServerControllers.processCreator import ServerConfigConstructor
 from MCSL2Lib.ServerControllers.serverInstaller import ForgeInstaller
+from MCSL2Lib.ServerControllers.diskUsageScanner import DiskUsageScanner, DiskUsageScanThread
 from MCSL2Lib.ProgramControllers.serverValidator import ServerValidator
 from MCSL2Lib.ProgramControllers.settingsController import cfg
 from MCSL2Lib.Resources.icons import *  # noqa: F401 F403
 from MCSL2Lib.ProgramControllers.interfaceController import MySmoothScrollArea
 from MCSL2Lib.ServerControllers.windowCreator import ServerWindow
 from MCSL2Lib.ServerControllers.processCreator import ServerLauncher
-from MCSL2Lib.ServerControllers.serverUtils import backupServer, backupSaves
+from MCSL2Lib.ServerControllers.serverUtils import (
+    backupServer,
+    backupSaves,
+    incrementalBackup,
+    restoreBackup,
+)
 from MCSL2Lib.Widgets.noServerTip import NoServerWidget
-from MCSL2Lib.Widgets.serverManagerWidget import SingleServerManager
+from MCSL2Lib.Widgets.serverManagerWidget import (
+    ServerFilterProxyModel,
+    ServerListModel,
+    ServerListView,
+)
 from MCSL2Lib.Widgets.singleRunningServerWidget import RunningServerHeaderCardWidget
+from MCSL2Lib.ProgramControllers.serverRegistry import serverRegistry
 from MCSL2Lib.singleton import Singleton
 
 # from MCSL2Lib.Controllers.interfaceController import ChildStackedWidget
-from MCSL2Lib.utils import openLocalFile, readGlobalServerConfig
+from MCSL2Lib.utils import openLocalFile
 from MCSL2Lib.variables import GlobalMCSL2Variables, EditServerVariables
 from MCSL2Lib.utils import MCSL2Logger
 
@@ -90,9 +108,16 @@ class ServerManagerPage(QWidget):
         self.javaFindWorkThreadFactory = javaDetector.JavaFindWorkThreadFactory()
         self.javaFindWorkThreadFactory.fSearch = True
         self.javaFindWorkThreadFactory.signalConnect = self.autoDetectJavaFinished
+        self.javaFindWorkThreadFactory.javaFoundSignalConnect = self.onJavaFound
         self.javaFindWorkThreadFactory.finishSignalConnect = self.onJavaFindWorkThreadFinished
+        javaInventory.javaAdded.connect(self.onJavaFound)
+        javaInventory.javaRemoved.connect(self.onJavaRemoved)
+
+        self.diskUsageScanner = DiskUsageScanner()
+        self.diskUsageScanThread = None
+        # 服务器名 -> 打开过的服务器窗口，还原备份时用于关闭正在运行的服务器
+        self.serverWindows = {}
 
-        self.serverList = []
         sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         sizePolicy.setHorizontalStretch(0)
         sizePolicy.setVerticalStretch(0)
@@ -139,23 +164,19 @@ class ServerManagerPage(QWidget):
         self.verticalLayout_2 = QVBoxLayout(self.serversPage)
         self.verticalLayout_2.setObjectName("verticalLayout_2")
 
-        self.serversSmoothScrollArea = MySmoothScrollArea(self.serversPage)
-        self.serversSmoothScrollArea.setFrameShape(QFrame.NoFrame)
-        self.serversSmoothScrollArea.setFrameShadow(QFrame.Plain)
-        self.serversSmoothScrollArea.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.serversSmoothScrollArea.setWidgetResizable(True)
-        self.serversSmoothScrollArea.setObjectName("serversSmoothScrollArea")
-
-        self.serversScrollAreaWidgetContents = QWidget()
-        self.serversScrollAreaWidgetContents.setGeometry(QRect(0, 0, 640, 452))
-        self.serversScrollAreaWidgetContents.setObjectName("serversScrollAreaWidgetContents")
+        self.serverSearchLineEdit = SearchLineEdit(self.serversPage)
+        self.serverSearchLineEdit.setObjectName("serverSearchLineEdit")
+        self.verticalLayout_2.addWidget(self.serverSearchLineEdit)
 
-        self.flowLayout = FlowLayout(self.serversScrollAreaWidgetContents)
-        self.flowLayout.setContentsMargins(0, 0, 0, 0)
-        self.flowLayout.setObjectName("flowLayout")
+        self.serverListModel = ServerListModel(parent=self)
+        self.serverFilterModel = ServerFilterProxyModel(self)
+        self.serverFilterModel.setSourceModel(self.serverListModel)
+        self.serversView = ServerListView(self.serversPage)
+        self.serversView.setModel(self.serverFilterModel)
+        self.verticalLayout_2.addWidget(self.serversView)
 
-        self.serversSmoothScrollArea.setWidget(self.serversScrollAreaWidgetContents)
-        self.verticalLayout_2.addWidget(self.serversSmoothScrollArea)
+        self.noServerWidget = NoServerWidget()
+        self.verticalLayout_2.addWidget(self.noServerWidget)
         self.stackedWidget.addWidget(self.serversPage)
         self.editServerPage = QWidget()
         self.editServerPage.setObjectName("editServerPage")
@@ -575,7 +596,14 @@ class ServerManagerPage(QWidget):
         self.editServerNameLineEdit.setPlaceholderText(self.tr("不能包含非法字符"))
         self.editSaveServerPrimaryPushBtn.setText(self.tr("保存！"))
         self.editServerBackPushBtn.clicked.connect(self.goBack)
-        self.serversSmoothScrollArea.setAttribute(Qt.WA_StyledBackground)
+        self.serversView.buttonClicked.connect(self.onServerCardButtonClicked)
+        self.serverSearchLineEdit.textChanged.connect(self.serverFilterModel.setFilterText)
+        self.serverListModel.rowsInserted.connect(self.refreshServers)
+        self.serverListModel.rowsRemoved.connect(self.refreshServers)
+        self.serverListModel.modelReset.connect(self.refreshServers)
+        self.serverListModel.rowsInserted.connect(self.scanDiskUsage)
+        self.refreshServers()
+        self.serverSearchLineEdit.setPlaceholderText(self.tr("搜索服务器名称、核心或Java"))
         self.editServerScrollArea.setAttribute(Qt.WA_StyledBackground)
 
         self.editJavaTextEdit.setPlaceholderText(self.tr("写错了就启动不了了（悲"))
@@ -651,64 +679,49 @@ class ServerManagerPage(QWidget):
     def onPageChangedRefresh(self, currentChanged):
         if currentChanged == 2:
             self.refreshServers()
-
-    def releaseMemory(self):
-        self.flowLayout.takeAllWidgets()
+            self.scanDiskUsage()
 
     def refreshServers(self):
-        """刷新服务器列表主逻辑"""
-        # 读取全局设置
-        globalConfig = readGlobalServerConfig()
-        serverList = [config["name"] for config in globalConfig if "name" in config]
-        if serverList == self.serverList:
+        """
+        切换空列表提示。\n
+        列表内容由ServerListModel跟随serverRegistry增量更新，这里不需要重建。
+        """
+        hasServers = self.serverListModel.rowCount() > 0
+        self.serverSearchLineEdit.setVisible(hasServers)
+        self.serversView.setVisible(hasServers)
+        self.noServerWidget.setVisible(not hasServers)
+
+    def scanDiskUsage(self):
+        """在后台统计各服务器的磁盘占用，统计完一个就更新一张卡片"""
+        if self.diskUsageScanThread is not None and self.diskUsageScanThread.isRunning():
             return
-        if len(globalConfig):
-            self.releaseMemory()
-            # 添加新的
-            for i in range(len(globalConfig)):
-                self.flowLayout.addWidget(
-                    SingleServerManager(
-                        mem=f"{globalConfig[i]['min_memory']}{globalConfig[i]['memory_unit']}~{globalConfig[i]['max_memory']}{globalConfig[i]['memory_unit']}",
-                        coreFileName=f"{globalConfig[i]['core_file_name']}",
-                        javaPath=f"{globalConfig[i]['java_path']}",
-                        serverName=f"{globalConfig[i]['name']}",
-                        icon=QPixmap(f":/built-InIcons/{globalConfig[i]['icon']}"),
-                        btnSlot=self.scrollAreaProcessor,
-                        i=i,
-                        parent=self.serversSmoothScrollArea,
-                    )
-                )
-            self.serverList = serverList
-        else:
-            noServerWidget = NoServerWidget()
-            self.flowLayout.addWidget(noServerWidget)
-
-    # 判断第几个
-    def scrollAreaProcessor(self):
-        type = str(self.sender().objectName()).split("Btn")[0]
-        index = int(str(self.sender().objectName()).split("Btn")[1])
-        if type == "run":
+        self.diskUsageScanThread = DiskUsageScanThread(
+            self.diskUsageScanner, serverRegistry.names(), self
+        )
+        self.diskUsageScanThread.usageReady.connect(self.serverListModel.setDiskUsage)
+        self.diskUsageScanThread.start(QThread.LowPriority)
+
+    def onServerCardButtonClicked(self, button: str, index: int):
+        if button == "run":
             self.startServer(index=index)
-        elif type == "edit":
+        elif button == "edit":
             self.initEditServerInterface(index=index)
-        elif type == "backup":
+        elif button == "backup":
             self.backup(index=index)
-        elif type == "openDataFolder":
+        elif button == "openDataFolder":
             self.openDataFolder(index=index)
-        elif type == "delete":
+        elif button == "delete":
             self.deleteServer_Step1(index=index)
 
     def openDataFolder(self, index):
-        globalConfig: list = readGlobalServerConfig()
-        openLocalFile(f"./Servers/{globalConfig[index]['name']}")
+        openLocalFile(f"./Servers/{serverRegistry.get(index)['name']}")
 
     ##################
     #    删除服务器    #
     ##################
     def deleteServer_Step1(self, index):
         """删除服务器步骤1，询问是否删除"""
-        globalConfig: list = readGlobalServerConfig()
-        title = self.tr('是否要删除服务器"') + globalConfig[index]["name"] + self.tr('"?')
+        title = self.tr('是否要删除服务器"') + serverRegistry.get(index)["name"] + self.tr('"?')
         content = self.tr("此操作是不可逆的！你确定这么做吗？")
         w = MessageBox(title, content, self)
         w.yesButton.setText(self.tr("取消"))
@@ -723,11 +736,11 @@ class ServerManagerPage(QWidget):
 
     def deleteServer_Step2(self, index):
         """删除服务器步骤2：输入确认"""
-        globalConfig: list = readGlobalServerConfig()
-        title = self.tr('你真的要删除服务器"') + globalConfig[index]["name"] + self.tr('"?')
+        serverConfig = serverRegistry.get(index)
+        title = self.tr('你真的要删除服务器"') + serverConfig["name"] + self.tr('"?')
         content = (
             self.tr('此操作是不可逆的！它会失去很久，很久！\n如果真的要删除，请在下方输入框内输入"')
-            + globalConfig[index]["name"]
+            + serverConfig["name"]
             + self.tr('"，然后点击“删除”按钮：')
         )
         w2 = MessageBox(title, content, self)
@@ -742,10 +755,10 @@ class ServerManagerPage(QWidget):
         confirmLineEdit = LineEdit(w2)
         confirmLineEdit.textChanged.connect(
             lambda: self.compareDeleteServerName(
-                name=globalConfig[index]["name"], LineEditText=confirmLineEdit.text()
+                name=serverConfig["name"], LineEditText=confirmLineEdit.text()
             )
         )
-        confirmLineEdit.setPlaceholderText(self.tr('在此输入"') + globalConfig[index]["name"] + '"')
+        confirmLineEdit.setPlaceholderText(self.tr('在此输入"') + serverConfig["name"] + '"')
         self.deleteBtnEnabled.connect(w2.cancelButton.setEnabled)
         w2.cancelSignal.connect(lambda: self.deleteServer_Step3(index=index))
         w2.textLayout.addWidget(confirmLineEdit)
@@ -753,8 +766,7 @@ class ServerManagerPage(QWidget):
 
     def deleteServer_Step3(self, index):
         """删除服务器步骤3：弹窗提示正在删除"""
-        globalConfig: list = readGlobalServerConfig()
-        delServerName = globalConfig[index]["name"]
+        delServerName = serverRegistry.get(index)["name"]
 
         self.deletingServerStateToolTip = StateToolTip(
             self.tr("删除服务器"), self.tr("请稍后，正在删除..."), self
@@ -789,56 +801,60 @@ class ServerManagerPage(QWidget):
     ##################
     def initEditServerInterface(self, index):
         """初始化编辑服务器界面"""
-        self.autoDetectJava()
-        globalConfig: list = readGlobalServerConfig()
+        # Java列表由javaInventory保持更新，列表为空时才全盘查找
+        if javaList := javaInventory.javas():
+            editServerVariables.javaPath = javaList
+        else:
+            self.autoDetectJava()
+        serverConfig = serverRegistry.get(index)
         self.stackedWidget.setCurrentIndex(1)
         self.serverIndex = index
         # 自动填充旧配置。在下方初始化变量之前不应调用任何的editServerVariables的属性
         self.editServerSubtitleLabel.setText(
-            self.tr("编辑服务器") + f"-{globalConfig[index]['name']}"
+            self.tr("编辑服务器") + f"-{serverConfig['name']}"
         )
-        self.editJavaTextEdit.setText(globalConfig[index]["java_path"])
-        self.editMinMemLineEdit.setText(str(globalConfig[index]["min_memory"]))
-        self.editMaxMemLineEdit.setText(str(globalConfig[index]["max_memory"]))
+        self.editJavaTextEdit.setText(serverConfig["java_path"])
+        self.editMinMemLineEdit.setText(str(serverConfig["min_memory"]))
+        self.editMaxMemLineEdit.setText(str(serverConfig["max_memory"]))
         self.editOutputDeEncodingComboBox.setCurrentIndex(
-            editServerVariables.consoleDeEncodingList.index(globalConfig[index]["output_decoding"])
+            editServerVariables.consoleDeEncodingList.index(serverConfig["output_decoding"])
         )
         self.editInputDeEncodingComboBox.setCurrentIndex(
-            editServerVariables.consoleDeEncodingList.index(globalConfig[index]["input_encoding"])
+            editServerVariables.consoleDeEncodingList.index(serverConfig["input_encoding"])
         )
         self.editMemUnitComboBox.setCurrentIndex(
-            editServerVariables.memUnitList.index(globalConfig[index]["memory_unit"])
+            editServerVariables.memUnitList.index(serverConfig["memory_unit"])
         )
-        self.coreLineEdit.setText(globalConfig[index]["core_file_name"])
+        self.coreLineEdit.setText(serverConfig["core_file_name"])
         totalJVMArg = ""
-        for arg in globalConfig[index]["jvm_arg"]:
+        for arg in serverConfig["jvm_arg"]:
             totalJVMArg += f"{arg} "
         totalJVMArg = totalJVMArg.strip()
         self.JVMArgPlainTextEdit.setPlainText(totalJVMArg)
-        self.editServerNameLineEdit.setText(globalConfig[index]["name"])
+        self.editServerNameLineEdit.setText(serverConfig["name"])
 
         self.editServerPixmapLabel.setPixmap(
-            QPixmap(f":/built-InIcons/{globalConfig[index]['icon']}")
+            QPixmap(f":/built-InIcons/{serverConfig['icon']}")
         )
         self.editServerIcon.setCurrentIndex(
-            editServerVariables.iconsFileNameList.index(globalConfig[index]["icon"])
+            editServerVariables.iconsFileNameList.index(serverConfig["icon"])
         )
         self.editServerPixmapLabel.setFixedSize(QSize(60, 60))
 
         """初始化变量"""
-        editServerVariables.minMem = globalConfig[index]["min_memory"]
-        editServerVariables.maxMem = globalConfig[index]["max_memory"]
-        editServerVariables.coreFileName = globalConfig[index]["core_file_name"]
-        (editServerVariables.selectedJavaPath) = globalConfig[index]["java_path"]
-        editServerVariables.memUnit = globalConfig[index]["memory_unit"]
-        editServerVariables.jvmArg = globalConfig[index]["jvm_arg"]
-        editServerVariables.serverName = globalConfig[index]["name"]
-        (editServerVariables.consoleOutputDeEncoding) = globalConfig[index]["output_decoding"]
-        (editServerVariables.consoleInputDeEncoding) = globalConfig[index]["input_encoding"]
-        editServerVariables.icon = globalConfig[index]["icon"]
+        editServerVariables.minMem = serverConfig["min_memory"]
+        editServerVariables.maxMem = serverConfig["max_memory"]
+        editServerVariables.coreFileName = serverConfig["core_file_name"]
+        (editServerVariables.selectedJavaPath) = serverConfig["java_path"]
+        editServerVariables.memUnit = serverConfig["memory_unit"]
+        editServerVariables.jvmArg = serverConfig["jvm_arg"]
+        editServerVariables.serverName = serverConfig["name"]
+        (editServerVariables.consoleOutputDeEncoding) = serverConfig["output_decoding"]
+        (editServerVariables.consoleInputDeEncoding) = serverConfig["input_encoding"]
+        editServerVariables.icon = serverConfig["icon"]
         try:
-            editServerVariables.serverType = globalConfig[index]["server_type"]
-            editServerVariables.extraData = globalConfig[index]["extra_data"]
+            editServerVariables.serverType = serverConfig["server_type"]
+            editServerVariables.extraData = serverConfig["extra_data"]
         except Exception:
             pass
         self.syncVariables()
@@ -1029,32 +1045,31 @@ class ServerManagerPage(QWidget):
         if osp.exists("MCSL2/AutoDetectJavaHistory.json"):
             remove("MCSL2/AutoDetectJavaHistory.json")
 
-        with open("MCSL2/MCSL2_DetectedJava.json", "w+", encoding="utf-8") as SaveFoundedJava:
-            tmpNewJavaPath = editServerVariables.javaPath
-            editServerVariables.javaPath = list(
-                {p[:-1] for p in SaveFoundedJava.readlines()}.union(
-                    set(editServerVariables.javaPath)
-                ).union(set(_JavaPaths))
-            )
-            editServerVariables.javaPath.sort(key=lambda x: x.version, reverse=False)
-            for d in editServerVariables.javaPath:
-                if d not in tmpNewJavaPath:
-                    tmpNewJavaPath.append(d)
-                else:
-                    pass
-            editServerVariables.javaPath.clear()
-            editServerVariables.javaPath = tmpNewJavaPath
-
-            JavaPathList = [
-                {"Path": e.path, "Version": e.version} for e in editServerVariables.javaPath
-            ]
-            dump(
-                {"java": JavaPathList},
-                SaveFoundedJava,
-                sort_keys=True,
-                indent=4,
-                ensure_ascii=False,
-            )
+        tmpNewJavaPath = editServerVariables.javaPath
+        editServerVariables.javaPath = list(
+            set(javaDetector.loadJavaList())
+            .union(set(editServerVariables.javaPath))
+            .union(set(_JavaPaths))
+        )
+        editServerVariables.javaPath.sort(key=lambda x: x.version, reverse=False)
+        for d in editServerVariables.javaPath:
+            if d not in tmpNewJavaPath:
+                tmpNewJavaPath.append(d)
+        editServerVariables.javaPath = tmpNewJavaPath
+        # 通过saveJavaList保存，保留Java识别缓存
+        javaDetector.saveJavaList(editServerVariables.javaPath)
+        javaInventory.setJavas(editServerVariables.javaPath)
+
+    @pyqtSlot(object)
+    def onJavaFound(self, java):
+        """查找过程中每探测到一个Java就加入列表，不必等查找结束"""
+        if java not in editServerVariables.javaPath:
+            editServerVariables.javaPath.append(java)
+
+    @pyqtSlot(object)
+    def onJavaRemoved(self, java):
+        if java in editServerVariables.javaPath:
+            editServerVariables.javaPath.remove(java)
 
     @pyqtSlot(int)
     def onJavaFindWorkThreadFinished(self, sequenceNumber):
@@ -1267,19 +1282,10 @@ class ServerManagerPage(QWidget):
 
         # 写入全局配置
         try:
-            with open(
-                r"MCSL2/MCSL2_ServerList.json", "r", encoding="utf-8"
-            ) as globalServerListFile:
-                # old
-                globalServerList = loads(globalServerListFile.read())
-
-            with open(
-                r"MCSL2/MCSL2_ServerList.json", "w+", encoding="utf-8"
-            ) as newGlobalServerListFile:
-                # 添加新的
-                globalServerList["MCSLServerList"].pop(self.serverIndex)
-                globalServerList["MCSLServerList"].insert(0, serverConfig)
-                newGlobalServerListFile.write(dumps(globalServerList, indent=4))
+            serverRegistry.update(self.serverIndex, serverConfig)
+            serverRegistry.move(self.serverIndex, 0)
+            if not serverRegistry.flush():
+                raise OSError(self.tr("写入全局服务器配置失败"))
             exitCode = 0
         except Exception as e:
             exitCode = 1
@@ -1402,20 +1408,87 @@ class ServerManagerPage(QWidget):
         )
 
     def startServer(self, index):
+        if not self.confirmJavaCompatibility(index):
+            return
         v = ServerConfigConstructor.loadServerConfig(index=index)
         (
             w := ServerWindow(
                 v,
                 ServerLauncher(v),
-                manageBtn=self.sender(),
-                manageBackupBtn=self.sender().parent().parent().backupBtn,
+                manageBtn=self.serverListModel.buttonHandle(v.serverName, "run"),
+                manageBackupBtn=self.serverListModel.buttonHandle(v.serverName, "backup"),
             )
         ).show()
+        self.serverWindows[v.serverName] = w
         w.monitorWidget = RunningServerHeaderCardWidget(
             serverName=v.serverName, serverConsole=w
         ).itSelf
         self.runningServerCardGenerated.emit(w.monitorWidget)
 
+    def confirmJavaCompatibility(self, index) -> bool:
+        """启动前检查服务器的Java是否满足核心的要求，返回是否继续启动"""
+        config = serverRegistry.get(index)
+        requirement = serverJavaRequirement(
+            osp.join("Servers", config["name"], config["core_file_name"]),
+            config.get("server_type", ""),
+            config.get("extra_data", {}),
+        )
+        javas = javaInventory.javas()
+        # 识别不出的Java交给启动后的报错分析处理
+        if (
+            requirement is None
+            or (java := findJava(config["java_path"], javas)) is None
+            or requirement.accepts(javaMajorVersion(java.version))
+        ):
+            return True
+        suggested = pickCompatibleJava(requirement, javas)
+        w = MessageBox(
+            "Java版本不兼容",
+            f"服务器“{config['name']}”需要{requirement}，"
+            f"但当前设置的是Java {java.version}：\n{java.path}\n"
+            "直接启动很可能失败。"
+            + (
+                f"\n\n已检测到可用的Java {suggested.version}：\n{suggested.path}"
+                if suggested
+                else ""
+            ),
+            self,
+        )
+        w.yesButton.setText("仍然启动")
+        w.cancelButton.setText("取消")
+        if suggested is not None:
+            switchBtn = PrimaryPushButton(f"改用Java {suggested.version}并启动", parent=w)
+            switchBtn.clicked.connect(lambda: self.switchServerJava(index, suggested.path))
+            switchBtn.clicked.connect(w.accept)
+            w.buttonLayout.insertWidget(0, switchBtn, 1, Qt.AlignVCenter)
+        return bool(w.exec_())
+
+    def restoreServerBackup(self, index):
+        """服务器窗口开着时交给窗口还原：运行中的服务器会先被关闭，还原期间不能启动"""
+        serverName = ServerConfigConstructor.loadServerConfig(index=index).serverName
+        if (w := self.serverWindows.get(serverName)) is not None and w.isVisible():
+            w.activateWindow()
+            w.restoreBackup()
+        else:
+            self.serverWindows.pop(serverName, None)
+            restoreBackup(serverName, parent=self)
+
+    def switchServerJava(self, index, javaPath):
+        """修改服务器使用的Java并立即保存"""
+        config = serverRegistry.get(index)
+        config["java_path"] = javaPath
+        serverRegistry.update(index, config)
+        serverRegistry.flush()
+        if cfg.get(cfg.onlySaveGlobalServerConfig):
+            return
+        try:
+            with open(
+                f"Servers//{config['name']}//MCSL2ServerConfig.json", "w+", encoding="utf-8"
+            ) as serverConfigFile:
+                serverConfigFile.write(dumps(config, indent=4))
+        except OSError as e:
+            MCSL2Logger.error(exc=e, msg="保存单独服务器配置失败")
+
     def backup(self, index):
         w = MessageBox("备份服务器", "请选择你需要备份的文件：", self)
         w.yesButton.setText("服务器")
@@ -1428,6 +1501,18 @@ class ServerManagerPage(QWidget):
         w.cancelSignal.connect(
             lambda: backupSaves(ServerConfigConstructor.loadServerConfig(index=index), parent=self)
         )
+        incrementalBtn = PushButton("增量备份", parent=w)
+        incrementalBtn.clicked.connect(w.close)
+        incrementalBtn.clicked.connect(
+            lambda: incrementalBackup(
+                ServerConfigConstructor.loadServerConfig(index=index), parent=self
+            )
+        )
+        restoreBtn = PushButton("还原备份", parent=w)
+        restoreBtn.clicked.connect(w.close)
+        restoreBtn.clicked.connect(lambda: self.restoreServerBackup(index))
+        w.buttonLayout.insertWidget(0, incrementalBtn, 1, Qt.AlignVCenter)
+        w.buttonLayout.insertWidget(0, restoreBtn, 1, Qt.AlignVCenter)
         w.exec_()
 
 
@@ -1450,15 +1535,9 @@ class DeleteServerThread(QThread):
         exit1Msg = ""
         # 删配置
         try:
-            with open(
-                r"MCSL2/MCSL2_ServerList.json", "r", encoding="utf-8"
-            ) as RglobalServerListFile:
-                globalServerList = loads(RglobalServerListFile.read())
-            globalServerList["MCSLServerList"].pop(self.index)
-            with open(
-                r"MCSL2/MCSL2_ServerList.json", "w+", encoding="utf-8"
-            ) as WglobalServerConfigFile:
-                WglobalServerConfigFile.write(dumps(globalServerList, indent=4))
+            serverRegistry.remove(self.index)
+            if not serverRegistry.flush():
+                raise OSError("写入全局服务器配置失败")
         except Exception as e:
             self.exitCode.emit(1)
             exit1Msg += f"\n{e}"
@@ -180,6 +180,67 @@ class SettingsPage(QWidget):
         self.serverSettingsGroup.addSettingCard(self.restartServerWhenCrashed)
         self.settingsLayout.addWidget(self.serverSettingsGroup)
 
+        # Backup
+        self.backupSettingsGroup = SettingCardGroup(self.tr("备份设置"), self.settingsWidget)
+        self.backupKeepSnapshots = RangeSettingCard(
+            configItem=cfg.backupKeepSnapshots,
+            icon=FIF.HISTORY,
+            title=self.tr("每个服务器保留的增量备份快照数"),
+            content=self.tr("超出的旧快照会在备份后自动清理。"),
+            parent=self.backupSettingsGroup,
+        )
+        self.backupArchiveFormat = OptionsSettingCard(
+            configItem=cfg.backupArchiveFormat,
+            icon=FIF.ZIP_FOLDER,
+            title=self.tr("备份压缩包格式"),
+            content=self.tr("tar.zst需要安装zstandard，压缩更快。"),
+            texts=[self.tr("Zip"), self.tr("tar.zst")],
+            parent=self.backupSettingsGroup,
+        )
+        self.backupCompressLevel = RangeSettingCard(
+            configItem=cfg.backupCompressLevel,
+            icon=FIF.SPEED_HIGH,
+            title=self.tr("备份压缩等级"),
+            content=self.tr("越高压缩包越小，但越慢。"),
+            parent=self.backupSettingsGroup,
+        )
+        self.backupThreads = RangeSettingCard(
+            configItem=cfg.backupThreads,
+            icon=FIF.SPEED_HIGH,
+            title=self.tr("备份压缩线程数"),
+            content=self.tr("0为使用全部CPU核心。"),
+            parent=self.backupSettingsGroup,
+        )
+        self.backupLowPriority = SwitchSettingCard(
+            configItem=cfg.backupLowPriority,
+            icon=FIF.SPEED_OFF,
+            title=self.tr("以低优先级备份"),
+            content=self.tr("降低备份线程的CPU与磁盘I/O优先级，减少对服务器的影响。"),
+            parent=self.backupSettingsGroup,
+        )
+        self.backupMaxReadSpeed = RangeSettingCard(
+            configItem=cfg.backupMaxReadSpeed,
+            icon=FIF.SPEED_MEDIUM,
+            title=self.tr("备份读取速度上限(MB/s)"),
+            content=self.tr("0为不限速。"),
+            parent=self.backupSettingsGroup,
+        )
+        self.backupPauseWhenLagging = SwitchSettingCard(
+            configItem=cfg.backupPauseWhenLagging,
+            icon=FIF.PAUSE,
+            title=self.tr("服务器卡顿时暂停备份"),
+            content=self.tr("服务器输出“Can't keep up!”时暂停备份几秒。"),
+            parent=self.backupSettingsGroup,
+        )
+        self.backupSettingsGroup.addSettingCard(self.backupKeepSnapshots)
+        self.backupSettingsGroup.addSettingCard(self.backupArchiveFormat)
+        self.backupSettingsGroup.addSettingCard(self.backupCompressLevel)
+        self.backupSettingsGroup.addSettingCard(self.backupThreads)
+        self.backupSettingsGroup.addSettingCard(self.backupLowPriority)
+        self.backupSettingsGroup.addSettingCard(self.backupMaxReadSpeed)
+        self.backupSettingsGroup.addSettingCard(self.backupPauseWhenLagging)
+        self.settingsLayout.addWidget(self.backupSettingsGroup)
+
         # Configure server
         self.configureServerSettingsGroup = SettingCardGroup(
             self.tr("新建服务器设置"), self.settingsWidget
@@ -231,6 +292,20 @@ class SettingsPage(QWidget):
             ],
             parent=self.downloadSettingsGroup,
         )
+        self.autoSelectDownloadSource = SwitchSettingCard(
+            icon=FIF.SPEED_MEDIUM,
+            title=self.tr("自动选择最快的下载源"),
+            content=self.tr("在后台为各下载源测速，打开下载页时使用最快的，出错时自动换源。"),
+            configItem=cfg.autoSelectDownloadSource,
+            parent=self.downloadSettingsGroup,
+        )
+        self.idleCatalogPrefetch = SwitchSettingCard(
+            icon=FIF.CLOUD_DOWNLOAD,
+            title=self.tr("空闲时预加载下载列表"),
+            content=self.tr("启动后在后台加载下载源和常用核心的列表，开始下载或启动服务器时停止。"),
+            configItem=cfg.idleCatalogPrefetch,
+            parent=self.downloadSettingsGroup,
+        )
         self.alwaysAskSaveDirectory = SwitchSettingCard(
             icon=FIF.CHAT,
             title=self.tr("总是询问保存路径"),
@@ -253,12 +328,22 @@ class SettingsPage(QWidget):
             texts=[self.tr("询问"), self.tr("覆盖"), self.tr("停止")],
             parent=self.downloadSettingsGroup,
         )
+        self.catalogCacheTTL = RangeSettingCard(
+            configItem=cfg.catalogCacheTTL,
+            icon=FIF.HISTORY,
+            title=self.tr("下载列表缓存有效期(分钟)"),
+            content=self.tr("有效期内直接使用缓存，过期后先显示缓存并在后台更新。"),
+            parent=self.downloadSettingsGroup,
+        )
         self.alwaysAskSaveDirectory.setEnabled(False)
         self.aria2Thread.valueChanged.connect(self.restartAria2)
         self.downloadSettingsGroup.addSettingCard(self.downloadSource)
+        self.downloadSettingsGroup.addSettingCard(self.autoSelectDownloadSource)
+        self.downloadSettingsGroup.addSettingCard(self.idleCatalogPrefetch)
         self.downloadSettingsGroup.addSettingCard(self.alwaysAskSaveDirectory)
         self.downloadSettingsGroup.addSettingCard(self.aria2Thread)
         self.downloadSettingsGroup.addSettingCard(self.saveSameFileException)
+        self.downloadSettingsGroup.addSettingCard(self.catalogCacheTTL)
         self.settingsLayout.addWidget(self.downloadSettingsGroup)
 
         # Console
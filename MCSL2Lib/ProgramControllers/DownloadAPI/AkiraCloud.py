@@ -14,154 +14,150 @@
 A function for communicatng with AkiraCloud Mirror.
 """
 
-from typing import Callable
-
-from PyQt5.QtCore import pyqtSignal, QThread
-from MCSL2Lib.ProgramControllers.networkController import MCSLNetworkSession
-
 import re
+from html import unescape
 from html.parser import HTMLParser
+from json import JSONDecodeError, loads
+from threading import Lock
+from typing import Dict, List, Tuple
+
+from MCSL2Lib.ProgramControllers.httpCache import httpCache
+
+AKIRA_CLOUD_URL = "https://mirror.akiracloud.net"
+
+# 目录页表格中的修改时间、大小等列，不是条目
+_META_CELL_PATTERN = re.compile(
+    r"\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}|^[\d.]+\s?(?:[KMGT]i?B?|B)$|^-$", re.IGNORECASE
+)
+# 目录页中的表格、单元格与标签，逐个扫描单元格，不为每个标签回调一次
+_TABLE_PATTERN = re.compile(r"<table\b.*?</table>", re.IGNORECASE | re.DOTALL)
+_CELL_PATTERN = re.compile(r"<td\b[^>]*>(.*?)</td>", re.IGNORECASE | re.DOTALL)
+_TAG_PATTERN = re.compile(r"<[^>]*>")
+# 目录页中不是核心类型/文件的条目
+_IGNORED_ENTRIES = frozenset({"Parent Directory", "常用工具", "mirror.akiracloud.net"})
+
+
+def _isEntry(item: str) -> bool:
+    return bool(item) and item not in _IGNORED_ENTRIES and not _META_CELL_PATTERN.search(item)
 
 
 class AkiraHTMLParser(HTMLParser):
+    """
+    逐标签解析镜像站的目录页：每个表格单元格结束时立即判断是否为条目。\n
+    只在正则扫描不出单元格(页面结构异常)时使用
+    """
+
     def __init__(self):
         super().__init__()
         self.inTable = False
         self.inTd = False
-        self.currentData = []
-        self.allList = []
+        self.lastData = ""
+        self.allList: List[str] = []
 
     def handle_starttag(self, tag, attrs):
         if tag == "table":
             self.inTable = True
         elif self.inTable and tag == "td":
             self.inTd = True
+            self.lastData = ""
 
     def handle_data(self, data):
-        if self.inTd:
-            self.currentData.append(data.strip())
+        # 单元格中最后一段非空文字就是它的内容
+        if self.inTd and (data := data.strip()):
+            self.lastData = data
 
     def handle_endtag(self, tag):
         if tag == "table":
             self.inTable = False
-        elif tag == "td":
+        elif tag == "td" and self.inTd:
             self.inTd = False
-            if self.currentData:
-                self.allList.append(self.currentData[-1])
-                self.currentData = []
+            if _isEntry(self.lastData):
+                self.allList.append(self.lastData)
 
     def feed(self, data: str) -> list:
         super().feed(data)
-        if "Parent Directory" in self.allList:
-            self.allList.remove("Parent Directory")
-        if "常用工具" in self.allList:
-            self.allList.remove("常用工具")
-        if "mirror.akiracloud.net" in self.allList:
-            self.allList.remove("mirror.akiracloud.net")
         return self.allList
 
 
 class AkiraCloudDownloadURLParser:
+    """
+    Akira Cloud镜像站的目录解析。\n
+    同时支持HTML目录页与nginx的JSON格式目录(autoindex_format json)；
+    解析结果按目录缓存，下载列表缓存中的内容没变时不再重复解析
+    """
+
+    # 路径 -> (解析时的目录内容, 条目)
+    _listingCache: Dict[str, Tuple[str, List[str]]] = {}
+    _listingLock = Lock()
+
     def __init__(self) -> None:
         pass
 
     @classmethod
     def getDownloadTypeList(cls) -> list:
         try:
-            return cls._parseHTML(cls._getAPI("/"))
+            return cls.getListing("/")
         except Exception:
             return []
 
     @classmethod
     def getDownloadCoreList(cls, coreType: str) -> list:
         try:
-            return {"name": coreType, "list": cls._parseHTML(cls._getAPI(f"/{coreType}"))}
+            return {"name": coreType, "list": cls.getListing(f"/{coreType}")}
         except Exception:
             return {"name": "-1"}
 
     @classmethod
     def _getAPI(cls, APIPath: str) -> str:
-        k = (s := MCSLNetworkSession()).get(
-                url=f"https://mirror.akiracloud.net{APIPath}",
-                headers=s.MCSLNetworkHeaders,
-            ).text
-        del s
-        return k
+        return httpCache.get(f"{AKIRA_CLOUD_URL}{APIPath}").text
 
     @classmethod
-    def _parseHTML(cls, htmlContent: str):
-        parsedList = AkiraHTMLParser().feed(htmlContent)
-        return list([
-            item
-            for item in parsedList
-            if not re.search(re.compile(r"\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}|\d+\sKB"), item)
-        ])
-
-
-class FetchAkiraTypeThread(QThread):
-    fetchSignal = pyqtSignal(list)
-
-    def __init__(self, finishSlot: Callable = ...):
-        super().__init__()
-        self._id = None
-        self.data = None
-        if finishSlot is not ...:
-            self.fetchSignal.connect(finishSlot)
-
-    def run(self):
-        self.fetchSignal.emit(AkiraCloudDownloadURLParser.getDownloadTypeList())
+    def getListing(cls, APIPath: str) -> List[str]:
+        """目录下的条目，返回副本，调用方可以随意修改"""
+        content = cls._getAPI(APIPath)
+        with cls._listingLock:
+            cached = cls._listingCache.get(APIPath)
+        # 缓存的内容没变时通常是同一个字符串对象，比较几乎不花时间
+        if cached is not None and cached[0] == content:
+            return list(cached[1])
+        entries = cls.parseListing(content)
+        with cls._listingLock:
+            cls._listingCache[APIPath] = (content, entries)
+        return list(entries)
 
-    def getData(self):
-        return self.data
-
-
-class FetchAkiraCoreThread(QThread):
-    fetchSignal = pyqtSignal(dict)
-
-    def __init__(self, coreType, finishSlot: Callable = ...):
-        super().__init__()
-        self._id = None
-        self.data = None
-        self.coreType = coreType
-        if finishSlot is not ...:
-            self.fetchSignal.connect(finishSlot)
-
-    def run(self):
-        self.fetchSignal.emit(
-            AkiraCloudDownloadURLParser.getDownloadCoreList(coreType=self.coreType)
-        )
-
-    def getData(self):
-        return self.data
-
-
-class FetchAkiraTypeThreadFactory:
-    def __init__(self):
-        self.singletonThread = None
-
-    def create(self, _singleton=False, finishSlot=...) -> FetchAkiraTypeThread:
-        if _singleton:
-            if self.singletonThread is not None and self.singletonThread.isRunning():
-                return self.singletonThread
-            else:
-                thread = FetchAkiraTypeThread(finishSlot)
-                self.singletonThread = thread
-                return thread
-        else:
-            return FetchAkiraTypeThread(finishSlot)
+    @classmethod
+    def parseListing(cls, content: str) -> List[str]:
+        if content.lstrip().startswith("["):
+            try:
+                return cls._parseJSON(content)
+            except (JSONDecodeError, TypeError, KeyError):
+                pass
+        return cls._parseHTML(content)
 
+    @classmethod
+    def _parseJSON(cls, content: str) -> List[str]:
+        return [
+            item["name"] for item in loads(content) if item["name"] not in _IGNORED_ENTRIES
+        ]
 
-class FetchAkiraCoreThreadFactory:
-    def __init__(self):
-        self.singletonThread = None
-
-    def create(self, coreType, _singleton=False, finishSlot=...) -> FetchAkiraCoreThread:
-        if _singleton:
-            if self.singletonThread is not None and self.singletonThread.isRunning():
-                return self.singletonThread
-            else:
-                thread = FetchAkiraCoreThread(coreType=coreType, finishSlot=finishSlot)
-                self.singletonThread = thread
-                return thread
-        else:
-            return FetchAkiraCoreThread(finishSlot)
+    @classmethod
+    def _parseHTML(cls, htmlContent: str) -> List[str]:
+        entries = []
+        found = False
+        for table in _TABLE_PATTERN.finditer(htmlContent):
+            for cell in _CELL_PATTERN.finditer(table.group()):
+                found = True
+                # 单元格中最后一段非空文字就是它的内容
+                item = ""
+                for text in reversed(_TAG_PATTERN.split(cell.group(1))):
+                    if text := unescape(text).strip():
+                        item = text
+                        break
+                if _isEntry(item):
+                    entries.append(item)
+        if found:
+            return entries
+        parser = AkiraHTMLParser()
+        entries = parser.feed(htmlContent)
+        parser.close()
+        return entries
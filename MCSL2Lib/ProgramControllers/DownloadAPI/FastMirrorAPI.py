@@ -15,10 +15,12 @@ A function for communicatng with FastMirrorAPI.
 """
 
 from collections import defaultdict
-from typing import Callable
 
-from PyQt5.QtCore import pyqtSignal, QThread
-from MCSL2Lib.ProgramControllers.networkController import MCSLNetworkSession
+from MCSL2Lib.ProgramControllers.httpCache import httpCache
+
+FASTMIRROR_API_URL = "https://download.fastmirror.net/api/v3"
+# 构建列表每页条目数
+FASTMIRROR_BUILD_PAGE_SIZE = 25
 
 
 class FastMirrorAPIDownloadURLParser:
@@ -30,9 +32,7 @@ class FastMirrorAPIDownloadURLParser:
     @staticmethod
     def parseFastMirrorAPIUrl():
         rv = defaultdict(list)
-        r = FastMirrorAPIDownloadURLParser.decodeFastMirrorJsons(
-            "https://download.fastmirror.net/api/v3"
-        )
+        r = FastMirrorAPIDownloadURLParser.decodeFastMirrorJsons(FASTMIRROR_API_URL)
         if type(r) is list:
             for e in r:
                 rv["name"].append(e["name"])
@@ -48,12 +48,7 @@ class FastMirrorAPIDownloadURLParser:
     def decodeFastMirrorJsons(downloadAPIUrl):
         data = []
         try:
-            apiData = (
-                (s := MCSLNetworkSession())
-                .get(url=downloadAPIUrl, headers=s.MCSLNetworkHeaders)
-                .json()
-            )
-            del s
+            apiData = httpCache.get(downloadAPIUrl).json()
         except Exception:
             return -2
         try:
@@ -65,124 +60,43 @@ class FastMirrorAPIDownloadURLParser:
             return -1
 
     @staticmethod
-    def parseFastMirrorAPICoreVersionUrl(name, mcVersion):
+    def parseFastMirrorAPICoreVersionUrl(
+        name, mcVersion, offset: int = 0, limit: int = FASTMIRROR_BUILD_PAGE_SIZE
+    ):
+        """
+        获取从第offset个开始的limit个构建\n
+        结果中的core、mcVersion、offset标明是哪一页，count为该版本的构建总数
+        """
         rv = defaultdict(list)
+        rv.update(core=name, mcVersion=mcVersion, offset=offset)
         r = FastMirrorAPIDownloadURLParser.decodeFastMirrorCoreVersionJsons(
-            f"https://download.fastmirror.net/api/v3/{name}/{mcVersion}?offset=0&limit=25"
+            f"{FASTMIRROR_API_URL}/{name}/{mcVersion}?offset={offset}&limit={limit}"
         )
-        if type(r) is list:
-            for e in r:
+        if type(r) is dict:
+            for e in r["builds"]:
                 rv["name"].append(e["name"])
                 rv["mc_version"].append(e["mc_version"])
                 rv["core_version"].append(e["core_version"])
                 rv["update_time"].append(e["update_time"])
                 rv["sha1"].append(e["sha1"])
+            rv["count"] = r["count"]
+            if rv["count"] is None:
+                # 没有总数时只能根据本页是否已满判断还有没有下一页
+                rv["count"] = offset + len(r["builds"]) + (len(r["builds"]) >= limit)
             return rv
         else:
-            return {"name": -1}
+            rv["name"] = -1
+            return rv
 
     @staticmethod
     def decodeFastMirrorCoreVersionJsons(downloadAPIUrl):
-        builds = []
         try:
-            apiData = (
-                (s := MCSLNetworkSession())
-                .get(url=downloadAPIUrl, headers=s.MCSLNetworkHeaders)
-                .json()
-            )
-            del s
+            apiData = httpCache.get(downloadAPIUrl).json()
         except Exception:
             return -2
         try:
             if apiData["success"]:
-                for i in apiData["data"]["builds"]:
-                    builds.append(i)
-                return builds
+                data = apiData["data"]
+                return {"builds": list(data["builds"]), "count": data.get("count")}
         except Exception:
             return -1
-
-
-class FetchFastMirrorAPIThread(QThread):
-    """
-    用于获取/api/v3
-    即核心类型+游戏版本列表
-    """
-
-    fetchSignal = pyqtSignal(dict)
-
-    def __init__(self, finishSlot: Callable = ...):
-        super().__init__()
-        self._id = None
-        self.data = None
-        if finishSlot is not ...:
-            self.fetchSignal.connect(finishSlot)
-
-    def run(self):
-        self.fetchSignal.emit(FastMirrorAPIDownloadURLParser.parseFastMirrorAPIUrl())
-
-    def getData(self):
-        return self.data
-
-
-class FetchFastMirrorAPICoreVersionThread(QThread):
-    """
-    用于获取/api/v3/{name}/{mc_version}
-    即服务端版本列表
-    """
-
-    fetchSignal = pyqtSignal(dict)
-
-    def __init__(self, name, mcVersion, finishSlot: Callable = ...):
-        super().__init__()
-        self._id = None
-        self.data = None
-        self.name = name
-        self.mcVersion = mcVersion
-        if finishSlot is not ...:
-            self.fetchSignal.connect(finishSlot)
-
-    def run(self):
-        self.fetchSignal.emit(
-            FastMirrorAPIDownloadURLParser.parseFastMirrorAPICoreVersionUrl(
-                name=self.name, mcVersion=self.mcVersion
-            )
-        )
-
-    def getData(self):
-        return self.data
-
-
-class FetchFastMirrorAPIThreadFactory:
-    def __init__(self):
-        self.singletonThread = None
-
-    def create(self, _singleton=False, finishSlot=...) -> FetchFastMirrorAPIThread:
-        if _singleton:
-            if self.singletonThread is not None and self.singletonThread.isRunning():
-                return self.singletonThread
-            else:
-                thread = FetchFastMirrorAPIThread(finishSlot)
-                self.singletonThread = thread
-                return thread
-        else:
-            return FetchFastMirrorAPIThread(finishSlot)
-
-
-class FetchFastMirrorAPICoreVersionThreadFactory:
-    def __init__(self):
-        self.singletonThread = None
-
-    def create(
-        self, name, mcVersion, _singleton=False, finishSlot=...
-    ) -> FetchFastMirrorAPICoreVersionThread:
-        if _singleton:
-            if self.singletonThread is not None and self.singletonThread.isRunning():
-                return self.singletonThread
-            else:
-                thread = FetchFastMirrorAPICoreVersionThread(
-                    name=name, mcVersion=mcVersion, finishSlot=finishSlot
-                )
-                self.singletonThread = thread
-                return thread
-        else:
-            return FetchFastMirrorAPICoreVersionThread(finishSlot)
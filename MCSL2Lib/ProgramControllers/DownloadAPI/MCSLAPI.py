@@ -14,11 +14,11 @@
 A function for communicatng with MCSLAPI.
 """
 
-from typing import Callable
+from MCSL2Lib.ProgramControllers.httpCache import httpCache
 
-from PyQt5.QtCore import pyqtSignal, QThread
-
-from MCSL2Lib.ProgramControllers.networkController import MCSLNetworkSession
+MCSLAPI_LIST_URL = "https://file.mcsl.com.cn/api/fs/list"
+# 每页条目数，滚动到底部时再加载下一页
+MCSLAPI_PAGE_SIZE = 50
 
 
 class MCSLAPIDownloadURLParser:
@@ -28,83 +28,42 @@ class MCSLAPIDownloadURLParser:
         pass
 
     @staticmethod
-    def parseDownloaderAPIUrl(path):
+    def parseDownloaderAPIUrl(path, page: int = 1, perPage: int = MCSLAPI_PAGE_SIZE):
         rv = {}
-        r = MCSLAPIDownloadURLParser.decodeDownloadJsons(
-            "https://file.mcsl.com.cn/api/fs/list", path
-        )
+        r = MCSLAPIDownloadURLParser.decodeDownloadJsons(MCSLAPI_LIST_URL, path, page, perPage)
         rv["name"] = r[0]
         rv["size"] = r[1]
         rv["is_dir"] = r[2]
         rv["total"] = r[3]
+        rv["path"] = path
+        rv["page"] = page
         return rv
 
     @staticmethod
-    def decodeDownloadJsons(APIUrl, path: str):
-        name = []
-        size = []
-        isDir = []
+    def decodeDownloadJsons(APIUrl, path: str, page: int = 1, perPage: int = MCSLAPI_PAGE_SIZE):
+        """
+        获取目录的第page页，perPage为0时一次获取整个目录\n
+        返回(文件名列表, 大小列表, 是否为文件夹列表, 目录下的总条目数)
+        """
         try:
-            downloadJson = (s := MCSLNetworkSession()).post(
-                url=APIUrl,
+            downloadJson = httpCache.post(
+                APIUrl,
                 json={
                     "path": f"/MCSL2/MCSLAPI{path}",
                     "password": "",
-                    "page": 1,
-                    "per_page": 0,
+                    "page": page,
+                    "per_page": perPage,
                     "refresh": False,
                 },
-                headers=s.MCSLNetworkHeaders,
             )
-            del s
         except Exception:
             return -2, -2, -2, -2
         try:
-            for i in range(downloadJson.json()["data"]["total"]):
-                name.append(downloadJson.json()["data"]["content"][i]["name"])
-                size.append(downloadJson.json()["data"]["content"][i]["size"])
-                isDir.append(downloadJson.json()["data"]["content"][i]["is_dir"])
-            return name, size, isDir, downloadJson.json()["data"]["total"]
+            data = downloadJson.json()["data"]
+            content = data["content"] or []
+            name = [i["name"] for i in content]
+            size = [i["size"] for i in content]
+            isDir = [i["is_dir"] for i in content]
+            return name, size, isDir, data["total"]
         except Exception:
             return -1, -1, -1, -1
-
-
-class FetchMCSLAPIDownloadURLThread(QThread):
-    """
-    用于获取网页内容的线程
-    结束时发射fetchSignal信号，参数为url和data组成的元组
-    """
-
-    fetchSignal = pyqtSignal(dict)
-
-    def __init__(self, finishSlot: Callable = None, path: str = ""):
-        super().__init__()
-        self._id = None
-        self.data = None
-        self.path = path
-        if finishSlot is not None:
-            self.fetchSignal.connect(finishSlot)
-
-    def run(self):
-        self.fetchSignal.emit(MCSLAPIDownloadURLParser.parseDownloaderAPIUrl(self.path))
-
-    def getData(self):
-        return self.data
-
-
-class FetchMCSLAPIDownloadURLThreadFactory:
-    def __init__(self):
-        self.singletonThread = None
-
-    def create(
-        self, _singleton=False, finishSlot=None, path: str = ""
-    ) -> FetchMCSLAPIDownloadURLThread:
-        if _singleton:
-            if self.singletonThread is not None and self.singletonThread.isRunning():
-                return self.singletonThread
-            else:
-                thread = FetchMCSLAPIDownloadURLThread(finishSlot, path)
-                self.singletonThread = thread
-                return thread
-        else:
-            return FetchMCSLAPIDownloadURLThread(finishSlot, path)
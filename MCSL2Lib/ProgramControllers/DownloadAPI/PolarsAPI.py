@@ -15,12 +15,10 @@ A function for communicatng with PolarsAPI.
 """
 
 from collections import defaultdict
-from typing import Callable
 
-from PyQt5.QtCore import pyqtSignal, QThread
-from MCSL2Lib.ProgramControllers.networkController import (
-    MCSLNetworkSession,
-)
+from MCSL2Lib.ProgramControllers.httpCache import httpCache
+
+POLARS_API_URL = "https://mirror.polars.cc/api/query/minecraft/core"
 
 
 class PolarsAPIDownloadURLParser:
@@ -32,9 +30,7 @@ class PolarsAPIDownloadURLParser:
     @staticmethod
     def parsePolarsAPIUrl():
         rv = defaultdict(list)
-        r = PolarsAPIDownloadURLParser.decodePolarTypeJsons(
-            "https://mirror.polars.cc/api/query/minecraft/core"
-        )
+        r = PolarsAPIDownloadURLParser.decodePolarTypeJsons(POLARS_API_URL)
         if type(r) is list:
             for e in r:
                 rv["id"].append(e["id"])
@@ -48,12 +44,7 @@ class PolarsAPIDownloadURLParser:
     def decodePolarTypeJsons(downloadAPIUrl):
         data = []
         try:
-            apiData = (
-                (s := MCSLNetworkSession())
-                .get(url=downloadAPIUrl, headers=s.MCSLNetworkHeaders)
-                .json()
-            )
-            del s
+            apiData = httpCache.get(downloadAPIUrl).json()
         except Exception:
             return -2
         try:
@@ -67,7 +58,7 @@ class PolarsAPIDownloadURLParser:
     def parsePolarsAPICoreUrl(coreType):
         rv = defaultdict(list)
         r = PolarsAPIDownloadURLParser.decodePolarsAPICoreJsons(
-            f"https://mirror.polars.cc/api/query/minecraft/core/{coreType}"
+            f"{POLARS_API_URL}/{coreType}"
         )
         if type(r) is list:
             for e in r:
@@ -81,12 +72,7 @@ class PolarsAPIDownloadURLParser:
     def decodePolarsAPICoreJsons(downloadAPIUrl):
         cores = []
         try:
-            apiData = (
-                (s := MCSLNetworkSession())
-                .get(url=downloadAPIUrl, headers=s.MCSLNetworkHeaders)
-                .json()
-            )
-            del s
+            apiData = httpCache.get(downloadAPIUrl).json()
         except Exception:
             return -2
         try:
@@ -95,70 +81,3 @@ class PolarsAPIDownloadURLParser:
             return cores
         except Exception:
             return -1
-
-
-class FetchPolarsAPITypeThread(QThread):
-    fetchSignal = pyqtSignal(dict)
-
-    def __init__(self, finishSlot: Callable = ...):
-        super().__init__()
-        self._id = None
-        self.data = None
-        if finishSlot is not ...:
-            self.fetchSignal.connect(finishSlot)
-
-    def run(self):
-        self.fetchSignal.emit(PolarsAPIDownloadURLParser.parsePolarsAPIUrl())
-
-    def getData(self):
-        return self.data
-
-
-class FetchPolarsAPICoreThread(QThread):
-    fetchSignal = pyqtSignal(dict)
-
-    def __init__(self, idx, FinishSlot: Callable = ...):
-        super().__init__()
-        self._id = None
-        self.data = None
-        self.idx = idx
-        if FinishSlot is not ...:
-            self.fetchSignal.connect(FinishSlot)
-
-    def run(self):
-        self.fetchSignal.emit(PolarsAPIDownloadURLParser.parsePolarsAPICoreUrl(coreType=self.idx))
-
-    def getData(self):
-        return self.data
-
-
-class FetchPolarsAPITypeThreadFactory:
-    def __init__(self):
-        self.singletonThread = None
-
-    def create(self, _singleton=False, finishSlot=...) -> FetchPolarsAPITypeThread:
-        if _singleton:
-            if self.singletonThread is not None and self.singletonThread.isRunning():
-                return self.singletonThread
-            else:
-                thread = FetchPolarsAPITypeThread(finishSlot)
-                self.singletonThread = thread
-                return thread
-        else:
-            return FetchPolarsAPITypeThread(finishSlot)
-
-
-class FetchPolarsAPICoreThreadFactory:
-    def __init__(self):
-        self.singletonThread = None
-
-    def create(self, idx, _singleton=False, finishSlot=...) -> FetchPolarsAPICoreThread:
-        if _singleton:
-            if self.singletonThread is not None and self.singletonThread.isRunning():
-                return self.singletonThread
-            else:
-                thread = FetchPolarsAPICoreThread(idx=idx, FinishSlot=finishSlot)
-                self.singletonThread = thread
-                return thread
-        else:
-            return FetchPolarsAPICoreThread(finishSlot)
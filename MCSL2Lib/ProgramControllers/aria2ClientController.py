@@ -23,16 +23,35 @@ from os import path as osp
 from platform import system
 from shutil import which
 from subprocess import PIPE, STDOUT, CalledProcessError, check_output, Popen
+from threading import Event, Lock
 from typing import Optional, Callable, Dict
 
-from PyQt5.QtCore import QThread, pyqtSignal, QObject, QProcess, QTimer, QMutex
+from PyQt5.QtCore import QThread, pyqtSignal, QObject, QProcess, QMutex
 from aria2p import Client, API, Download
 
 from MCSL2Lib.ProgramControllers.settingsController import cfg
+from MCSL2Lib.ProgramControllers.catalogPrefetcher import catalogPrefetcher
 from MCSL2Lib.ProgramControllers.networkController import MCSLNetworkSession
 from MCSL2Lib.utils import workingThreads
 from MCSL2Lib.utils import MCSL2Logger
 
+# 轮询下载状态时向Aria2要的字段，不取bitfield等用不到的大字段
+_STATUS_KEYS = [
+    "gid",
+    "status",
+    "totalLength",
+    "completedLength",
+    "downloadSpeed",
+    "connections",
+    "files",
+    "errorCode",
+    "errorMessage",
+]
+# 每轮最多取回的等待中/已停止任务数，与Aria2默认的max-download-result一致
+_TELL_LIMIT = 1000
+# 连续这么多轮取不到状态(Aria2已退出)时，把所有任务视为已取消
+_POLL_FAILURE_LIMIT = 25
+
 
 class Aria2Controller:
     """
@@ -53,6 +72,8 @@ class Aria2Controller:
 
     _downloadWatcher = {}
 
+    _statusPoller = None
+
     systemType = ""
 
     aria2cStatus = False
@@ -186,11 +207,13 @@ class Aria2Controller:
         extraData: Optional[tuple] = None,
         watch=True,
         interval=0.1,
+        options: Optional[dict] = None,
     ) -> str:
         """
         Download a file from uri
 
-        param uri: the uri of the file to be downloaded
+        param uri: the uri of the file to be downloaded, or a list of mirror uris of
+            the same file, which lets Aria2 fetch segments from several sources
         param watch: whether to watch the download progress
         param info_get: the slot function to get the download progress
         param stopped: the slot function to be called when the download is stopped
@@ -199,8 +222,11 @@ class Aria2Controller:
                 1: download error
                 2: download removed
         param interval: the interval of watching the download progress
+        param options: extra Aria2 options of the task, e.g. {"checksum": "sha-1=..."}
         """
-        gid = cls.addUri(uri)
+        # 下载开始后不再在后台预取列表，把带宽留给下载
+        catalogPrefetcher.cancel()
+        gid = cls.addUris(uri, options) if isinstance(uri, list) else cls.addUri(uri, options)
         if watch:
             cls._downloadWatcher[gid] = DownloadWatcher(
                 gid,
@@ -211,6 +237,15 @@ class Aria2Controller:
             )
         return gid
 
+    @classmethod
+    def statusPoller(cls) -> "Aria2StatusPoller":
+        """
+        the poller shared by all DownloadWatchers, created on first use (in the GUI thread)
+        """
+        if cls._statusPoller is None:
+            cls._statusPoller = Aria2StatusPoller()
+        return cls._statusPoller
+
     @classmethod
     def getWatcher(cls, gid) -> "DownloadWatcher":
         """
@@ -229,12 +264,13 @@ class Aria2Controller:
             del cls._downloadWatcher[gid]
 
     @classmethod
-    def addUri(cls, uri: str) -> str:
+    def addUri(cls, uri: str, options: Optional[dict] = None) -> str:
         """
         Add a download task to Aria2,and return the gid of the task
         * normally, this function is only used by Class:DownloadWatcher
 
         param uri: the uri of the file to be downloaded
+        param options: extra Aria2 options of the task
         """
         if not cls.testAria2Service():
             if not cls.aria2Process.isOpen():
@@ -242,7 +278,7 @@ class Aria2Controller:
             else:
                 raise Exception("Aria2 service is not running")
 
-        gid = cls._aria2.add_uris([uri]).gid
+        gid = cls._aria2.add_uris([uri], options=options).gid
         if gid in cls._downloadTasks.keys():
             download = cls._aria2.get_download(gid)
 
@@ -253,17 +289,18 @@ class Aria2Controller:
         return gid
 
     @classmethod
-    def addUris(cls, uris: list):
+    def addUris(cls, uris: list, options: Optional[dict] = None):
         """
         Add a download task to Aria2,and return the gid of the task
         * normally, this function is only used by Class:DownloadWatcher
 
         param uris: the uris of the files to be downloaded
+        param options: extra Aria2 options of the task
         """
         if not cls.testAria2Service():
             cls.startAria2()
 
-        gid = cls._aria2.add_uris(uris).gid
+        gid = cls._aria2.add_uris(uris, options=options).gid
         if gid in cls._downloadTasks.keys():
             download = cls._aria2.get_download(gid)
             if download.status not in ["complete", "error", "removed"]:
@@ -281,6 +318,16 @@ class Aria2Controller:
             download = cls._aria2.get_download(gid)
         except Exception:
             cls.killWatcher(gid)
+            download = None
+        return cls.statusOf(download)
+
+    @classmethod
+    def statusOf(cls, download: Optional[Download]) -> dict:
+        """
+        Turn a Download into the status dict emitted to the widgets,
+        a missing download is reported as removed
+        """
+        if download is None:
             return {
                 "connections": 0,
                 "speed": "0.0B/s",
@@ -292,7 +339,6 @@ class Aria2Controller:
                 "bar": 0,
                 "eta": "-",
             }
-        download: Download
         rv = {
             "connections": download.connections,
             "speed": download.download_speed_string()
@@ -308,6 +354,25 @@ class Aria2Controller:
         }
         return rv
 
+    @classmethod
+    def tellAll(cls) -> Dict[str, Download]:
+        """
+        Get all active, waiting and stopped tasks with a single system.multicall
+        * normally, this function is only used by Class:Aria2StatusPoller
+        """
+        calls = [
+            {"methodName": "aria2.tellActive", "params": [_STATUS_KEYS]},
+            {"methodName": "aria2.tellWaiting", "params": [0, _TELL_LIMIT, _STATUS_KEYS]},
+            {"methodName": "aria2.tellStopped", "params": [0, _TELL_LIMIT, _STATUS_KEYS]},
+        ]
+        downloads = {}
+        for result in cls._aria2.client.multicall(calls):
+            # 每个调用的结果是单元素列表，调用出错时是错误信息
+            if isinstance(result, list):
+                for struct in result[0]:
+                    downloads[struct["gid"]] = Download(cls._aria2, struct)
+        return downloads
+
     @classmethod
     def pauseDownloadTask(cls, gid: str):
         """
@@ -392,10 +457,11 @@ class Aria2Controller:
         return rv
 
     @classmethod
-    def downloadCompletedHandler(cls, gid, stopFlag):
+    def downloadCompletedHandler(cls, gid, stopFlag, download: Optional[Download] = None):
         cls._aria2: API
         try:
-            download = cls._aria2.get_download(gid)
+            if download is None:
+                download = cls._aria2.get_download(gid)
         except Exception:
             cls.killWatcher(gid)
             return None
@@ -428,6 +494,8 @@ class Aria2Controller:
 
     @classmethod
     def shutDown(cls):
+        if cls._statusPoller is not None:
+            cls._statusPoller.stop()
         try:
             if cls._aria2 is not None:
                 cls._aria2: API
@@ -492,10 +560,81 @@ class Aria2ProcessThread(QThread):
         process.wait()
 
 
+class Aria2StatusPoller(QThread):
+    """
+    所有下载任务共用的状态轮询线程，取代每个任务一个QTimer、在主线程逐个get_download的做法。\n
+    每轮在工作线程中用一次system.multicall取回所有活动、等待与已停止的任务，
+    再回到主线程分发给对应的DownloadWatcher；没有任务时线程空闲等待。
+    """
+
+    # 工作线程 -> 主线程：{gid: Download}，取不到状态时为None
+    _polled = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lock = Lock()
+        self.watchers: Dict[str, "DownloadWatcher"] = {}
+        self.wakeUp = Event()
+        self.stopping = False
+        self.failures = 0
+        self._polled.connect(self.dispatch)
+
+    def watch(self, watcher: "DownloadWatcher"):
+        with self.lock:
+            self.watchers[watcher.gid] = watcher
+        if not self.isRunning():
+            self.stopping = False
+            self.start()
+        self.wakeUp.set()
+
+    def unwatch(self, gid: str):
+        with self.lock:
+            self.watchers.pop(gid, None)
+
+    def stop(self):
+        self.stopping = True
+        self.wakeUp.set()
+        self.wait()
+
+    def run(self):
+        while not self.stopping:
+            with self.lock:
+                interval = min((w.interval for w in self.watchers.values()), default=None)
+            if interval is None:
+                self.wakeUp.wait()
+                self.wakeUp.clear()
+                continue
+            # 新任务加入时立即唤醒，按最短的间隔重新计时
+            if self.wakeUp.wait(interval):
+                self.wakeUp.clear()
+                continue
+            if self.stopping:
+                break
+            try:
+                downloads = Aria2Controller.tellAll()
+                self.failures = 0
+            except Exception as e:
+                self.failures += 1
+                if self.failures == 1:
+                    MCSL2Logger.warning(f"获取Aria2下载状态失败：{e}")
+                if self.failures < _POLL_FAILURE_LIMIT:
+                    continue
+                self.failures = 0
+                downloads = None
+            self._polled.emit(downloads)
+
+    def dispatch(self, downloads: Optional[Dict[str, Download]]):
+        """在主线程中把一轮的结果分发给各个任务"""
+        with self.lock:
+            watchers = list(self.watchers.values())
+        for watcher in watchers:
+            watcher.updateDownloadInfo(downloads.get(watcher.gid) if downloads else None)
+
+
 class DownloadWatcher(QObject):
     """
-    DownloadWatcher is a QThread that watches the download progress of a download task.
-    download task started and download information emitted every interval.
+    DownloadWatcher watches the download progress of a download task.
+    The shared Aria2StatusPoller polls every interval and the download information is emitted.
     """
 
     # 每隔一段时间获取一次下载信息(self.Interval)，并发射下载信息OnDownloadInfoGet(dict)
@@ -520,42 +659,38 @@ class DownloadWatcher(QObject):
         self._interval = interval
         self._files = None
         self._extraData = extraData
+        self.finished = False
 
         if info_get is not None:
             self.onDownloadInfoGet.connect(info_get)
         if stopped is not None:
             self.downloadStop.connect(stopped)
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.updateDownloadInfo)
-        self.timer.singleShot(
-            int(1000 * self._interval),
-            lambda: self.timer.start(int(self._interval * 1000)),
-        )
+        Aria2Controller.statusPoller().watch(self)
 
-    def updateDownloadInfo(self):
-        if (status := Aria2Controller.getDownloadsStatus(self._gid))["status"] not in [
+    def updateDownloadInfo(self, download: Optional[Download]):
+        """由Aria2StatusPoller在主线程中调用，download为None表示任务已不存在"""
+        if self.finished:
+            return
+        if (status := Aria2Controller.statusOf(download))["status"] not in [
             "complete",
             "error",
             "removed",
         ]:
             self.onDownloadInfoGet.emit(status)
-        elif status["status"] == "complete":
-            self.timer.stop()
-            self.onDownloadInfoGet.emit(status)
-            dl = Aria2Controller.downloadCompletedHandler(self._gid, False)
+            return
+        self.kill()
+        self.onDownloadInfoGet.emit(status)
+        if status["status"] == "complete":
+            dl = Aria2Controller.downloadCompletedHandler(self._gid, False, download)
             self.downloadStop.emit([dl, self._extraData])
             MCSL2Logger.success("下载完成")
         elif status["status"] == "error":
-            self.timer.stop()
-            self.onDownloadInfoGet.emit(status)
-            dl = Aria2Controller.downloadCompletedHandler(self._gid, True)
+            dl = Aria2Controller.downloadCompletedHandler(self._gid, True, download)
             self.downloadStop.emit([dl, self._extraData])
             MCSL2Logger.warning("下载失败")
-        elif status["status"] == "removed":
-            self.timer.stop()
-            self.onDownloadInfoGet.emit(status)
-            dl = Aria2Controller.downloadCompletedHandler(self._gid, True)
+        else:
+            dl = Aria2Controller.downloadCompletedHandler(self._gid, True, download)
             self.downloadStop.emit([dl, self._extraData])
             MCSL2Logger.info("下载被取消")
 
@@ -570,7 +705,8 @@ class DownloadWatcher(QObject):
         Aria2Controller.pauseDownloadTask(self._gid)
 
     def kill(self):
-        self.timer.stop()
+        self.finished = True
+        Aria2Controller.statusPoller().unwatch(self._gid)
 
     @property
     def gid(self):
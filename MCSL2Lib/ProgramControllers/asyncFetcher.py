@@ -0,0 +1,162 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Asynchronous fetch layer for the mirror APIs: cancellable futures, request coalescing
+and cancellation by group, with callbacks delivered on the GUI thread.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from MCSL2Lib.utils import MCSL2Logger
+
+
+class FetchFuture:
+    """
+    一次请求的结果。回调总是在主线程中调用；取消后不会再调用任何回调。\n
+    相同的请求合并为一次执行，每个调用方各拿到一个FetchFuture，取消互不影响。
+    """
+
+    def __init__(self, job: "_FetchJob", group: str):
+        self._job = job
+        self.group = group
+        self._callbacks: List[Callable[[Any], None]] = []
+        self._errbacks: List[Callable[[BaseException], None]] = []
+        self._cancelled = False
+
+    def then(self, callback: Callable[[Any], None], errback=None) -> "FetchFuture":
+        """请求完成时调用callback(结果)；出现异常时调用errback(异常)，没有errback时只记录日志"""
+        self._callbacks.append(callback)
+        if errback is not None:
+            self._errbacks.append(errback)
+        return self
+
+    def cancel(self):
+        """取消后不再送达结果；所有合并的调用方都取消时，还没开始的请求不再执行"""
+        if self._cancelled:
+            return
+        self._cancelled = True
+        self._callbacks.clear()
+        self._errbacks.clear()
+        self._job.unsubscribe(self)
+
+    def isCancelled(self) -> bool:
+        return self._cancelled
+
+    def isPending(self) -> bool:
+        return not self._cancelled and not self._job.done
+
+    def _deliver(self, result, error: Optional[BaseException]):
+        if self._cancelled:
+            return
+        if error is None:
+            for callback in self._callbacks:
+                callback(result)
+        elif self._errbacks:
+            for errback in self._errbacks:
+                errback(error)
+        else:
+            MCSL2Logger.error(exc=error, msg="后台请求失败")
+
+
+class _FetchJob:
+    """一个正在执行的请求及订阅它的调用方"""
+
+    def __init__(self, fetcher: "AsyncFetcher", key: Hashable):
+        self.fetcher = fetcher
+        self.key = key
+        self.subscribers: List[FetchFuture] = []
+        self.future: Optional[Future] = None
+        self.done = False
+
+    def unsubscribe(self, subscriber: FetchFuture):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+        if not self.subscribers and not self.done:
+            self.fetcher._abandon(self)
+
+
+class AsyncFetcher(QObject):
+    """
+    线程池上的异步请求层，取代每个请求一个QThread的做法。\n
+    fetch()立即返回FetchFuture；同一函数、同样参数的请求正在进行时直接合并，不会重复请求。\n
+    group标记请求所属的界面（如下载页的各下载源），切换界面时可用cancelGroup()一并取消。
+    """
+
+    # 工作线程 -> 主线程：(请求, 结果, 异常)
+    _delivered = pyqtSignal(object, object, object)
+
+    def __init__(self, threads: int = 6):
+        super().__init__()
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix="MCSL2Fetch")
+        self.jobs: Dict[Hashable, _FetchJob] = {}
+        self._delivered.connect(self._onDelivered)
+
+    @staticmethod
+    def keyOf(func: Callable, args: tuple, kwargs: dict) -> Hashable:
+        return func, args, tuple(sorted(kwargs.items()))
+
+    def fetch(self, func: Callable, *args, group: str = "", **kwargs) -> FetchFuture:
+        """
+        在线程池中调用func(*args, **kwargs)，参数须可哈希（用于合并相同的请求）\n
+        只应在主线程中调用
+        """
+        key = self.keyOf(func, args, kwargs)
+        if (job := self.jobs.get(key)) is None:
+            job = self.jobs[key] = _FetchJob(self, key)
+
+            def run():
+                try:
+                    result, error = func(*args, **kwargs), None
+                except Exception as e:
+                    result, error = None, e
+                self._delivered.emit(job, result, error)
+
+            job.future = self.pool.submit(run)
+        subscriber = FetchFuture(job, group)
+        job.subscribers.append(subscriber)
+        return subscriber
+
+    def _onDelivered(self, job: _FetchJob, result, error):
+        job.done = True
+        if self.jobs.get(job.key) is job:
+            del self.jobs[job.key]
+        for subscriber in list(job.subscribers):
+            subscriber._deliver(result, error)
+
+    def _abandon(self, job: _FetchJob):
+        """没有调用方再等待这个请求：还没开始的直接移出队列，已开始的结果将被丢弃"""
+        if self.jobs.get(job.key) is job:
+            del self.jobs[job.key]
+        if job.future is not None:
+            job.future.cancel()
+
+    def cancelGroup(self, group: str):
+        """取消属于group的所有请求"""
+        for job in list(self.jobs.values()):
+            for subscriber in list(job.subscribers):
+                if subscriber.group == group:
+                    subscriber.cancel()
+
+    def pendingCount(self, group: Optional[str] = None) -> int:
+        return sum(
+            1
+            for job in self.jobs.values()
+            for s in job.subscribers
+            if group is None or s.group == group
+        )
+
+
+asyncFetcher = AsyncFetcher()
@@ -0,0 +1,202 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Low-priority prefetch of the configured download source's lists while the window is idle.
+"""
+
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QTimer
+
+from MCSL2Lib.ProgramControllers.asyncFetcher import FetchFuture, asyncFetcher
+from MCSL2Lib.ProgramControllers.coreCatalog import normalizeCore, splitCoreFileName
+from MCSL2Lib.ProgramControllers.DownloadAPI.AkiraCloud import AkiraCloudDownloadURLParser
+from MCSL2Lib.ProgramControllers.DownloadAPI.FastMirrorAPI import FastMirrorAPIDownloadURLParser
+from MCSL2Lib.ProgramControllers.DownloadAPI.MCSLAPI import MCSLAPIDownloadURLParser
+from MCSL2Lib.ProgramControllers.DownloadAPI.PolarsAPI import PolarsAPIDownloadURLParser
+from MCSL2Lib.ProgramControllers.serverRegistry import serverRegistry
+from MCSL2Lib.ProgramControllers.settingsController import cfg
+from MCSL2Lib.utils import MCSL2Logger
+
+# 启动后等待多久开始预取(毫秒)
+PREFETCH_STARTUP_DELAY = 8000
+# 两次请求之间的间隔(毫秒)；同一时间只有一个预取请求，以此限制占用的带宽
+PREFETCH_INTERVAL = 1500
+# 界面自己有请求在进行时，推迟多久再试(毫秒)
+PREFETCH_BUSY_RETRY = 3000
+# 预取已有服务器中最常用的几种核心类型
+PREFETCH_CORE_TYPES = 3
+# 一轮预取最多发出的请求数
+PREFETCH_MAX_REQUESTS = 8
+# 预取请求在asyncFetcher中的分组
+PREFETCH_GROUP = "Prefetch"
+
+# (函数, 参数, 根据结果生成后续请求的函数)
+PrefetchStep = Tuple[Callable, tuple, Optional[Callable[[object], List["PrefetchStep"]]]]
+
+
+def frequentCores(limit: int = PREFETCH_CORE_TYPES) -> List[Tuple[str, str]]:
+    """已有服务器中最常用的核心类型及其最常用的MC版本，[(核心类型, MC版本或""), ...]"""
+    cores = Counter()
+    versions: Dict[str, Counter] = {}
+    for server in serverRegistry.servers():
+        core, mcVersion, _ = splitCoreFileName(server.get("core_file_name", ""))
+        if not core:
+            continue
+        cores[core] += 1
+        if mcVersion:
+            versions.setdefault(core, Counter())[mcVersion] += 1
+    return [
+        (core, versions[core].most_common(1)[0][0] if core in versions else "")
+        for core, _ in cores.most_common(limit)
+    ]
+
+
+class CatalogPrefetcher(QObject):
+    """
+    启动后窗口空闲时，在后台预取设置中下载源的顶层列表，以及已有服务器常用核心类型的列表，
+    结果进入下载列表缓存，打开下载页时不必再等网络。\n
+    同一时间只发一个请求，请求之间留有间隔，界面自己在请求时让路；
+    开始下载或启动服务器时立即取消，之后本次运行不再预取。\n
+    与下载页相同的请求会被asyncFetcher合并，正在预取的列表下载页直接沿用。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.queue: List[PrefetchStep] = []
+        self.future: Optional[FetchFuture] = None
+        self.requests = 0
+        self.cancelled = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.fetchNext)
+
+    def schedule(self, delay: int = PREFETCH_STARTUP_DELAY):
+        """主窗口加载完成后调用"""
+        if self.cancelled or not cfg.get(cfg.idleCatalogPrefetch):
+            return
+        self.queue = self.topLevelSteps(cfg.get(cfg.downloadSource))
+        self.requests = 0
+        self.timer.start(delay)
+
+    def cancel(self):
+        """立即停止预取；已发出的请求结果会被丢弃"""
+        self.cancelled = True
+        self.timer.stop()
+        self.queue.clear()
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
+        asyncFetcher.cancelGroup(PREFETCH_GROUP)
+
+    def isRunning(self) -> bool:
+        return not self.cancelled and (self.future is not None or self.timer.isActive())
+
+    def fetchNext(self):
+        if self.cancelled or not self.queue or self.requests >= PREFETCH_MAX_REQUESTS:
+            self.queue.clear()
+            return
+        # 界面自己在请求时先让路
+        if asyncFetcher.pendingCount() > asyncFetcher.pendingCount(PREFETCH_GROUP):
+            self.timer.start(PREFETCH_BUSY_RETRY)
+            return
+        func, args, followUp = self.queue.pop(0)
+        self.requests += 1
+        self.future = asyncFetcher.fetch(func, *args, group=PREFETCH_GROUP).then(
+            lambda result: self.onFetched(result, followUp), self.onFetchFailed
+        )
+
+    def onFetched(self, result, followUp):
+        self.future = None
+        if followUp is not None:
+            try:
+                self.queue.extend(followUp(result))
+            except Exception as e:
+                MCSL2Logger.warning(f"预取下载列表时无法解析结果：{e}")
+        self.timer.start(PREFETCH_INTERVAL)
+
+    def onFetchFailed(self, e: BaseException):
+        # 下载源出问题时不再继续请求它
+        self.future = None
+        self.queue.clear()
+        MCSL2Logger.warning(f"预取下载列表失败：{e}")
+
+    # region 各下载源的预取步骤
+    def topLevelSteps(self, source: str) -> List[PrefetchStep]:
+        return {
+            "FastMirror": [
+                (FastMirrorAPIDownloadURLParser.parseFastMirrorAPIUrl, (), self.fastMirrorSteps)
+            ],
+            "MCSLAPI": [(MCSLAPIDownloadURLParser.parseDownloaderAPIUrl, ("",), self.MCSLAPISteps)],
+            "PolarsAPI": [(PolarsAPIDownloadURLParser.parsePolarsAPIUrl, (), self.polarsSteps)],
+            "AkiraCloud": [
+                (AkiraCloudDownloadURLParser.getDownloadTypeList, (), self.akiraSteps)
+            ],
+        }.get(source, [])
+
+    @staticmethod
+    def fastMirrorSteps(result: dict) -> List[PrefetchStep]:
+        if not isinstance(names := result.get("name"), list):
+            return []
+        steps = []
+        for core, mcVersion in frequentCores():
+            for name, mcVersions in zip(names, result["mc_versions"]):
+                if normalizeCore(name) != core or not mcVersions:
+                    continue
+                # 没用过的MC版本就取最新的
+                version = mcVersion if mcVersion in mcVersions else mcVersions[0]
+                steps.append(
+                    (
+                        FastMirrorAPIDownloadURLParser.parseFastMirrorAPICoreVersionUrl,
+                        (name, version, 0),
+                        None,
+                    )
+                )
+        return steps
+
+    @staticmethod
+    def MCSLAPISteps(result: dict) -> List[PrefetchStep]:
+        if not isinstance(names := result.get("name"), list):
+            return []
+        dirs = {normalizeCore(n): n for n, isDir in zip(names, result["is_dir"]) if isDir}
+        return [
+            (MCSLAPIDownloadURLParser.parseDownloaderAPIUrl, (f"/{dirs[core]}",), None)
+            for core, _ in frequentCores()
+            if core in dirs
+        ]
+
+    @staticmethod
+    def polarsSteps(result: dict) -> List[PrefetchStep]:
+        if not isinstance(names := result.get("name"), list):
+            return []
+        ids = {normalizeCore(n): idx for n, idx in zip(names, result["id"])}
+        return [
+            (PolarsAPIDownloadURLParser.parsePolarsAPICoreUrl, (ids[core],), None)
+            for core, _ in frequentCores()
+            if core in ids
+        ]
+
+    @staticmethod
+    def akiraSteps(result: list) -> List[PrefetchStep]:
+        types = {normalizeCore(t): t for t in result}
+        return [
+            (AkiraCloudDownloadURLParser.getDownloadCoreList, (types[core],), None)
+            for core, _ in frequentCores()
+            if core in types
+        ]
+
+    # endregion
+
+
+catalogPrefetcher = CatalogPrefetcher()
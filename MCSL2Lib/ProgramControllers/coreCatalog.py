@@ -0,0 +1,451 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Unified offline catalog of server cores across all download mirrors, with fuzzy search.
+"""
+
+import gzip
+import re
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from json import JSONDecodeError, dumps, loads
+from os import makedirs, path as osp, replace
+from threading import Lock
+from time import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+from MCSL2Lib.ProgramControllers.DownloadAPI.AkiraCloud import (
+    AKIRA_CLOUD_URL,
+    AkiraCloudDownloadURLParser,
+)
+from MCSL2Lib.ProgramControllers.DownloadAPI.FastMirrorAPI import (
+    FastMirrorAPIDownloadURLParser,
+)
+from MCSL2Lib.ProgramControllers.DownloadAPI.MCSLAPI import MCSLAPIDownloadURLParser
+from MCSL2Lib.ProgramControllers.DownloadAPI.PolarsAPI import PolarsAPIDownloadURLParser
+from MCSL2Lib.utils import MCSL2Logger
+
+CORE_CATALOG_PATH = "MCSL2/Cache/MCSL2_CoreCatalog.json.gz"
+# 目录超过此时间(秒)视为过期，打开搜索时在后台重建
+CORE_CATALOG_MAX_AGE = 24 * 3600
+# 与cfg.downloadSource的选项一致
+CATALOG_MIRRORS = ("FastMirror", "MCSLAPI", "PolarsAPI", "AkiraCloud")
+
+FASTMIRROR_DOWNLOAD_URL = "https://download.fastmirror.net/download"
+MCSLAPI_DOWNLOAD_URL = "https://file.mcsl.com.cn/d/alistfile/MCSL2/MCSLAPI"
+
+_MC_IN_NAME = re.compile(r"(?<![\d.])(1\.\d+(?:\.\d+)?)(?![\d.])")
+_MC_TOKEN = re.compile(r"1\.\d+(?:\.\d+)?")
+_ARCHIVE_EXT = re.compile(r"\.(jar|zip|tar\.gz|tgz|exe)$", re.IGNORECASE)
+_LATEST_WORDS = {"latest", "newest", "最新"}
+
+
+class CatalogEntry(NamedTuple):
+    """一个核心构建，urls为各镜像站的(镜像站, 下载地址)"""
+
+    core: str
+    mcVersion: str
+    build: str
+    fileName: str
+    size: int
+    sha1: str
+    updateTime: str
+    urls: Tuple[Tuple[str, str], ...]
+
+
+def normalizeCore(name: str) -> str:
+    """Paper、paper_、PAPER -> paper"""
+    return re.sub(r"[\s_]+", "-", str(name).strip().strip("/").lower()).strip("-. ")
+
+
+def normalizeBuild(build: str) -> str:
+    """build496、b496、496 -> 496，用于合并不同镜像站的同一构建"""
+    return re.sub(r"^(build|b)(?=\d)", "", str(build).lower()).strip("-_. ")
+
+
+def splitCoreFileName(fileName: str, fallbackCore: str = "") -> Tuple[str, str, str]:
+    """从文件名中拆出(核心类型, MC版本, 构建)，如paper-1.20.4-496.jar"""
+    stem = _ARCHIVE_EXT.sub("", fileName)
+    if (m := _MC_IN_NAME.search(stem)) is None:
+        # 没有MC版本的文件(如代理端)：文件名中核心名之后的部分作为构建
+        core, rest = normalizeCore(fallbackCore or stem), normalizeCore(stem)
+        return core, "", rest[len(core):].strip("-_. ") if rest.startswith(core) else ""
+    core = stem[: m.start()].strip("-_. ") or fallbackCore
+    return normalizeCore(core), m.group(1), stem[m.end():].strip("-_. ")
+
+
+def mergeKeyOf(core: str, mcVersion: str, build: str, fileName: str) -> Tuple[str, str, str]:
+    """
+    各镜像站的同一构建合并到同一个键下。\n
+    文件名中没有MC版本(如BungeeCord、Velocity等代理端)时按完整的文件名区分，
+    否则同一核心的所有构建都会得到相同的键
+    """
+    if mcVersion:
+        return core, mcVersion, normalizeBuild(build)
+    return core, "", _ARCHIVE_EXT.sub("", fileName).lower()
+
+
+def _isSameFile(a: "CatalogEntry", b: "CatalogEntry") -> bool:
+    """
+    双方都已知的大小或校验值不一致时才视为不同文件。\n
+    各镜像站提供的信息不同(FastMirror只有sha1，MCSLAPI只有大小)，一方未知时不能据此拒绝合并
+    """
+    if a.size and b.size and a.size != b.size:
+        return False
+    return not (a.sha1 and b.sha1 and a.sha1.lower() != b.sha1.lower())
+
+
+def _versionKey(version: str) -> Tuple[int, ...]:
+    return tuple(int(x) for x in re.findall(r"\d+", version))
+
+
+def _naturalKey(text: str) -> Tuple:
+    return tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in re.findall(r"\d+|\D+", text)
+    )
+
+
+def fuzzyScore(word: str, text: str) -> float:
+    """word与text的匹配程度，不匹配时为0"""
+    if word == text:
+        return 3.0
+    if text.startswith(word):
+        return 2.0
+    if word in text:
+        return 1.5
+    it = iter(text)
+    if all(c in it for c in word):
+        return 1.0
+    ratio = SequenceMatcher(None, word, text).ratio()
+    return ratio if ratio >= 0.75 else 0.0
+
+
+# region 各镜像站的采集
+def _collectFastMirror(pool: ThreadPoolExecutor, isCancelled) -> List[Dict]:
+    """每个(核心, MC版本)只取最新的一页构建"""
+    catalog = FastMirrorAPIDownloadURLParser.parseFastMirrorAPIUrl()
+    if catalog["name"] == -1:
+        raise ConnectionError("FastMirror")
+    futures = [
+        pool.submit(FastMirrorAPIDownloadURLParser.parseFastMirrorAPICoreVersionUrl, name, mc)
+        for name, versions in zip(catalog["name"], catalog["mc_versions"])
+        for mc in versions
+    ]
+    rows = []
+    for future in futures:
+        if isCancelled():
+            break
+        page = future.result()
+        if type(page["name"]) is not list:
+            continue
+        for i, build in enumerate(page["core_version"]):
+            rows.append({
+                "core": page["core"],
+                "mcVersion": page["mcVersion"],
+                "build": build,
+                "fileName": f"{page['core']}-{page['mcVersion']}-{build}.jar",
+                "sha1": page["sha1"][i],
+                "updateTime": page["update_time"][i],
+                "url": f"{FASTMIRROR_DOWNLOAD_URL}/{page['core']}/{page['mcVersion']}/{build}",
+            })
+    return rows
+
+
+def _collectPolars(pool: ThreadPoolExecutor, isCancelled) -> List[Dict]:
+    types = PolarsAPIDownloadURLParser.parsePolarsAPIUrl()
+    if types["name"] == -1:
+        raise ConnectionError("PolarsAPI")
+    futures = [
+        (name, pool.submit(PolarsAPIDownloadURLParser.parsePolarsAPICoreUrl, idx))
+        for name, idx in zip(types["name"], types["id"])
+    ]
+    rows = []
+    for typeName, future in futures:
+        if isCancelled():
+            break
+        cores = future.result()
+        if cores["name"] == -1:
+            continue
+        for fileName, url in zip(cores["name"], cores["downloadUrl"]):
+            rows.append({"fileName": fileName, "fallbackCore": typeName, "url": url})
+    return rows
+
+
+def _collectAkira(pool: ThreadPoolExecutor, isCancelled) -> List[Dict]:
+    types = AkiraCloudDownloadURLParser.getDownloadTypeList()
+    if not types:
+        raise ConnectionError("AkiraCloud")
+    futures = [pool.submit(AkiraCloudDownloadURLParser.getDownloadCoreList, t) for t in types]
+    rows = []
+    for future in futures:
+        if isCancelled():
+            break
+        cores = future.result()
+        if cores["name"] == "-1":
+            continue
+        coreType = cores["name"].strip("/")
+        for fileName in cores["list"]:
+            rows.append({
+                "fileName": fileName,
+                "fallbackCore": coreType,
+                "url": f"{AKIRA_CLOUD_URL}/{coreType}/{fileName}",
+            })
+    return rows
+
+
+def _collectMCSLAPI(pool: ThreadPoolExecutor, isCancelled, maxDepth: int = 3) -> List[Dict]:
+    """逐层列出目录，同一层的目录并行获取（不在线程池内递归提交，避免占满线程池）"""
+    rows, level = [], [""]
+    for depth in range(maxDepth + 1):
+        if not level or isCancelled():
+            break
+        listings = list(
+            pool.map(lambda p: MCSLAPIDownloadURLParser.parseDownloaderAPIUrl(p, perPage=0), level)
+        )
+        if depth == 0 and type(listings[0]["name"]) is not list:
+            raise ConnectionError("MCSLAPI")
+        level = []
+        for listing in listings:
+            if type(listing["name"]) is not list:
+                continue
+            path = listing["path"]
+            for name, size, isDir in zip(listing["name"], listing["size"], listing["is_dir"]):
+                if isDir:
+                    level.append(f"{path}/{name}")
+                    continue
+                rows.append({
+                    "fileName": name,
+                    "fallbackCore": path.rsplit("/", 1)[-1],
+                    "size": size,
+                    "url": f"{MCSLAPI_DOWNLOAD_URL}{path}/{name}",
+                })
+    return rows
+
+
+_COLLECTORS: Dict[str, Callable] = {
+    "FastMirror": _collectFastMirror,
+    "MCSLAPI": _collectMCSLAPI,
+    "PolarsAPI": _collectPolars,
+    "AkiraCloud": _collectAkira,
+}
+
+# endregion
+
+
+class CoreCatalog(QObject):
+    """
+    所有镜像站核心的统一目录。\n
+    各镜像站的列表归一化为(核心类型, MC版本, 构建)，
+    大小与校验值不冲突的同一构建合并各镜像站的下载地址；
+    以gzip压缩的JSON保存，启动后读入内存并按核心类型建立索引，搜索不访问网络。
+    """
+
+    catalogUpdated = pyqtSignal()
+
+    def __init__(self, path: str = CORE_CATALOG_PATH):
+        super().__init__()
+        self.path = path
+        self.lock = Lock()
+        self.builtAt = 0.0
+        self.entries: List[CatalogEntry] = []
+        self.byCore: Dict[str, List[int]] = {}
+        self._loaded = False
+
+    # region 读写
+    def load(self):
+        self._loaded = True
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = loads(f.read())
+            entries = [
+                CatalogEntry(*row[:7], tuple(tuple(u) for u in row[7])) for row in data["rows"]
+            ]
+        except (OSError, EOFError, JSONDecodeError, KeyError, TypeError, ValueError):
+            return
+        self._setEntries(entries, data.get("builtAt", 0.0))
+
+    def ensureLoaded(self):
+        if not self._loaded:
+            self.load()
+
+    def save(self):
+        with self.lock:
+            data = {"builtAt": self.builtAt, "rows": [list(e) for e in self.entries]}
+        makedirs(osp.dirname(self.path) or ".", exist_ok=True)
+        with gzip.open(f"{self.path}.tmp", "wt", encoding="utf-8") as f:
+            f.write(dumps(data, ensure_ascii=False, separators=(",", ":")))
+        replace(f"{self.path}.tmp", self.path)
+
+    # endregion
+
+    def isStale(self) -> bool:
+        self.ensureLoaded()
+        return not self.entries or time() - self.builtAt > CORE_CATALOG_MAX_AGE
+
+    def _setEntries(self, entries: List[CatalogEntry], builtAt: float):
+        # 新的在前：MC版本、更新时间、构建号依次倒序
+        entries.sort(
+            key=lambda e: (_versionKey(e.mcVersion), e.updateTime, _naturalKey(e.build)),
+            reverse=True,
+        )
+        byCore: Dict[str, List[int]] = {}
+        for i, e in enumerate(entries):
+            byCore.setdefault(e.core, []).append(i)
+        with self.lock:
+            self.entries = entries
+            self.byCore = byCore
+            self.builtAt = builtAt
+
+    # region 重建
+    @staticmethod
+    def normalize(mirror: str, row: Dict) -> Optional[Tuple]:
+        if "core" in row:
+            core, mcVersion, build = normalizeCore(row["core"]), row["mcVersion"], row["build"]
+        else:
+            core, mcVersion, build = splitCoreFileName(row["fileName"], row.get("fallbackCore", ""))
+        if not core:
+            return None
+        return mergeKeyOf(core, mcVersion, build, row["fileName"]), CatalogEntry(
+            core,
+            mcVersion,
+            build,
+            row["fileName"],
+            int(row.get("size") or 0),
+            row.get("sha1") or "",
+            row.get("updateTime") or "",
+            ((mirror, row["url"]),),
+        )
+
+    def rebuild(self, isCancelled: Callable[[], bool] = lambda: False, threads: int = 4) -> int:
+        """
+        从各镜像站重新采集（请求都经过下载列表缓存），返回条目数\n
+        采集失败的镜像站保留上一次的条目
+        """
+        self.ensureLoaded()
+        # 同一个键下可能有多个条目：大小或校验值不一致的文件不合并
+        merged: Dict[Tuple, List[CatalogEntry]] = {}
+        with self.lock:
+            previous = self.entries
+        with ThreadPoolExecutor(threads, thread_name_prefix="MCSL2CoreCatalog") as pool:
+            for mirror in CATALOG_MIRRORS:
+                if isCancelled():
+                    return 0
+                try:
+                    rows = _COLLECTORS[mirror](pool, isCancelled)
+                    pairs = [self.normalize(mirror, row) for row in rows]
+                except Exception as e:
+                    MCSL2Logger.warning(f"采集{mirror}的核心列表失败，沿用旧的条目：{e}")
+                    pairs = [
+                        (
+                            mergeKeyOf(e.core, e.mcVersion, e.build, e.fileName),
+                            e._replace(urls=(u,)),
+                        )
+                        for e in previous
+                        for u in e.urls
+                        if u[0] == mirror
+                    ]
+                for key, entry in filter(None, pairs):
+                    candidates = merged.setdefault(key, [])
+                    for i, old in enumerate(candidates):
+                        if _isSameFile(old, entry):
+                            # 合并：保留已有的信息，补上缺少的大小、校验值、更新时间与下载地址
+                            candidates[i] = old._replace(
+                                size=old.size or entry.size,
+                                sha1=old.sha1 or entry.sha1,
+                                updateTime=old.updateTime or entry.updateTime,
+                                urls=old.urls + tuple(u for u in entry.urls if u not in old.urls),
+                            )
+                            break
+                    else:
+                        candidates.append(entry)
+        if isCancelled():
+            return 0
+        entries = [entry for candidates in merged.values() for entry in candidates]
+        self._setEntries(entries, time())
+        try:
+            self.save()
+        except OSError as e:
+            MCSL2Logger.error(exc=e, msg="保存核心目录失败")
+        self.catalogUpdated.emit()
+        return len(entries)
+
+    # endregion
+
+    def search(self, query: str, limit: int = 50) -> List[CatalogEntry]:
+        """
+        模糊搜索，如“paper 1.20.4 latest”\n
+        MC版本按前缀匹配（1.20匹配1.20.x），latest/最新只保留每个MC版本最新的构建，
+        其余词依次模糊匹配核心类型，匹配不上时匹配构建与文件名
+        """
+        self.ensureLoaded()
+        tokens = query.lower().split()
+        latest = any(t in _LATEST_WORDS for t in tokens)
+        mcTokens = [t for t in tokens if _MC_TOKEN.fullmatch(t)]
+        words = [t for t in tokens if t not in _LATEST_WORDS and t not in mcTokens]
+        with self.lock:
+            entries, byCore = self.entries, self.byCore
+        results = []
+        for core, indices in byCore.items():
+            coreScores = {w: fuzzyScore(w, core) for w in words}
+            for i in indices:
+                e = entries[i]
+                if mcTokens and not any(
+                    e.mcVersion == t or e.mcVersion.startswith(f"{t}.") for t in mcTokens
+                ):
+                    continue
+                score = 0.0
+                for w in words:
+                    if coreScores[w]:
+                        score += coreScores[w]
+                    elif w in e.build.lower() or w in e.fileName.lower():
+                        score += 0.5
+                    else:
+                        break
+                else:
+                    results.append((-score, i))
+        results.sort()
+        found, seen = [], set()
+        for _, i in results:
+            e = entries[i]
+            if latest:
+                if (e.core, e.mcVersion) in seen:
+                    continue
+                seen.add((e.core, e.mcVersion))
+            found.append(e)
+            if len(found) >= limit:
+                break
+        return found
+
+
+class CoreCatalogRebuildThread(QThread):
+    """在后台重建核心目录"""
+
+    rebuildFinished = pyqtSignal(int)
+
+    def __init__(self, catalog: CoreCatalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+
+    def run(self):
+        count = 0
+        try:
+            count = self.catalog.rebuild(isCancelled=self.isInterruptionRequested)
+        except Exception as e:
+            MCSL2Logger.error(exc=e, msg="重建核心目录失败")
+        self.rebuildFinished.emit(count)
+
+
+coreCatalog = CoreCatalog()
@@ -0,0 +1,212 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Persistent HTTP response cache for the mirror catalogs, with ETag revalidation.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1
+from json import JSONDecodeError, dumps, loads
+from os import fdopen, listdir, makedirs, path as osp, remove, replace
+from tempfile import mkstemp
+from threading import Lock
+from time import time
+from typing import Dict, Optional, Set
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from MCSL2Lib.ProgramControllers.networkController import httpClient
+from MCSL2Lib.ProgramControllers.settingsController import cfg
+from MCSL2Lib.utils import MCSL2Logger
+
+HTTP_CACHE_DIR = "MCSL2/Cache"
+
+# 过期后仍可先用旧内容、同时在后台重新验证的时长(秒)，超过后必须等待重新验证
+STALE_WHILE_REVALIDATE = 7 * 24 * 3600
+
+
+class CachedResponse:
+    """缓存的响应，用法与requests的Response相近"""
+
+    def __init__(self, entry: Dict, fromCache: bool, stale: bool = False):
+        self.url: str = entry["url"]
+        self.status_code: int = entry["status"]
+        self.text: str = entry["text"]
+        self.storedAt: float = entry["storedAt"]
+        self.fromCache = fromCache
+        self.stale = stale
+
+    def json(self):
+        return loads(self.text)
+
+
+class HTTPCache(QObject):
+    """
+    镜像站列表的持久化缓存，每个请求一个文件，存放在MCSL2/Cache。\n
+    有效期(TTL)内直接使用缓存；过期后带ETag/Last-Modified发起条件请求，304时只刷新时间。\n
+    过期不久的缓存先直接返回，在后台重新验证(stale-while-revalidate)，
+    内容有变化时发出updated信号；镜像站无法访问时退回旧缓存。
+    """
+
+    # (url)
+    updated = pyqtSignal(str)
+
+    def __init__(self, cacheDir: str = HTTP_CACHE_DIR):
+        super().__init__()
+        self.cacheDir = cacheDir
+        self.lock = Lock()
+        self.entries: Dict[str, Dict] = {}
+        self.revalidating: Set[str] = set()
+        self.pool = ThreadPoolExecutor(2, thread_name_prefix="MCSL2HTTPCache")
+
+    @staticmethod
+    def keyOf(method: str, url: str, body=None) -> str:
+        raw = f"{method.upper()} {url}"
+        if body is not None:
+            raw += " " + dumps(body, sort_keys=True)
+        return sha1(raw.encode("utf-8")).hexdigest()
+
+    def ttl(self) -> float:
+        return cfg.get(cfg.catalogCacheTTL) * 60
+
+    # region 读写
+    def _path(self, key: str) -> str:
+        return osp.join(self.cacheDir, f"{key}.json")
+
+    def _load(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            if key in self.entries:
+                return self.entries[key]
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = loads(f.read())
+        except (OSError, JSONDecodeError):
+            return None
+        if not isinstance(entry, dict) or "text" not in entry:
+            return None
+        with self.lock:
+            return self.entries.setdefault(key, entry)
+
+    def _store(self, key: str, entry: Dict):
+        with self.lock:
+            self.entries[key] = entry
+        # 后台重新验证、下载页与核心目录可能同时写入同一个键，每次写入使用单独的临时文件
+        tmpPath = None
+        try:
+            makedirs(self.cacheDir, exist_ok=True)
+            fd, tmpPath = mkstemp(prefix=f"{key}.", suffix=".tmp", dir=self.cacheDir)
+            with fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(dumps(entry, ensure_ascii=False))
+            replace(tmpPath, self._path(key))
+        except OSError as e:
+            MCSL2Logger.error(exc=e, msg="写入下载列表缓存失败")
+            if tmpPath is not None:
+                try:
+                    remove(tmpPath)
+                except OSError:
+                    pass
+
+    # endregion
+
+    def _revalidate(self, method: str, url: str, body, key: str, entry: Optional[Dict]) -> Dict:
+        """发起(条件)请求并更新缓存，网络错误与非2xx响应抛出异常"""
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("lastModified"):
+                headers["If-Modified-Since"] = entry["lastModified"]
+        response = httpClient.request(method, url, json=body, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            entry = dict(entry, storedAt=time())
+            self._store(key, entry)
+            return entry
+        response.raise_for_status()
+        newEntry = {
+            "url": url,
+            "status": response.status_code,
+            "etag": response.headers.get("ETag", ""),
+            "lastModified": response.headers.get("Last-Modified", ""),
+            "storedAt": time(),
+            "text": response.text,
+        }
+        self._store(key, newEntry)
+        return newEntry
+
+    def _revalidateInBackground(self, method: str, url: str, body, key: str, entry: Dict):
+        with self.lock:
+            if key in self.revalidating:
+                return
+            self.revalidating.add(key)
+
+        def run():
+            try:
+                if self._revalidate(method, url, body, key, entry)["text"] != entry["text"]:
+                    self.updated.emit(url)
+            except Exception as e:
+                MCSL2Logger.warning(f"后台更新下载列表缓存失败：{url} {e}")
+            finally:
+                with self.lock:
+                    self.revalidating.discard(key)
+
+        self.pool.submit(run)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        json=None,
+        ttl: Optional[float] = None,
+        staleWhileRevalidate: float = STALE_WHILE_REVALIDATE,
+    ) -> CachedResponse:
+        """
+        带缓存的请求\n
+        没有缓存且请求失败时抛出异常
+        """
+        key = self.keyOf(method, url, json)
+        entry = self._load(key)
+        ttl = self.ttl() if ttl is None else ttl
+        if entry is not None:
+            age = time() - entry["storedAt"]
+            if age <= ttl:
+                return CachedResponse(entry, fromCache=True)
+            if age <= ttl + staleWhileRevalidate:
+                self._revalidateInBackground(method, url, json, key, entry)
+                return CachedResponse(entry, fromCache=True, stale=True)
+        try:
+            return CachedResponse(self._revalidate(method, url, json, key, entry), fromCache=False)
+        except Exception:
+            if entry is None:
+                raise
+            MCSL2Logger.warning(f"无法访问{url}，使用旧的下载列表缓存")
+            return CachedResponse(entry, fromCache=True, stale=True)
+
+    def get(self, url: str, **kwargs) -> CachedResponse:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> CachedResponse:
+        return self.request("POST", url, **kwargs)
+
+    def expire(self, urlPrefix: str = ""):
+        """让以urlPrefix开头的缓存立即过期，下次请求时必须重新验证（仍可用ETag省去下载）"""
+        try:
+            names = [n for n in listdir(self.cacheDir) if n.endswith(".json")]
+        except OSError:
+            return
+        for name in names:
+            key = name[: -len(".json")]
+            if (entry := self._load(key)) is not None and entry["url"].startswith(urlPrefix):
+                self._store(key, dict(entry, storedAt=0))
+
+
+httpCache = HTTPCache()
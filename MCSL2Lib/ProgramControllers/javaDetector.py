@@ -15,12 +15,19 @@ An auto-detect Java function.
 """
 
 import json
-from os import listdir, remove
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from os import cpu_count, environ, listdir, pathsep, remove, scandir, stat
 from os import path as osp
 from platform import system
 from re import search
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from PyQt5.QtCore import QThread, pyqtSignal, QProcess
+from PyQt5.QtCore import QThread, pyqtSignal
 from MCSL2Lib.utils import MCSL2Logger
 
 
@@ -39,13 +46,44 @@ matchKeywords = {
 excludedKeywords = {
     "$", "{", "}", "__"
 }
+DETECTED_JAVA_PATH = "MCSL2/MCSL2_DetectedJava.json"
+# 安装目录名中的关键词 -> 发行商/架构，release文件缺少这些信息时使用
+_JAVA_VENDOR_KEYWORDS = (
+    ("zulu", "Azul Systems, Inc."),
+    ("temurin", "Eclipse Adoptium"),
+    ("adoptium", "Eclipse Adoptium"),
+    ("corretto", "Amazon.com Inc."),
+    ("dragonwell", "Alibaba"),
+    ("graalvm", "GraalVM Community"),
+    ("microsoft", "Microsoft"),
+    ("liberica", "BellSoft"),
+    ("openjdk", "OpenJDK"),
+)
+_JAVA_ARCH_KEYWORDS = (
+    ("x86_64", "x86_64"),
+    ("amd64", "x86_64"),
+    ("x64", "x86_64"),
+    ("aarch64", "aarch64"),
+    ("arm64", "aarch64"),
+    ("i386", "x86"),
+    ("i686", "x86"),
+    ("x86", "x86"),
+)
+# 在Linux/macOS上遍历目录查找Java的时间上限(秒)
+JAVA_DISCOVERY_TIME_BUDGET = 15.0
+# 单个Java执行java -version的超时时间(秒)，超时的视为损坏
+JAVA_PROBE_TIMEOUT = 5
+# 同时运行的java -version进程数
+JAVA_PROBE_THREADS = max(1, (cpu_count() or 2) // 2)
 
 
 # fmt: on
 class Java:
-    def __init__(self, path, ver):
+    def __init__(self, path, ver, vendor="", arch=""):
         self._path = path
         self._version = ver
+        self.vendor = vendor
+        self.arch = arch
 
     @property
     def path(self):
@@ -57,7 +95,12 @@ class Java:
 
     @property
     def json(self):
-        return {"Path": self.path, "Version": self.version}
+        return {
+            "Path": self.path,
+            "Version": self.version,
+            "Vendor": self.vendor,
+            "Arch": self.arch,
+        }
 
     def __hash__(self):
         return hash((self._path, self._version))
@@ -70,27 +113,151 @@ class Java:
             return self._path == other._path and self._version == other._version
 
 
+def runJavaVersion(File) -> Optional[str]:
+    """
+    执行java -version并返回其输出，超时或无法执行时返回None\n
+    超时后会结束该进程，不会让损坏的Java卡住查找
+    """
+    try:
+        output = subprocess.run(
+            [File, "-version"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=JAVA_PROBE_TIMEOUT,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        ).stderr
+    except subprocess.TimeoutExpired:
+        MCSL2Logger.warning(f"{File} -version 超过{JAVA_PROBE_TIMEOUT}秒未结束，已跳过")
+        return None
+    except (OSError, subprocess.SubprocessError):
+        return None
+    try:
+        return output.decode("utf-8")
+    except UnicodeDecodeError:
+        return output.decode("gbk", errors="replace")
+
+
 def getJavaVersion(File):
     """
     获取Java版本，三端通用\n
-    为什么不Win32API读取文件：无法跨平台\n
-    为什么不读取Java安装目录下的release文件：万一没有呢
+    优先读取Java安装目录下的release文件，没有release文件时才执行java -version
     """
-    process = QProcess()
-    process.start(File, ["-version"])
-    process.waitForFinished()
-    output = process.readAllStandardError().data().decode("utf-8")
-
-    # 从输出中提取版本信息
-    version_pattern = r"(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:[._](\d+))?(?:-(.+))?"
-    version_match = search(version_pattern, output)
-
-    # 输出版本信息
-    if version_match:
-        version = ".".join(filter(None, version_match.groups()))
-        return version
+    java = identifyJava(File)
+    return java.version if java is not None else ""
+
+
+def javaHomeOf(path) -> str:
+    """.../bin/java -> ..."""
+    return osp.dirname(osp.dirname(osp.abspath(path)))
+
+
+def readReleaseFile(javaHome) -> Dict[str, str]:
+    """解析release文件中KEY="VALUE"形式的行"""
+    release = {}
+    try:
+        with open(osp.join(javaHome, "release"), "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                key, sep, value = line.strip().partition("=")
+                if sep:
+                    release[key.strip()] = value.strip().strip('"')
+    except OSError:
+        pass
+    return release
+
+
+def guessJavaLayout(javaHome) -> Tuple[str, str]:
+    """从安装目录名猜测(发行商, 架构)，如zulu17.44.53-ca-jdk17.0.8.1-win_x64"""
+    name = osp.basename(javaHome).lower()
+    vendor = next((v for k, v in _JAVA_VENDOR_KEYWORDS if k in name), "")
+    arch = next((v for k, v in _JAVA_ARCH_KEYWORDS if k in name), "")
+    return vendor, arch
+
+
+class _JavaProbeCache:
+    """
+    Java识别结果的缓存，保存在MCSL2_DetectedJava.json的probeCache中。\n
+    以(路径, java可执行文件大小, 修改时间)为键，命中时识别与可用性检查只需一次stat
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.entries: Dict[str, Dict] = {}
+        self.loaded = False
+
+    def _ensureLoaded(self):
+        if self.loaded:
+            return
+        with self.lock:
+            if self.loaded:
+                return
+            try:
+                with open(DETECTED_JAVA_PATH, "r", encoding="utf-8") as f:
+                    entries = json.load(f).get("probeCache", {})
+                if isinstance(entries, dict):
+                    self.entries = entries
+            except (OSError, ValueError, AttributeError):
+                pass
+            self.loaded = True
+
+    def get(self, path, st) -> Optional[Java]:
+        self._ensureLoaded()
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry is None or entry.get("Size") != st.st_size or entry.get("MTime") != st.st_mtime_ns:
+            return None
+        return Java(path, entry.get("Version", ""), entry.get("Vendor", ""), entry.get("Arch", ""))
+
+    def put(self, java: Java, st):
+        self._ensureLoaded()
+        with self.lock:
+            self.entries[java.path] = {
+                "Size": st.st_size,
+                "MTime": st.st_mtime_ns,
+                "Version": java.version,
+                "Vendor": java.vendor,
+                "Arch": java.arch,
+            }
+
+    def snapshot(self, paths: Iterable[str]) -> Dict[str, Dict]:
+        """只保留仍在列表中的Java"""
+        self._ensureLoaded()
+        paths = set(paths)
+        with self.lock:
+            return {k: v for k, v in self.entries.items() if k in paths}
+
+
+javaProbeCache = _JavaProbeCache()
+
+
+def identifyJava(path, _match=None) -> Optional[Java]:
+    """
+    识别一个java可执行文件，不是有效的Java时返回None\n
+    顺序：缓存 -> release文件 -> java -version
+    """
+    try:
+        st = stat(path)
+    except OSError:
+        return None
+    if (java := javaProbeCache.get(path, st)) is not None:
+        return java
+    javaHome = javaHomeOf(path)
+    release = readReleaseFile(javaHome)
+    vendor, arch = guessJavaLayout(javaHome)
+    if release.get("JAVA_VERSION"):
+        java = Java(
+            path,
+            javaVersionMatcher(release["JAVA_VERSION"]),
+            release.get("IMPLEMENTOR", vendor),
+            release.get("OS_ARCH", arch),
+        )
     else:
-        return ""
+        output = runJavaVersion(path)
+        if output is None or not (version := (_match or javaVersionMatcher)(output)):
+            return None
+        java = Java(path, version, vendor, arch)
+    javaProbeCache.put(java, st)
+    return java
 
 
 def findStr(s):
@@ -103,8 +270,7 @@ def findStr(s):
     return False
 
 
-def searchFile(path, keyword, ext, fSearch, _match):
-    # construct _match function
+def javaExecutableMatcher():
     if "windows" in system().lower():
 
         def match(P, F):
@@ -115,39 +281,70 @@ def searchFile(path, keyword, ext, fSearch, _match):
         def match(P, F):
             return osp.join(P, F).endswith(r"bin/java")
 
-    processes = searchingFile(path, keyword, ext, fSearch, match)
+    return match
+
+
+def probeJavaCandidates(
+    candidates: Iterable[str],
+    _match,
+    onFound: Optional[Callable[[Java], None]] = None,
+    isCancelled: Optional[Callable[[], bool]] = None,
+) -> List[Java]:
+    """
+    在最多JAVA_PROBE_THREADS个线程中识别Java，边遍历边识别\n
+    每探测到一个Java就调用onFound，不必等全部结束
+    """
     rv = []
-    for process in processes:
-        process.waitForFinished()
-        try:
-            if match := _match(process.readAllStandardError().data().decode("utf-8")):
-                rv.append(Java(process.program(), match))
-        except UnicodeDecodeError:
-            if match := _match(process.readAllStandardError().data().decode("gbk")):
-                rv.append(Java(process.program(), match))
+    seen = set()
+    lock = Lock()
+
+    def onProbed(future):
+        if future.cancelled() or (java := future.result()) is None:
+            return
+        with lock:
+            rv.append(java)
+        if onFound is not None:
+            onFound(java)
+
+    with ThreadPoolExecutor(JAVA_PROBE_THREADS, thread_name_prefix="MCSL2JavaProbe") as pool:
+        futures = []
+        for path in candidates:
+            if isCancelled is not None and isCancelled():
+                break
+            if path not in seen:
+                seen.add(path)
+                # 在探测线程中回调，遍历尚未结束时结果也能及时送出
+                (future := pool.submit(identifyJava, path, _match)).add_done_callback(onProbed)
+                futures.append(future)
+        if isCancelled is not None and isCancelled():
+            for future in futures:
+                future.cancel()
     return rv
 
 
-def searchingFile(path, keyword, ext, fSearch, _match):
-    processes = []
+def searchFile(path, keyword, ext, fSearch, _match, onFound=None):
+    return probeJavaCandidates(
+        searchingFile(path, keyword, ext, fSearch, javaExecutableMatcher()), _match, onFound
+    )
+
+
+def searchingFile(path, keyword, ext, fSearch, _match) -> Iterator[str]:
+    """遍历目录，逐个产出疑似java可执行文件的路径"""
     if fSearch:
         if osp.isfile(path) or "x86_64-linux-gnu" in path:
-            return processes
+            return
         try:
             for File in listdir(path):
                 _Path = osp.join(path, File)
                 if osp.isfile(_Path):
                     if _match(path, File):
-                        process = QProcess()
-                        process.start(_Path, ["-version"])
-                        processes.append(process)
+                        yield _Path
                 elif findStr(File.lower()):
-                    processes.extend(searchingFile(_Path, keyword, ext, fSearch, _match))
+                    yield from searchingFile(_Path, keyword, ext, fSearch, _match)
         except PermissionError:
             pass
         except FileNotFoundError:
             pass
-    return processes
 
 
 def javaVersionMatcher(s):
@@ -160,30 +357,118 @@ def javaVersionMatcher(s):
     return match
 
 
-def detectJava(fSearch=True):
-    javaPathList = []
+def posixJavaRoots(fSearch=True) -> List[Tuple[str, int, bool]]:
+    """
+    按优先级排列的(根目录, 最大深度, 是否按关键词筛选子目录)\n
+    JAVA_HOME与PATH在discoverPosixJava中单独处理
+    """
+    home = osp.expanduser("~")
+    roots = [
+        ("/usr/lib/jvm", 3, False),
+        ("/usr/java", 3, False),
+        (osp.join(home, ".sdkman", "candidates", "java"), 3, False),
+        (osp.join(home, ".jdks"), 3, False),
+        (osp.join(home, ".gradle", "jdks"), 3, False),
+        ("/Library/Java/JavaVirtualMachines", 4, False),
+        (osp.join(home, "Library", "Java", "JavaVirtualMachines"), 4, False),
+        ("/opt", 4, True),
+    ]
+    if fSearch:
+        roots += [
+            ("/usr/local", 4, True),
+            ("/usr/lib", 5, True),
+            (home, 6, True),
+        ]
+    return roots
+
+
+def discoverPosixJava(
+    fSearch=True,
+    roots: Optional[List[Tuple[str, int, bool]]] = None,
+    timeBudget: float = JAVA_DISCOVERY_TIME_BUDGET,
+    isCancelled: Optional[Callable[[], bool]] = None,
+    includeEnvironment: bool = True,
+) -> Iterator[str]:
+    """
+    在JAVA_HOME、PATH和常见安装目录中查找bin/java，逐个产出其真实路径\n
+    用os.scandir遍历并复用目录项自带的类型信息，每个目录只stat一次，
+    以(设备号, inode)记录已进入的目录防止符号链接成环，超出timeBudget秒后停止
+    """
+    deadline = monotonic() + timeBudget
+    yielded = set()
+
+    def candidate(path):
+        realPath = osp.realpath(path)
+        if realPath not in yielded and osp.isfile(realPath):
+            yielded.add(realPath)
+            return realPath
+        return None
+
+    if includeEnvironment:
+        if javaHome := environ.get("JAVA_HOME"):
+            if p := candidate(osp.join(javaHome, "bin", "java")):
+                yield p
+        for binDir in environ.get("PATH", "").split(pathsep):
+            if binDir and (p := candidate(osp.join(binDir, "java"))):
+                yield p
+
+    visited = set()
+    for root, maxDepth, useKeywords in roots if roots is not None else posixJavaRoots(fSearch):
+        queue = deque([(root, 0)])
+        while queue:
+            if monotonic() > deadline:
+                MCSL2Logger.warning(f"查找Java超过{timeBudget}秒，已停止遍历")
+                return
+            if isCancelled is not None and isCancelled():
+                return
+            path, depth = queue.popleft()
+            try:
+                st = stat(path)
+                if (st.st_dev, st.st_ino) in visited:
+                    continue
+                visited.add((st.st_dev, st.st_ino))
+                inBin = osp.basename(path) == "bin"
+                with scandir(path) as it:
+                    for entry in it:
+                        if inBin:
+                            if entry.name == "java" and entry.is_file():
+                                if p := candidate(entry.path):
+                                    yield p
+                            continue
+                        if depth >= maxDepth or not entry.is_dir():
+                            continue
+                        name = entry.name.lower()
+                        if name == "bin" or not useKeywords or findStr(name):
+                            queue.append((entry.path, depth + 1))
+            except OSError:
+                continue
+
+
+def javaCandidatesUnder(path, maxDepth=4) -> Iterator[str]:
+    """只查找path之下的Java，供增量更新使用"""
+    if "windows" in system().lower():
+        return searchingFile(path, "java", "exe", True, javaExecutableMatcher())
+    return discoverPosixJava(roots=[(path, maxDepth, False)], includeEnvironment=False)
+
+
+def detectJava(fSearch=True, onFound=None, isCancelled=None):
     foundJava.clear()
     if "windows" in system().lower():
-        for i in range(65, 91):
-            path = chr(i) + ":\\"
-            if osp.exists(path):
-                javaPathList.extend(searchFile(path, "java", "exe", fSearch, javaVersionMatcher))
+        match = javaExecutableMatcher()
+        roots = [chr(i) + ":\\" for i in range(65, 91) if osp.exists(chr(i) + ":\\")]
+        # 所有盘符共用一个探测线程池
+        candidates = chain.from_iterable(
+            searchingFile(root, "java", "exe", fSearch, match) for root in roots
+        )
     else:
-        javaPathList.extend(searchFile("/usr/lib", "java", "", fSearch, javaVersionMatcher))
-    return javaPathList
+        candidates = discoverPosixJava(fSearch, isCancelled=isCancelled)
+    return probeJavaCandidates(candidates, javaVersionMatcher, onFound, isCancelled)
 
 
 def checkJavaAvailability(java: Java):
-    if osp.exists(java.path):
-        process = QProcess()
-        process.start(java.path, ["-version"])
-        process.waitForFinished()
-        output = process.readAllStandardError().data().decode("utf-8")
-        process.deleteLater()
-        matcher = javaVersionMatcher(output)
-        if matcher == java.version:
-            return True
-    return False
+    """java可执行文件没有变化时只需一次stat"""
+    identified = identifyJava(java.path)
+    return identified is not None and identified.version == java.version
 
 
 def loadJavaList():
@@ -197,17 +482,23 @@ def loadJavaList():
     if osp.exists("MCSL2/AutoDetectJavaHistory.json"):
         remove("MCSL2/AutoDetectJavaHistory.json")
 
-    if not osp.exists("MCSL2/MCSL2_DetectedJava.json"):
+    if not osp.exists(DETECTED_JAVA_PATH):
         return []
-    with open("MCSL2/MCSL2_DetectedJava.json", "r", encoding="utf-8") as f:
+    with open(DETECTED_JAVA_PATH, "r", encoding="utf-8") as f:
         foundedJava = json.load(f)
-        return [Java(e["Path"], e["Version"]) for e in foundedJava["java"]]
+        return [
+            Java(e["Path"], e["Version"], e.get("Vendor", ""), e.get("Arch", ""))
+            for e in foundedJava["java"]
+        ]
 
 
 def saveJavaList(list_: list):
-    with open("MCSL2/MCSL2_DetectedJava.json", "w", encoding="utf-8") as f:
+    with open(DETECTED_JAVA_PATH, "w", encoding="utf-8") as f:
         json.dump(
-            {"java": [j.json for j in list_]},
+            {
+                "java": [j.json for j in list_],
+                "probeCache": javaProbeCache.snapshot(j.path for j in list_),
+            },
             f,
             ensure_ascii=False,
             sort_keys=True,
@@ -248,6 +539,8 @@ def combineJavaList(original: list, list_: list, invaild: ..., check=True):
 
 
 class JavaFindWorkThread(QThread):
+    # 每探测到一个Java发出一次
+    javaFoundSignal = pyqtSignal(object)
     foundJavaSignal = pyqtSignal(list)
     finishSignal = pyqtSignal(int)
 
@@ -265,7 +558,13 @@ class JavaFindWorkThread(QThread):
         self._sequenceNumber = value
 
     def run(self):
-        self.foundJavaSignal.emit(detectJava(self._f))
+        self.foundJavaSignal.emit(
+            detectJava(
+                self._f,
+                onFound=self.javaFoundSignal.emit,
+                isCancelled=self.isInterruptionRequested,
+            )
+        )
         self.finishSignal.emit(self._sequenceNumber)
 
 
@@ -273,6 +572,7 @@ class JavaFindWorkThreadFactory:
     def __init__(self, fSearch=True, parent=None):
         self._finishConnect = None
         self._connect = None
+        self._foundConnect = None
         self._f = fSearch
         self._parent = parent
         self._instanceCounter = 0
@@ -294,6 +594,14 @@ class JavaFindWorkThreadFactory:
     def signalConnect(self, value):
         self._connect = value
 
+    @property
+    def javaFoundSignalConnect(self):
+        return self._foundConnect
+
+    @javaFoundSignalConnect.setter
+    def javaFoundSignalConnect(self, value):
+        self._foundConnect = value
+
     @property
     def finishSignalConnect(self):
         return self._finishConnect
@@ -306,6 +614,8 @@ class JavaFindWorkThreadFactory:
         self._instanceCounter += 1
         thread = JavaFindWorkThread(self._f, self._parent)
         thread.foundJavaSignal.connect(self._connect)
+        if self._foundConnect is not None:
+            thread.javaFoundSignal.connect(self._foundConnect)
         thread.sequenceNumber = self._instanceCounter
         thread.finishSignal.connect(self._finishConnect)
         self._thread = thread
@@ -0,0 +1,171 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Keep the detected Java list fresh by watching Java install roots.
+"""
+
+from os import path as osp
+from platform import system
+from typing import List, Set
+
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QThread, QTimer, pyqtSignal
+
+from MCSL2Lib.ProgramControllers.javaDetector import (
+    Java,
+    checkJavaAvailability,
+    identifyJava,
+    javaCandidatesUnder,
+    javaHomeOf,
+    loadJavaList,
+    posixJavaRoots,
+    saveJavaList,
+    sortJavaList,
+)
+from MCSL2Lib.utils import MCSL2Logger
+
+
+class _JavaInventoryScanThread(QThread):
+    """只扫描发生变化的目录"""
+
+    # (新增的Java, 失效的Java)
+    scanFinished = pyqtSignal(list, list)
+
+    def __init__(self, dirs: Set[str], known: List[Java], parent=None):
+        super().__init__(parent)
+        self.dirs = dirs
+        self.known = known
+
+    def run(self):
+        added, removed = [], []
+        try:
+            for d in self.dirs:
+                for path in javaCandidatesUnder(d):
+                    if (java := identifyJava(path)) is not None and java not in self.known:
+                        added.append(java)
+            prefixes = tuple(osp.join(d, "") for d in self.dirs)
+            removed = [
+                java
+                for java in self.known
+                if java.path.startswith(prefixes) and not checkJavaAvailability(java)
+            ]
+        except Exception as e:
+            MCSL2Logger.error(exc=e, msg="增量更新Java列表失败")
+        self.scanFinished.emit(added, removed)
+
+
+class JavaInventory(QObject):
+    """
+    已检测到的Java列表。\n
+    用QFileSystemWatcher监视各Java安装目录的上级目录与常见的Java根目录，
+    目录变化后（安装或卸载JDK）只扫描发生变化的目录，不需要重新全盘查找。
+    """
+
+    javaAdded = pyqtSignal(object)
+    javaRemoved = pyqtSignal(object)
+
+    def __init__(self, debounce: int = 1500):
+        super().__init__()
+        self._javas: List[Java] = []
+        self._started = False
+        self.pendingDirs: Set[str] = set()
+        self.thread = None
+        self.watcher = None
+        # 安装JDK会在短时间内产生大量变化，合并后再扫描
+        self.updateTimer = QTimer(self)
+        self.updateTimer.setSingleShot(True)
+        self.updateTimer.setInterval(debounce)
+        self.updateTimer.timeout.connect(self.update)
+
+    def _ensureStarted(self):
+        if self._started:
+            return
+        self._started = True
+        try:
+            self._javas = loadJavaList()
+        except (OSError, ValueError, KeyError) as e:
+            MCSL2Logger.error(exc=e, msg="读取Java列表失败")
+            self._javas = []
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.onDirectoryChanged)
+        self.rewatch()
+
+    def javas(self) -> List[Java]:
+        """当前Java列表的副本"""
+        self._ensureStarted()
+        return list(self._javas)
+
+    def setJavas(self, javas: List[Java]):
+        """全盘查找后用其结果替换列表"""
+        self._ensureStarted()
+        self._javas = list(javas)
+        self.rewatch()
+
+    # region 监视
+    def watchRoots(self) -> List[str]:
+        roots = {osp.dirname(javaHomeOf(java.path)) for java in self._javas}
+        if "windows" not in system().lower():
+            roots.update(root for root, _, _ in posixJavaRoots(fSearch=False))
+        return sorted(r for r in roots if r and osp.isdir(r))
+
+    def rewatch(self):
+        roots = set(self.watchRoots())
+        watched = set(self.watcher.directories())
+        if stale := watched - roots:
+            self.watcher.removePaths(list(stale))
+        if new := roots - watched:
+            self.watcher.addPaths(list(new))
+
+    def onDirectoryChanged(self, path: str):
+        self.pendingDirs.add(osp.normpath(path))
+        self.updateTimer.start()
+
+    # endregion
+
+    # region 增量更新
+    def update(self):
+        if not self.pendingDirs:
+            return
+        if self.thread is not None and self.thread.isRunning():
+            self.updateTimer.start()
+            return
+        dirs, self.pendingDirs = self.pendingDirs, set()
+        self.thread = _JavaInventoryScanThread(dirs, list(self._javas), self)
+        self.thread.scanFinished.connect(self.applyChanges)
+        self.thread.start(QThread.LowPriority)
+
+    def applyChanges(self, added: List[Java], removed: List[Java]):
+        changed = False
+        for java in removed:
+            if java in self._javas:
+                self._javas.remove(java)
+                self.javaRemoved.emit(java)
+                MCSL2Logger.info(f"Java已被移除：{java.path}")
+                changed = True
+        for java in added:
+            if java not in self._javas:
+                self._javas.append(java)
+                self.javaAdded.emit(java)
+                MCSL2Logger.info(f"发现新的Java：{java.path} ({java.version})")
+                changed = True
+        if changed:
+            sortJavaList(self._javas)
+            try:
+                saveJavaList(self._javas)
+            except OSError as e:
+                MCSL2Logger.error(exc=e, msg="保存Java列表失败")
+            self.rewatch()
+
+    # endregion
+
+
+javaInventory = JavaInventory()
@@ -0,0 +1,217 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Background latency/throughput prober that ranks the download mirrors.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic, time
+from typing import Dict, Iterable, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from MCSL2Lib.ProgramControllers.coreCatalog import CATALOG_MIRRORS, coreCatalog
+from MCSL2Lib.ProgramControllers.DownloadAPI.AkiraCloud import AKIRA_CLOUD_URL
+from MCSL2Lib.ProgramControllers.DownloadAPI.FastMirrorAPI import FASTMIRROR_API_URL
+from MCSL2Lib.ProgramControllers.DownloadAPI.PolarsAPI import POLARS_API_URL
+from MCSL2Lib.ProgramControllers.networkController import MCSLNetworkSession
+from MCSL2Lib.utils import MCSL2Logger
+
+# 测延迟用的地址
+MIRROR_PROBE_URLS = {
+    "FastMirror": FASTMIRROR_API_URL,
+    "MCSLAPI": "https://file.mcsl.com.cn",
+    "PolarsAPI": POLARS_API_URL,
+    "AkiraCloud": f"{AKIRA_CLOUD_URL}/",
+}
+
+# 测速时分段下载的字节数
+PROBE_SAMPLE_BYTES = 256 * 1024
+# 两轮测速的最短间隔(秒)
+PROBE_INTERVAL = 10 * 60
+# 连续失败达到此次数视为不可用，冷却时间(秒)过后重新参与选择
+UNHEALTHY_FAILURES = 2
+UNHEALTHY_COOLDOWN = 5 * 60
+# 滑动平均中新样本的权重
+_EWMA_ALPHA = 0.3
+# 用户设置的下载源得分打此折扣，相差不大时不为一点波动就换源
+_PREFERRED_BIAS = 0.8
+
+
+class MirrorStats:
+    """一个镜像站的测速结果，延迟与吞吐量均为指数滑动平均"""
+
+    def __init__(self):
+        self.rtt: Optional[float] = None
+        self.throughput: Optional[float] = None
+        self.failures = 0
+        self.lastFailure = 0.0
+        self.lastProbe = 0.0
+
+    @staticmethod
+    def _ewma(old: Optional[float], new: float) -> float:
+        return new if old is None else old + _EWMA_ALPHA * (new - old)
+
+    def recordSample(self, rtt: float, throughput: Optional[float]):
+        self.rtt = self._ewma(self.rtt, rtt)
+        if throughput:
+            self.throughput = self._ewma(self.throughput, throughput)
+        self.failures = 0
+        self.lastProbe = time()
+
+    def recordFailure(self):
+        self.failures += 1
+        self.lastFailure = self.lastProbe = time()
+
+    @property
+    def healthy(self) -> bool:
+        return (
+            self.failures < UNHEALTHY_FAILURES
+            or time() - self.lastFailure > UNHEALTHY_COOLDOWN
+        )
+
+    @property
+    def score(self) -> Optional[float]:
+        """预计下载1MiB所需的秒数，越小越快；还没有测速结果时为None"""
+        if self.rtt is None:
+            return None
+        if not self.throughput:
+            return self.rtt + 1.0
+        return self.rtt + 1048576 / self.throughput
+
+
+class MirrorProber(QObject):
+    """
+    在后台测量各镜像站的延迟(HEAD)与吞吐量(分段GET一小段核心文件)，
+    按滑动平均得分为镜像站排序。\n
+    请求失败的镜像站(包括测速与实际使用时的失败)会暂时排到最后，冷却后重新参与选择。
+    """
+
+    probeFinished = pyqtSignal()
+
+    def __init__(self, mirrors: Iterable[str] = CATALOG_MIRRORS):
+        super().__init__()
+        self.lock = Lock()
+        self.stats: Dict[str, MirrorStats] = {m: MirrorStats() for m in mirrors}
+        self.lastRound = 0.0
+        self.probing = False
+        # 每个镜像站一个线程，再加一个用于等待一轮测速结束
+        self.pool = ThreadPoolExecutor(
+            len(self.stats) + 1, thread_name_prefix="MCSL2MirrorProber"
+        )
+
+    def sampleUrlOf(self, mirror: str) -> Optional[str]:
+        """测吞吐量用的文件：核心目录中该镜像站的任意一个文件"""
+        coreCatalog.ensureLoaded()
+        for entry in coreCatalog.entries:
+            for m, url in entry.urls:
+                if m == mirror:
+                    return url
+        return None
+
+    def probe(self, mirror: str):
+        """测一次，不重试，避免重试掩盖镜像站的真实状况"""
+        with MCSLNetworkSession(timeout=(3, 8)) as session:
+            try:
+                start = monotonic()
+                response = session.head(MIRROR_PROBE_URLS[mirror], allow_redirects=True)
+                rtt = monotonic() - start
+                if response.status_code >= 500:
+                    raise ConnectionError(f"HTTP {response.status_code}")
+                throughput = None
+                if (sampleUrl := self.sampleUrlOf(mirror)) is not None:
+                    start = monotonic()
+                    received = 0
+                    with session.get(
+                        sampleUrl,
+                        headers={"Range": f"bytes=0-{PROBE_SAMPLE_BYTES - 1}"},
+                        stream=True,
+                    ) as r:
+                        r.raise_for_status()
+                        for chunk in r.iter_content(16384):
+                            received += len(chunk)
+                            if received >= PROBE_SAMPLE_BYTES:
+                                break
+                    elapsed = monotonic() - start
+                    throughput = received / elapsed if received and elapsed > 0 else None
+            except Exception as e:
+                MCSL2Logger.warning(f"镜像站{mirror}测速失败：{e}")
+                self.recordFailure(mirror)
+                return
+        with self.lock:
+            self.stats[mirror].recordSample(rtt, throughput)
+
+    def probeAll(self, force: bool = False):
+        """在后台测一轮，距上一轮不足PROBE_INTERVAL时跳过（force除外）"""
+        with self.lock:
+            if self.probing or (not force and time() - self.lastRound < PROBE_INTERVAL):
+                return
+            self.probing = True
+
+        def run():
+            try:
+                list(self.pool.map(self.probe, list(self.stats)))
+            finally:
+                with self.lock:
+                    self.probing = False
+                    self.lastRound = time()
+                self.probeFinished.emit()
+
+        self.pool.submit(run)
+
+    def recordFailure(self, mirror: str):
+        """实际使用时请求失败也要记录，用于故障转移"""
+        with self.lock:
+            if mirror in self.stats:
+                self.stats[mirror].recordFailure()
+
+    def isHealthy(self, mirror: str) -> bool:
+        with self.lock:
+            return mirror not in self.stats or self.stats[mirror].healthy
+
+    def rank(self, mirrors: Iterable[str], preferred: str = "") -> List[str]:
+        """
+        从快到慢排列：可用的在前，其中测过速的按得分，没测过的排在测过的之后；
+        preferred(用户设置的下载源)在相差不大时优先
+        """
+        mirrors = list(dict.fromkeys(mirrors))
+        with self.lock:
+
+            def key(m: str):
+                stats = self.stats.get(m)
+                score = stats.score if stats is not None else None
+                healthy = stats is None or stats.healthy
+                if score is not None and m == preferred:
+                    score *= _PREFERRED_BIAS
+                return (not healthy, score is None, score or 0.0, m != preferred)
+
+            return sorted(mirrors, key=key)
+
+    def best(
+        self, preferred: str = "", exclude: Iterable[str] = (), mirrors: Iterable[str] = ()
+    ) -> Optional[str]:
+        """最快的可用镜像站，都不可用时返回None"""
+        exclude = set(exclude)
+        candidates = [m for m in (mirrors or self.stats) if m not in exclude]
+        ranked = [m for m in self.rank(candidates, preferred) if self.isHealthy(m)]
+        return ranked[0] if ranked else None
+
+    def rankUrls(self, urls: Iterable, preferred: str = "") -> List[str]:
+        """把[(镜像站, 下载地址), ...]按镜像站从快到慢排列，返回地址列表"""
+        urls = list(urls)
+        order = self.rank([m for m, _ in urls], preferred)
+        return [url for _, url in sorted(urls, key=lambda u: order.index(u[0]))]
+
+
+mirrorProber = MirrorProber()
@@ -12,10 +12,15 @@
 ################################################################################
 """
 A modified network session for bypassing system proxies in order to allow MCSL2
-to access the network normally.
+to access the network normally, and a process-wide pooled HTTP client.
 """
 
+from random import uniform
+from threading import local
+
 from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from MCSL2Lib import MCSL2VERSION
 from platform import (
     system as systemType,
@@ -23,6 +28,11 @@ from platform import (
     version as systemVersion,
 )
 
+# (连接超时, 读取超时)，单位秒
+DEFAULT_TIMEOUT = (5, 20)
+# 响应头Retry-After要求等待的最长时间(秒)，超过时按此等待，避免长时间占住下载列表的请求线程
+MAX_RETRY_AFTER = 10
+
 
 class MCSLNetworkSession(Session):
 
@@ -30,8 +40,95 @@ class MCSLNetworkSession(Session):
         "User-Agent": f"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.63 Safari/537.36 Edg/93.0.961.47 MCServerLauncher2/{MCSL2VERSION} ({systemType()} {systemVersion()}; {systemArchitecture()[0]})"  # noqa: E501
     }
 
-    def __init__(self):
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
         super().__init__()
         #: Trust environment settings for proxy configuration, default
         #: authentication and similar.
         self.trust_env = False
+        self.timeout = timeout
+        self.headers.update(self.MCSLNetworkHeaders)
+        self.headers["Accept-Encoding"] = "gzip, deflate"
+
+    def request(self, method, url, **kwargs):
+        # requests默认不设超时，镜像站无响应时会一直卡住
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(method, url, **kwargs)
+
+
+class _JitteredRetry(Retry):
+    """指数退避再加上随机抖动，避免多个请求同时重试；Retry-After最多等待MAX_RETRY_AFTER秒"""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return uniform(0, backoff) + backoff / 2 if backoff > 0 else 0
+
+    def get_retry_after(self, response):
+        retryAfter = super().get_retry_after(response)
+        return None if retryAfter is None else min(retryAfter, MAX_RETRY_AFTER)
+
+
+class MCSLHTTPClient:
+    """
+    全进程共用的HTTP客户端。\n
+    所有线程共用同一个连接池（保持连接，每个主机最多poolMaxSize个连接），
+    每个线程各用一个会话，避免多线程同时修改同一个Session。\n
+    连接失败、超时以及429/5xx响应会按指数退避加抖动重试。
+    """
+
+    def __init__(
+        self,
+        poolConnections: int = 16,
+        poolMaxSize: int = 6,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout=DEFAULT_TIMEOUT,
+    ):
+        self.timeout = timeout
+        self.adapter = HTTPAdapter(
+            pool_connections=poolConnections,
+            pool_maxsize=poolMaxSize,
+            # 连接数达到上限时等待空闲连接，而不是另开一个用完即弃的连接
+            pool_block=True,
+            max_retries=_JitteredRetry(
+                total=retries,
+                connect=retries,
+                read=retries,
+                status=retries,
+                backoff_factor=backoff,
+                status_forcelist=(429, 500, 502, 503, 504),
+                # MCSLAPI的列表请求(alist的fs/list)是POST，同样可以安全地重试
+                allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"},
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            ),
+        )
+        self._local = local()
+
+    def session(self) -> MCSLNetworkSession:
+        """当前线程的会话"""
+        if (s := getattr(self._local, "session", None)) is None:
+            s = MCSLNetworkSession(self.timeout)
+            s.mount("https://", self.adapter)
+            s.mount("http://", self.adapter)
+            self._local.session = s
+        return s
+
+    def request(self, method: str, url: str, **kwargs):
+        return self.session().request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def head(self, url: str, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+    def close(self):
+        """关闭所有池中的连接"""
+        self.adapter.close()
+
+
+httpClient = MCSLHTTPClient()
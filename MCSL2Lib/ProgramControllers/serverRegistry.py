@@ -0,0 +1,247 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+In-memory registry of the global server list (MCSL2/MCSL2_ServerList.json).
+"""
+
+import atexit
+from copy import deepcopy
+from json import JSONDecodeError, dumps, loads
+from os import (
+    O_CREAT,
+    O_EXCL,
+    O_WRONLY,
+    close as osClose,
+    getpid,
+    open as osOpen,
+    remove,
+    replace,
+    write as osWrite,
+)
+from threading import RLock
+from time import monotonic, sleep
+from typing import Dict, List, Optional
+
+import psutil
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from MCSL2Lib.utils import MCSL2Logger
+
+SERVER_LIST_PATH = "MCSL2/MCSL2_ServerList.json"
+
+
+class ServerRegistryError(Exception):
+    pass
+
+
+class _FileLock:
+    """基于O_EXCL锁文件的跨进程锁，持有者进程已退出时视为过期锁"""
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+
+    def _isStale(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                pid = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return False
+        return pid != getpid() and not psutil.pid_exists(pid)
+
+    def __enter__(self):
+        deadline = monotonic() + self.timeout
+        while True:
+            try:
+                fd = osOpen(self.path, O_CREAT | O_EXCL | O_WRONLY)
+                break
+            except FileExistsError:
+                if self._isStale():
+                    try:
+                        remove(self.path)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                if monotonic() > deadline:
+                    raise ServerRegistryError(f"等待文件锁超时：{self.path}")
+                sleep(0.05)
+        try:
+            osWrite(fd, str(getpid()).encode())
+        finally:
+            osClose(fd)
+        return self
+
+    def __exit__(self, *_):
+        try:
+            remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class ServerRegistry(QObject):
+    """
+    全局服务器列表的内存副本。\n
+    只在第一次使用时读取一次文件，之后的查询都走内存；
+    修改后发出变化信号，并在debounce毫秒内合并为一次“临时文件+重命名”的原子写入。\n
+    可在工作线程中调用，信号会排队送到接收者所在的线程。
+    """
+
+    # (索引, 配置)
+    serverAdded = pyqtSignal(int, dict)
+    # (索引, 配置)
+    serverUpdated = pyqtSignal(int, dict)
+    # (索引, 服务器名)
+    serverRemoved = pyqtSignal(int, str)
+    # 列表整体变化（重新加载、顺序改变）
+    serversReset = pyqtSignal()
+    # 任意变化
+    changed = pyqtSignal()
+
+    _saveRequested = pyqtSignal()
+
+    def __init__(self, path: str = SERVER_LIST_PATH, debounce: int = 300):
+        super().__init__()
+        self.path = path
+        self.lock = RLock()
+        self.fileLock = _FileLock(f"{path}.lock")
+        self._servers: List[Dict] = []
+        self._loaded = False
+        self._dirty = False
+        self.saveTimer = QTimer(self)
+        self.saveTimer.setSingleShot(True)
+        self.saveTimer.setInterval(debounce)
+        self.saveTimer.timeout.connect(self.flush)
+        self._saveRequested.connect(self.saveTimer.start)
+        self.changed.connect(self._saveRequested)
+        atexit.register(self.flush)
+
+    # region 读取
+    def load(self):
+        """从文件重新加载，丢弃尚未写入的修改"""
+        with self.lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    servers = loads(f.read())["MCSLServerList"]
+            except FileNotFoundError:
+                servers = []
+            except (JSONDecodeError, KeyError, TypeError) as e:
+                MCSL2Logger.error(exc=e, msg="全局服务器配置文件已损坏")
+                servers = []
+            self._servers = [s for s in servers if isinstance(s, dict)]
+            self._loaded = True
+            self._dirty = False
+        self.serversReset.emit()
+
+    def _ensureLoaded(self):
+        if not self._loaded:
+            with self.lock:
+                if not self._loaded:
+                    self.load()
+
+    def servers(self) -> List[Dict]:
+        """所有服务器配置的副本"""
+        self._ensureLoaded()
+        with self.lock:
+            return deepcopy(self._servers)
+
+    def count(self) -> int:
+        self._ensureLoaded()
+        return len(self._servers)
+
+    def names(self) -> List[str]:
+        self._ensureLoaded()
+        with self.lock:
+            return [s.get("name", "") for s in self._servers]
+
+    def get(self, index: int) -> Dict:
+        self._ensureLoaded()
+        with self.lock:
+            return deepcopy(self._servers[index])
+
+    def indexOf(self, name: str) -> int:
+        """按服务器名查找索引，不存在时返回-1"""
+        self._ensureLoaded()
+        with self.lock:
+            for i, server in enumerate(self._servers):
+                if server.get("name") == name:
+                    return i
+        return -1
+
+    def getByName(self, name: str) -> Optional[Dict]:
+        index = self.indexOf(name)
+        return self.get(index) if index >= 0 else None
+
+    # endregion
+
+    # region 修改
+    def add(self, config: Dict) -> int:
+        """追加服务器，返回其索引"""
+        self._ensureLoaded()
+        with self.lock:
+            self._servers.append(deepcopy(config))
+            index = len(self._servers) - 1
+            self._dirty = True
+        self.serverAdded.emit(index, deepcopy(config))
+        self.changed.emit()
+        return index
+
+    def update(self, index: int, config: Dict):
+        self._ensureLoaded()
+        with self.lock:
+            self._servers[index] = deepcopy(config)
+            self._dirty = True
+        self.serverUpdated.emit(index, deepcopy(config))
+        self.changed.emit()
+
+    def move(self, index: int, newIndex: int):
+        self._ensureLoaded()
+        with self.lock:
+            self._servers.insert(newIndex, self._servers.pop(index))
+            self._dirty = True
+        self.serversReset.emit()
+        self.changed.emit()
+
+    def remove(self, index: int) -> Dict:
+        self._ensureLoaded()
+        with self.lock:
+            config = self._servers.pop(index)
+            self._dirty = True
+        self.serverRemoved.emit(index, config.get("name", ""))
+        self.changed.emit()
+        return config
+
+    # endregion
+
+    # region 写入
+    def flush(self) -> bool:
+        """立即写入尚未保存的修改，返回是否成功"""
+        # 整个写入过程持有内存锁，避免并发写入时旧数据覆盖新数据
+        with self.lock:
+            if not self._dirty:
+                return True
+            tmpPath = f"{self.path}.tmp"
+            try:
+                with self.fileLock:
+                    with open(tmpPath, "w", encoding="utf-8") as f:
+                        f.write(dumps({"MCSLServerList": self._servers}, indent=4))
+                    replace(tmpPath, self.path)
+            except (OSError, ServerRegistryError) as e:
+                MCSL2Logger.error(exc=e, msg="写入全局服务器配置失败")
+                return False
+            self._dirty = False
+            return True
+
+    # endregion
+
+
+serverRegistry = ServerRegistry()
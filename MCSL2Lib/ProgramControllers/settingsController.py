@@ -42,6 +42,25 @@ class Config(QConfig):
     restartServerWhenCrashed = ConfigItem(
         "Server", "restartServerWhenCrashed", False, BoolValidator()
     )
+    # Backup
+    backupKeepSnapshots = RangeConfigItem(
+        "Backup", "backupKeepSnapshots", 24, RangeValidator(1, 1000)
+    )
+    backupArchiveFormat = OptionsConfigItem(
+        "Backup", "backupArchiveFormat", "zip", OptionsValidator(["zip", "tar.zst"])
+    )
+    backupCompressLevel = RangeConfigItem(
+        "Backup", "backupCompressLevel", 6, RangeValidator(1, 9)
+    )
+    # 0表示使用全部CPU核心
+    backupThreads = RangeConfigItem("Backup", "backupThreads", 0, RangeValidator(0, 64))
+    backupLowPriority = ConfigItem("Backup", "backupLowPriority", True, BoolValidator())
+    backupMaxReadSpeed = RangeConfigItem(
+        "Backup", "backupMaxReadSpeed", 0, RangeValidator(0, 2000)
+    )
+    backupPauseWhenLagging = ConfigItem(
+        "Backup", "backupPauseWhenLagging", True, BoolValidator()
+    )
     # Configure server
 
     newServerType = OptionsConfigItem(
@@ -64,6 +83,12 @@ class Config(QConfig):
         "FastMirror",
         OptionsValidator(["FastMirror", "MCSLAPI", "PolarsAPI", "AkiraCloud"]),
     )
+    # 按测速结果自动选择最快的下载源，失败时自动换源
+    autoSelectDownloadSource = ConfigItem(
+        "Download", "autoSelectDownloadSource", False, BoolValidator()
+    )
+    # 启动后空闲时在后台预取下载源的列表
+    idleCatalogPrefetch = ConfigItem("Download", "idleCatalogPrefetch", True, BoolValidator())
     alwaysAskSaveDirectory = ConfigItem(
         "Download", "alwaysAskSaveDirectory", False, BoolValidator()
     )
@@ -79,6 +104,10 @@ class Config(QConfig):
         "ask",
         OptionsValidator(["ask", "overwrite", "stop"]),
     )
+    # 下载列表缓存的有效期(分钟)
+    catalogCacheTTL = RangeConfigItem(
+        "Download", "catalogCacheTTL", 30, RangeValidator(0, 1440)
+    )
 
     # Console
     outputDeEncoding = OptionsConfigItem(
@@ -0,0 +1,531 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Content-addressed, deduplicated incremental backups.
+"""
+
+import hashlib
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from json import dumps, loads
+from os import (
+    makedirs,
+    path as osp,
+    remove,
+    replace,
+    scandir,
+    stat as osStat,
+    utime,
+    getpid,
+    open as osOpen,
+    close as osClose,
+    write as osWrite,
+    O_CREAT,
+    O_EXCL,
+    O_WRONLY,
+    cpu_count,
+)
+from time import time
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import psutil
+
+from MCSL2Lib.ServerControllers.backupThrottle import BackupThrottle, ThrottledReader
+from MCSL2Lib.ServerControllers.regionFile import isRegionFile, readRegionHeader
+
+try:
+    import zstandard
+except ImportError:  # 没有zstandard时退回zlib
+    zstandard = None
+try:
+    from fastcdc.fastcdc_cy import fastcdc_cy
+except ImportError:  # 没有编译好的fastcdc时退回定长分块
+    fastcdc_cy = None
+
+BACKUP_REPOSITORY_ROOT = "MCSL2/Backups"
+
+_CODEC_ZSTD = b"S"
+_CODEC_ZLIB = b"Z"
+# 服务器运行时被独占锁定、且还原时会自动重建的文件
+SKIPPED_FILE_NAMES = {"session.lock"}
+# 定时备份的快照标签前缀，这些快照按GFS策略清理，不受“保留最新N个”影响
+SCHEDULED_LABEL_PREFIX = "scheduled-"
+
+
+class BackupRepositoryError(Exception):
+    pass
+
+
+def isScheduledLabel(label: str) -> bool:
+    return label.startswith(SCHEDULED_LABEL_PREFIX)
+
+
+def isSavesOnlyLabel(label: str) -> bool:
+    return label.endswith("saves")
+
+
+def selectRetainedSnapshots(
+    snapshots: List[Dict], hourly: int, daily: int, weekly: int
+) -> Set[str]:
+    """
+    祖父-父-子(GFS)保留策略：分别保留最近hourly个小时、daily天、weekly周中每个时段最新的快照，
+    最新的快照总是保留。返回需要保留的快照ID。
+    """
+    ordered = sorted(snapshots, key=lambda s: s["time"], reverse=True)
+    retained = {ordered[0]["id"]} if ordered else set()
+    for count, bucketFormat in ((hourly, "%Y%m%d%H"), (daily, "%Y%m%d"), (weekly, "%G%V")):
+        buckets = set()
+        for snapshot in ordered:
+            if len(buckets) >= count:
+                break
+            bucket = datetime.fromtimestamp(snapshot["time"]).strftime(bucketFormat)
+            if bucket not in buckets:
+                buckets.add(bucket)
+                retained.add(snapshot["id"])
+    return retained
+
+
+def walkSources(baseDir: str, sources: List[str]) -> Tuple[List[Tuple[str, object]], List[str]]:
+    """遍历需要备份的路径，返回(文件相对路径, stat结果)列表与目录相对路径列表"""
+    files, dirs = [], []
+    stack = []
+    for source in sources:
+        full = osp.join(baseDir, source)
+        if osp.isdir(full):
+            stack.append(source)
+        elif osp.isfile(full):
+            files.append((source.replace("\\", "/"), osStat(full)))
+    while stack:
+        rel = stack.pop()
+        dirs.append(rel.replace("\\", "/"))
+        with scandir(osp.join(baseDir, rel)) as it:
+            for entry in it:
+                entryRel = f"{rel}/{entry.name}" if rel else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entryRel)
+                elif entry.is_file(follow_symlinks=False) and entry.name not in SKIPPED_FILE_NAMES:
+                    files.append((entryRel.replace("\\", "/"), entry.stat()))
+    return files, dirs
+
+
+class ContentDefinedChunker:
+    """
+    基于FastCDC的内容定义分块器。\n
+    块边界由内容决定，文件中间插入或删除数据只会影响附近的块，其余块仍可复用。\n
+    逐字节的滚动哈希由fastcdc的编译模块完成；没有该模块时退回按平均块长定长切分，
+    区域文件按4KiB扇区整块改写，定长切分同样能复用未变的块。
+    """
+
+    def __init__(
+        self, minSize: int = 16 * 1024, avgSize: int = 64 * 1024, maxSize: int = 256 * 1024
+    ):
+        if not minSize < avgSize < maxSize:
+            raise ValueError("chunk sizes must satisfy minSize < avgSize < maxSize")
+        self.minSize = minSize
+        self.avgSize = avgSize
+        self.maxSize = maxSize
+        self.native = fastcdc_cy is not None
+
+    def _cuts(self, data: bytes) -> Iterator[int]:
+        """依次返回data中各块的结束位置，每个边界只取决于块起点之后maxSize以内的数据"""
+        if self.native:
+            for chunk in fastcdc_cy(data, self.minSize, self.avgSize, self.maxSize):
+                yield chunk.offset + chunk.length
+        else:
+            yield from range(self.avgSize, len(data), self.avgSize)
+            yield len(data)
+
+    def iterChunks(self, stream: BinaryIO, bufferSize: int = 4 * 1024 * 1024) -> Iterator[bytes]:
+        """从二进制流中逐块读取"""
+        buffer = b""
+        eof = False
+        while True:
+            if not eof and len(buffer) < self.maxSize:
+                data = stream.read(bufferSize)
+                if data:
+                    buffer = buffer + data if buffer else data
+                else:
+                    eof = True
+            if not buffer:
+                return
+            pos = 0
+            # 缓冲区里剩余不足一个最大块时需要先补充数据，除非已经读到结尾
+            if eof or len(buffer) >= self.maxSize:
+                for cut in self._cuts(buffer):
+                    yield buffer[pos:cut]
+                    pos = cut
+                    if not eof and len(buffer) - pos < self.maxSize:
+                        break
+            buffer = buffer[pos:]
+
+
+class BackupRepository:
+    """
+    单个服务器的增量备份仓库。\n
+    目录结构：\n
+    MCSL2/Backups/<服务器名>/chunks/<前两位>/<哈希>  压缩后的数据块\n
+    MCSL2/Backups/<服务器名>/snapshots/<快照ID>.json  快照清单
+    """
+
+    def __init__(
+        self, serverName: str, root: str = BACKUP_REPOSITORY_ROOT, compressLevel: int = 3
+    ):
+        self.serverName = serverName
+        self.repoDir = osp.abspath(osp.join(root, serverName))
+        self.chunksDir = osp.join(self.repoDir, "chunks")
+        self.snapshotsDir = osp.join(self.repoDir, "snapshots")
+        self.lockFile = osp.join(self.repoDir, "repo.lock")
+        self.compressLevel = compressLevel
+        self.chunker = ContentDefinedChunker()
+        makedirs(self.chunksDir, exist_ok=True)
+        makedirs(self.snapshotsDir, exist_ok=True)
+
+    # region 锁
+    def _isLockStale(self) -> bool:
+        """锁文件里记录的进程已经不存在(上次备份时程序崩溃或被强制结束)"""
+        try:
+            with open(self.lockFile, "r", encoding="utf-8") as f:
+                pid = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return False
+        return pid != getpid() and not psutil.pid_exists(pid)
+
+    def acquireLock(self):
+        while True:
+            try:
+                fd = osOpen(self.lockFile, O_CREAT | O_EXCL | O_WRONLY)
+                break
+            except FileExistsError:
+                if not self._isLockStale():
+                    raise BackupRepositoryError(f"备份仓库正在被使用：{self.repoDir}")
+                try:
+                    remove(self.lockFile)
+                except FileNotFoundError:
+                    pass
+        try:
+            osWrite(fd, str(getpid()).encode())
+        finally:
+            osClose(fd)
+
+    def releaseLock(self):
+        try:
+            remove(self.lockFile)
+        except FileNotFoundError:
+            pass
+
+    # endregion
+
+    # region 数据块
+    @staticmethod
+    def hashChunk(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+    def chunkPath(self, digest: str) -> str:
+        return osp.join(self.chunksDir, digest[:2], digest)
+
+    def hasChunk(self, digest: str) -> bool:
+        return osp.exists(self.chunkPath(digest))
+
+    def _compress(self, data: bytes) -> bytes:
+        if zstandard is not None:
+            return _CODEC_ZSTD + zstandard.ZstdCompressor(level=self.compressLevel).compress(data)
+        return _CODEC_ZLIB + zlib.compress(data, min(self.compressLevel, 9))
+
+    @staticmethod
+    def _decompress(blob: bytes) -> bytes:
+        codec, payload = blob[:1], blob[1:]
+        if codec == _CODEC_ZSTD:
+            if zstandard is None:
+                raise BackupRepositoryError("此备份使用zstd压缩，但未安装zstandard")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        if codec == _CODEC_ZLIB:
+            return zlib.decompress(payload)
+        raise BackupRepositoryError(f"未知的数据块编码：{codec!r}")
+
+    def writeChunk(self, digest: str, data: bytes) -> int:
+        """写入数据块，返回实际写入的字节数（已存在则为0）"""
+        path = self.chunkPath(digest)
+        if osp.exists(path):
+            return 0
+        makedirs(osp.dirname(path), exist_ok=True)
+        blob = self._compress(data)
+        tmp = f"{path}.{getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        replace(tmp, path)
+        return len(blob)
+
+    def readChunk(self, digest: str) -> bytes:
+        try:
+            with open(self.chunkPath(digest), "rb") as f:
+                data = self._decompress(f.read())
+        except FileNotFoundError:
+            raise BackupRepositoryError(f"数据块丢失：{digest}")
+        if self.hashChunk(data) != digest:
+            raise BackupRepositoryError(f"数据块校验失败：{digest}")
+        return data
+
+    # endregion
+
+    # region 快照
+    def snapshotPath(self, snapshotId: str) -> str:
+        return osp.join(self.snapshotsDir, f"{snapshotId}.json")
+
+    def listSnapshots(self) -> List[Dict]:
+        """列出所有快照（不含文件列表），按时间从旧到新排序"""
+        snapshots = []
+        for entry in scandir(self.snapshotsDir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    manifest = loads(f.read())
+            except (OSError, ValueError):
+                continue
+            manifest.pop("files", None)
+            manifest.pop("dirs", None)
+            snapshots.append(manifest)
+        snapshots.sort(key=lambda s: s["time"])
+        return snapshots
+
+    def loadSnapshot(self, snapshotId: str) -> Dict:
+        try:
+            with open(self.snapshotPath(snapshotId), "r", encoding="utf-8") as f:
+                return loads(f.read())
+        except FileNotFoundError:
+            raise BackupRepositoryError(f"快照不存在：{snapshotId}")
+
+    def latestSnapshot(self) -> Optional[Dict]:
+        snapshots = self.listSnapshots()
+        return self.loadSnapshot(snapshots[-1]["id"]) if snapshots else None
+
+    def _newSnapshotId(self) -> str:
+        base = datetime.now().strftime("%Y%m%d-%H%M%S")
+        snapshotId, n = base, 1
+        while osp.exists(self.snapshotPath(snapshotId)):
+            snapshotId = f"{base}-{n}"
+            n += 1
+        return snapshotId
+
+    def _writeManifest(self, manifest: Dict):
+        path = self.snapshotPath(manifest["id"])
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(dumps(manifest, ensure_ascii=False))
+        replace(tmp, path)
+
+    def createSnapshot(
+        self,
+        baseDir: str,
+        sources: List[str],
+        label: str = "",
+        progress: Optional[Callable[[int, int], None]] = None,
+        isCancelled: Optional[Callable[[], bool]] = None,
+        throttle: Optional[BackupThrottle] = None,
+    ) -> Dict:
+        """
+        为baseDir下的sources创建一个快照。\n
+        与上一个快照相比大小和修改时间都没变的文件直接复用其数据块列表，不再读取。\n
+        区域文件(.mca)即使修改时间变了，只要文件头的区块位置表和时间戳表没变，也直接复用。\n
+        progress(已处理字节数, 总字节数)
+        """
+        self.acquireLock()
+        try:
+            startTime = time()
+            previous = self.latestSnapshot()
+            previousFiles = previous["files"] if previous else {}
+            previousTime = previous["time"] if previous else 0
+            fileList, dirs = walkSources(baseDir, sources)
+            totalBytes = sum(st.st_size for _, st in fileList)
+            doneBytes = 0
+            newChunks = newBytes = storedBytes = reusedFiles = 0
+            skippedRegions = changedRegionChunks = 0
+            files = {}
+            for rel, st in fileList:
+                if isCancelled is not None and isCancelled():
+                    raise BackupRepositoryError("备份已取消")
+                old = previousFiles.get(rel)
+                if old is not None and old["size"] == st.st_size and old["mtime"] == st.st_mtime_ns:
+                    files[rel] = old
+                    reusedFiles += 1
+                    doneBytes += st.st_size
+                    if progress is not None:
+                        progress(doneBytes, totalBytes)
+                    continue
+                full = osp.join(baseDir, rel)
+                header = readRegionHeader(full) if isRegionFile(rel) else None
+                if (
+                    header is not None
+                    and old is not None
+                    and old["size"] == st.st_size
+                    and old.get("header") == header.digest
+                    # 时间戳精确到秒，只有最新区块早于上次备份开始的那一秒才能确定上次已读到最终内容
+                    and header.maxTimestamp < int(previousTime)
+                ):
+                    files[rel] = dict(old, mtime=st.st_mtime_ns)
+                    reusedFiles += 1
+                    skippedRegions += 1
+                else:
+                    chunks = []
+                    with open(full, "rb") as f:
+                        for data in self.chunker.iterChunks(ThrottledReader(f, throttle)):
+                            digest = self.hashChunk(data)
+                            written = self.writeChunk(digest, data)
+                            if written:
+                                newChunks += 1
+                                newBytes += len(data)
+                                storedBytes += written
+                            chunks.append(digest)
+                    files[rel] = {"size": st.st_size, "mtime": st.st_mtime_ns, "chunks": chunks}
+                    if header is not None:
+                        files[rel]["header"] = header.digest
+                        changedRegionChunks += header.changedChunks(previousTime)
+                doneBytes += st.st_size
+                if progress is not None:
+                    progress(doneBytes, totalBytes)
+            manifest = {
+                "id": self._newSnapshotId(),
+                "time": startTime,
+                "server": self.serverName,
+                "label": label,
+                "sources": sources,
+                "stats": {
+                    "files": len(files),
+                    "reusedFiles": reusedFiles,
+                    "skippedRegions": skippedRegions,
+                    "changedRegionChunks": changedRegionChunks,
+                    "totalBytes": totalBytes,
+                    "newChunks": newChunks,
+                    "newBytes": newBytes,
+                    "storedBytes": storedBytes,
+                    "seconds": round(time() - startTime, 3),
+                },
+                "dirs": dirs,
+                "files": files,
+            }
+            self._writeManifest(manifest)
+            return manifest
+        finally:
+            self.releaseLock()
+
+    def extractSnapshot(
+        self,
+        snapshotId: str,
+        targetDir: str,
+        threads: int = 0,
+        progress: Optional[Callable[[int, int], None]] = None,
+        isCancelled: Optional[Callable[[], bool]] = None,
+    ) -> Dict:
+        """多线程将快照还原到targetDir，读取数据块时校验哈希，返回快照清单"""
+        self.acquireLock()
+        try:
+            manifest = self.loadSnapshot(snapshotId)
+            for rel in manifest.get("dirs", []):
+                makedirs(osp.join(targetDir, rel), exist_ok=True)
+            files = manifest["files"]
+            totalBytes = sum(info["size"] for info in files.values())
+            doneBytes = 0
+            with ThreadPoolExecutor(
+                threads if threads > 0 else (cpu_count() or 1),
+                thread_name_prefix="MCSL2Restore",
+            ) as pool:
+                futures = [
+                    pool.submit(self._extractFile, osp.join(targetDir, rel), info, isCancelled)
+                    for rel, info in files.items()
+                ]
+                try:
+                    for future in as_completed(futures):
+                        doneBytes += future.result()
+                        if progress is not None:
+                            progress(doneBytes, totalBytes)
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+            return manifest
+        finally:
+            self.releaseLock()
+
+    def _extractFile(
+        self, dest: str, info: Dict, isCancelled: Optional[Callable[[], bool]]
+    ) -> int:
+        if isCancelled is not None and isCancelled():
+            raise BackupRepositoryError("还原已取消")
+        makedirs(osp.dirname(dest), exist_ok=True)
+        size = 0
+        with open(dest, "wb") as f:
+            for digest in info["chunks"]:
+                data = self.readChunk(digest)
+                size += len(data)
+                f.write(data)
+        if size != info["size"]:
+            raise BackupRepositoryError(f"文件{dest}大小不符：{size} != {info['size']}")
+        utime(dest, ns=(info["mtime"], info["mtime"]))
+        return size
+
+    def deleteSnapshots(self, snapshotIds: List[str]) -> Tuple[int, int]:
+        """删除快照并回收不再被引用的数据块，返回(删除的数据块数, 释放的字节数)"""
+        self.acquireLock()
+        try:
+            for snapshotId in snapshotIds:
+                try:
+                    remove(self.snapshotPath(snapshotId))
+                except FileNotFoundError:
+                    pass
+            return self._collectGarbage()
+        finally:
+            self.releaseLock()
+
+    def pruneSnapshots(self, keepLast: int) -> Tuple[List[str], int, int]:
+        """
+        只保留最新的keepLast个手动快照，返回(删除的快照ID, 删除的数据块数, 释放的字节数)。\n
+        定时备份的快照由pruneScheduledSnapshots清理。
+        """
+        snapshots = [s for s in self.listSnapshots() if not isScheduledLabel(s["label"])]
+        removed = [s["id"] for s in snapshots[: max(len(snapshots) - max(keepLast, 1), 0)]]
+        if not removed:
+            return [], 0, 0
+        removedChunks, freedBytes = self.deleteSnapshots(removed)
+        return removed, removedChunks, freedBytes
+
+    def pruneScheduledSnapshots(
+        self, hourly: int, daily: int, weekly: int
+    ) -> Tuple[List[str], int, int]:
+        """按GFS策略清理定时备份的快照，返回值同pruneSnapshots"""
+        snapshots = [s for s in self.listSnapshots() if isScheduledLabel(s["label"])]
+        retained = selectRetainedSnapshots(snapshots, hourly, daily, weekly)
+        removed = [s["id"] for s in snapshots if s["id"] not in retained]
+        if not removed:
+            return [], 0, 0
+        removedChunks, freedBytes = self.deleteSnapshots(removed)
+        return removed, removedChunks, freedBytes
+
+    def _collectGarbage(self) -> Tuple[int, int]:
+        """标记-清除：删除所有快照都不再引用的数据块"""
+        referenced = set()
+        for snapshot in self.listSnapshots():
+            for info in self.loadSnapshot(snapshot["id"])["files"].values():
+                referenced.update(info["chunks"])
+        removedChunks = freedBytes = 0
+        for prefix in scandir(self.chunksDir):
+            if not prefix.is_dir():
+                continue
+            for entry in scandir(prefix.path):
+                if entry.name not in referenced:
+                    freedBytes += entry.stat().st_size
+                    remove(entry.path)
+                    removedChunks += 1
+        return removedChunks, freedBytes
+
+    # endregion
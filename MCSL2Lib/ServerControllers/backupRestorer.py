@@ -0,0 +1,341 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Restore backup archives into a staging directory and swap them into place.
+"""
+
+import tarfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from os import chmod, cpu_count, listdir, makedirs, path as osp, replace, utime
+from shutil import rmtree
+from threading import Lock, local
+from time import mktime, monotonic
+from typing import BinaryIO, Callable, List, Optional
+
+from MCSL2Lib.ServerControllers.parallelArchiver import formatFromPath
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 还原时的暂存目录与被替换下来的旧目录，均位于Servers/<name>旁边，保证在同一文件系统内可原子重命名
+RESTORE_STAGING_SUFFIX = ".restoring"
+RESTORE_REPLACED_SUFFIX = ".replaced"
+# 只替换部分顶层文件夹（如存档）时，在换下来的旧目录中放置此标记，供中断后恢复时区分
+RESTORE_ENTRIES_MARKER = ".mcsl2-restore-entries"
+
+_BLOCK_SIZE = 1024 * 1024
+# tar流中小于此大小的文件交给线程池写入，更大的直接在读取线程中写入
+_POOLED_FILE_SIZE = 8 * 1024 * 1024
+
+
+class RestoreError(Exception):
+    pass
+
+
+def stagingDirOf(serverDir: str) -> str:
+    return osp.normpath(serverDir) + RESTORE_STAGING_SUFFIX
+
+
+def replacedDirOf(serverDir: str) -> str:
+    return osp.normpath(serverDir) + RESTORE_REPLACED_SUFFIX
+
+
+def _safeJoin(baseDir: str, name: str) -> str:
+    """拒绝绝对路径和“..”，防止压缩包把文件写到目标目录之外"""
+    name = name.replace("\\", "/")
+    base = osp.abspath(baseDir)
+    target = osp.abspath(osp.join(base, name))
+    if osp.isabs(name) or osp.commonpath([base, target]) != base:
+        raise RestoreError(f"压缩包中含有非法路径：{name}")
+    return target
+
+
+class _CountingReader:
+    """统计已读取的压缩数据量，用于tar.zst的进度"""
+
+    def __init__(self, f: BinaryIO, onRead: Callable[[int], None]):
+        self.f = f
+        self.onRead = onRead
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.onRead(len(data))
+        return data
+
+
+class ParallelExtractor:
+    """
+    多线程解压备份压缩包。\n
+    zip：每个线程各自打开压缩包，按中央目录并行解压，读到文件末尾时由zipfile校验CRC；\n
+    tar.zst：按顺序流式解压（zstd校验帧校验和，tar校验文件头），文件写入交给线程池。
+    """
+
+    def __init__(
+        self,
+        threads: int = 0,
+        progress: Optional[Callable[[int, int], None]] = None,
+        isCancelled: Optional[Callable[[], bool]] = None,
+    ):
+        self.threads = threads if threads > 0 else (cpu_count() or 1)
+        self.progress = progress
+        self.isCancelled = isCancelled
+        self.totalBytes = 0
+        self.doneBytes = 0
+        self._progressLock = Lock()
+        self._lastProgressTime = 0.0
+        self._local = local()
+        self._zipHandles: List[zipfile.ZipFile] = []
+
+    def _onRead(self, size: int):
+        with self._progressLock:
+            self.doneBytes += size
+            now = monotonic()
+            if self.progress is None or now - self._lastProgressTime < 0.1:
+                return
+            self._lastProgressTime = now
+        self.progress(self.doneBytes, self.totalBytes)
+
+    def _checkCancelled(self):
+        if self.isCancelled is not None and self.isCancelled():
+            raise RestoreError("还原已取消")
+
+    def extract(self, archivePath: str, targetDir: str) -> List[str]:
+        """将压缩包解压到targetDir，返回压缩包中的顶层文件与文件夹"""
+        self.doneBytes = 0
+        makedirs(targetDir, exist_ok=True)
+        try:
+            if formatFromPath(archivePath) == "zip":
+                topLevel = self._extractZip(archivePath, targetDir)
+            else:
+                topLevel = self._extractTarZst(archivePath, targetDir)
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+            raise RestoreError(f"压缩包已损坏：{e}")
+        except Exception as e:
+            if zstandard is not None and isinstance(e, zstandard.ZstdError):
+                raise RestoreError(f"压缩包已损坏：{e}")
+            raise
+        if self.progress is not None:
+            self.progress(self.doneBytes, self.totalBytes)
+        return topLevel
+
+    # region zip
+    def _zipHandle(self, archivePath: str) -> zipfile.ZipFile:
+        # ZipFile对象不能跨线程共用读取位置，每个线程持有自己的句柄
+        handle = getattr(self._local, "zipFile", None)
+        if handle is None:
+            handle = self._local.zipFile = zipfile.ZipFile(archivePath)
+            with self._progressLock:
+                self._zipHandles.append(handle)
+        return handle
+
+    def _extractZipMember(self, archivePath: str, info: zipfile.ZipInfo, dest: str):
+        self._checkCancelled()
+        makedirs(osp.dirname(dest), exist_ok=True)
+        size = 0
+        with self._zipHandle(archivePath).open(info) as src, open(dest, "wb") as out:
+            while True:
+                self._checkCancelled()
+                block = src.read(_BLOCK_SIZE)
+                if not block:
+                    break
+                out.write(block)
+                size += len(block)
+                self._onRead(len(block))
+        if size != info.file_size:
+            raise RestoreError(f"文件{info.filename}大小不符：{size} != {info.file_size}")
+        self._restoreAttributes(dest, info)
+
+    @staticmethod
+    def _restoreAttributes(dest: str, info: zipfile.ZipInfo):
+        mtime = mktime(info.date_time + (0, 0, -1))
+        utime(dest, (mtime, mtime))
+        mode = (info.external_attr >> 16) & 0o777
+        if info.create_system == 3 and mode:
+            chmod(dest, mode)
+
+    def _extractZip(self, archivePath: str, targetDir: str) -> List[str]:
+        with zipfile.ZipFile(archivePath) as zf:
+            infos = zf.infolist()
+        topLevel = set()
+        files = []
+        for info in infos:
+            dest = _safeJoin(targetDir, info.filename)
+            topLevel.add(info.filename.replace("\\", "/").strip("/").split("/")[0])
+            if info.is_dir():
+                makedirs(dest, exist_ok=True)
+            else:
+                files.append((info, dest))
+        self.totalBytes = sum(info.file_size for info, _ in files)
+        try:
+            with ThreadPoolExecutor(self.threads, thread_name_prefix="MCSL2Restore") as pool:
+                futures = [
+                    pool.submit(self._extractZipMember, archivePath, info, dest)
+                    for info, dest in files
+                ]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            for handle in self._zipHandles:
+                handle.close()
+            self._zipHandles.clear()
+        return sorted(topLevel - {""})
+
+    # endregion
+
+    # region tar.zst
+    @staticmethod
+    def _writeFile(dest: str, data: bytes, member: tarfile.TarInfo):
+        makedirs(osp.dirname(dest), exist_ok=True)
+        with open(dest, "wb") as out:
+            out.write(data)
+        utime(dest, (member.mtime, member.mtime))
+        if member.mode:
+            chmod(dest, member.mode & 0o777)
+
+    def _extractTarZst(self, archivePath: str, targetDir: str) -> List[str]:
+        if zstandard is None:
+            raise RestoreError("还原tar.zst压缩包需要安装zstandard")
+        self.totalBytes = osp.getsize(archivePath)
+        topLevel = set()
+        dirs = []
+        with open(archivePath, "rb") as raw, ThreadPoolExecutor(
+            self.threads, thread_name_prefix="MCSL2Restore"
+        ) as pool:
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                _CountingReader(raw, self._onRead), closefd=False
+            )
+            pending = deque()
+            try:
+                with tarfile.open(fileobj=reader, mode="r|") as tar:
+                    for member in tar:
+                        self._checkCancelled()
+                        dest = _safeJoin(targetDir, member.name)
+                        topLevel.add(member.name.strip("/").split("/")[0])
+                        if member.isdir():
+                            makedirs(dest, exist_ok=True)
+                            dirs.append((dest, member))
+                            continue
+                        if not member.isfile():
+                            # 备份中不会出现链接等特殊文件，忽略以免指向目录之外
+                            continue
+                        src = tar.extractfile(member)
+                        if member.size <= _POOLED_FILE_SIZE:
+                            data = src.read()
+                            if len(data) != member.size:
+                                raise RestoreError(f"文件{member.name}不完整")
+                            pending.append(pool.submit(self._writeFile, dest, data, member))
+                            while len(pending) > self.threads * 2:
+                                pending.popleft().result()
+                            continue
+                        makedirs(osp.dirname(dest), exist_ok=True)
+                        with open(dest, "wb") as out:
+                            while True:
+                                self._checkCancelled()
+                                block = src.read(_BLOCK_SIZE)
+                                if not block:
+                                    break
+                                out.write(block)
+                        utime(dest, (member.mtime, member.mtime))
+                while pending:
+                    pending.popleft().result()
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+        # 文件写入后再设置文件夹的修改时间
+        for dest, member in dirs:
+            utime(dest, (member.mtime, member.mtime))
+        return sorted(topLevel - {""})
+
+    # endregion
+
+
+def recoverInterruptedRestore(serverDir: str):
+    """
+    上次还原在两次重命名之间中断时，把换下来的旧目录或旧存档放回原处，并清理残留的暂存目录。\n
+    只有旧目录中的内容都已放回或已被新内容替代时才删除它。
+    """
+    replacedDir = replacedDirOf(serverDir)
+    stagingDir = stagingDirOf(serverDir)
+    if osp.isdir(replacedDir):
+        if not osp.exists(serverDir):
+            replace(replacedDir, serverDir)
+        elif osp.exists(osp.join(replacedDir, RESTORE_ENTRIES_MARKER)):
+            # 只替换存档时中断：服务器目录中缺失的存档从旧目录放回
+            for entry in listdir(replacedDir):
+                current = osp.join(serverDir, entry)
+                if entry != RESTORE_ENTRIES_MARKER and not osp.exists(current):
+                    replace(osp.join(replacedDir, entry), current)
+            rmtree(replacedDir, ignore_errors=True)
+        elif osp.exists(stagingDir):
+            # 替换整个目录时暂存目录还在，说明新目录没有放到位，无法确定哪一份可以删除
+            raise RestoreError(f"上次还原没有完成，请手动检查{serverDir}与{replacedDir}")
+        else:
+            # 新目录已放到位，只是没来得及删除旧目录
+            rmtree(replacedDir, ignore_errors=True)
+    rmtree(stagingDir, ignore_errors=True)
+
+
+def swapIntoPlace(serverDir: str, stagingDir: str, entries: Optional[List[str]] = None):
+    """
+    用暂存目录替换服务器目录。\n
+    entries为None时替换整个服务器目录，否则只替换serverDir下的这些顶层文件夹（如存档）。\n
+    每一步都是同一文件系统内的重命名，失败时回滚已替换的部分。
+    """
+    replacedDir = replacedDirOf(serverDir)
+    # 旧目录只能由recoverInterruptedRestore清理，这里不能直接删除
+    if osp.exists(replacedDir):
+        raise RestoreError(f"上次还原没有完成，请手动检查{replacedDir}")
+    if entries is None:
+        hadOld = osp.exists(serverDir)
+        if hadOld:
+            replace(serverDir, replacedDir)
+        try:
+            replace(stagingDir, serverDir)
+        except BaseException:
+            if hadOld:
+                replace(replacedDir, serverDir)
+            raise
+    else:
+        makedirs(replacedDir)
+        open(osp.join(replacedDir, RESTORE_ENTRIES_MARKER), "wb").close()
+        swapped = []
+        try:
+            for entry in entries:
+                current = osp.join(serverDir, entry)
+                staged = osp.join(stagingDir, entry)
+                hadOld = osp.exists(current)
+                if hadOld:
+                    replace(current, osp.join(replacedDir, entry))
+                swapped.append((entry, hadOld))
+                replace(staged, current)
+        except BaseException:
+            for entry, hadOld in reversed(swapped):
+                current = osp.join(serverDir, entry)
+                staged = osp.join(stagingDir, entry)
+                if not osp.exists(staged) and osp.exists(current):
+                    replace(current, staged)
+                if hadOld:
+                    replace(osp.join(replacedDir, entry), current)
+            raise
+        rmtree(stagingDir, ignore_errors=True)
+    rmtree(replacedDir, ignore_errors=True)
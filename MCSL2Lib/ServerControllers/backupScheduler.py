@@ -0,0 +1,171 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Per-server scheduled incremental backups with GFS retention.
+"""
+
+from json import JSONDecodeError, dumps, loads
+from os import makedirs, path as osp, replace
+from time import time
+from typing import Callable, Dict, Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from MCSL2Lib.ServerControllers.backupRepository import BACKUP_REPOSITORY_ROOT
+from MCSL2Lib.ServerControllers.processCreator import _ServerProcessBridge
+from MCSL2Lib.ServerControllers.serverUtils import incrementalBackup
+from MCSL2Lib.utils import MCSL2Logger
+from MCSL2Lib.variables import ServerVariables
+
+DEFAULT_BACKUP_SCHEDULE = {
+    "enabled": False,
+    "intervalMinutes": 60,
+    "savesOnly": True,
+    "skipWhenIdle": True,
+    "keepHourly": 24,
+    "keepDaily": 7,
+    "keepWeekly": 4,
+    # 以下由调度器维护
+    "lastRunTime": 0.0,
+    "lastBackupTime": 0.0,
+    "lastActivityTime": 0.0,
+}
+
+
+def _validScheduleItems(schedule: Dict) -> Dict:
+    """丢弃未知的键和类型不符的值"""
+    valid = {}
+    for k, v in schedule.items():
+        if k not in DEFAULT_BACKUP_SCHEDULE:
+            continue
+        expected = (int, float) if k.startswith("last") else type(DEFAULT_BACKUP_SCHEDULE[k])
+        if isinstance(v, expected):
+            valid[k] = v
+    return valid
+
+
+def backupSchedulePath(serverName: str) -> str:
+    return osp.join(BACKUP_REPOSITORY_ROOT, serverName, "schedule.json")
+
+
+def loadBackupSchedule(serverName: str) -> Dict:
+    schedule = dict(DEFAULT_BACKUP_SCHEDULE)
+    try:
+        with open(backupSchedulePath(serverName), "r", encoding="utf-8") as f:
+            saved = loads(f.read())
+    except (FileNotFoundError, JSONDecodeError):
+        return schedule
+    if isinstance(saved, dict):
+        schedule.update(_validScheduleItems(saved))
+    return schedule
+
+
+def saveBackupSchedule(serverName: str, schedule: Dict):
+    path = backupSchedulePath(serverName)
+    makedirs(osp.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write(dumps(schedule, indent=4))
+    replace(f"{path}.tmp", path)
+
+
+class BackupScheduler(QObject):
+    """
+    定时增量备份。\n
+    每分钟检查一次是否到期；自上次备份以来没有玩家上线时跳过本次备份；
+    旧快照在备份线程中按GFS策略清理。
+    """
+
+    scheduleChanged = pyqtSignal()
+    backupSkipped = pyqtSignal(str)
+
+    def __init__(
+        self,
+        serverConfig: ServerVariables,
+        bridgeGetter: Callable[[], Optional[_ServerProcessBridge]],
+        onlinePlayers: Callable[[], int],
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.serverConfig = serverConfig
+        self.bridgeGetter = bridgeGetter
+        self.onlinePlayers = onlinePlayers
+        self.schedule = loadBackupSchedule(serverConfig.serverName)
+        self.thread = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(60000)
+        self.timer.timeout.connect(self.check)
+        if self.schedule["enabled"]:
+            self.timer.start()
+
+    def setSchedule(self, schedule: Dict):
+        self.schedule.update(_validScheduleItems(schedule))
+        self.save()
+        if self.schedule["enabled"]:
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def save(self):
+        try:
+            saveBackupSchedule(self.serverConfig.serverName, self.schedule)
+        except OSError as e:
+            MCSL2Logger.error(exc=e, msg="保存定时备份设置失败")
+        self.scheduleChanged.emit()
+
+    def markPlayerActivity(self):
+        """玩家登录时调用"""
+        self.schedule["lastActivityTime"] = time()
+        self.save()
+
+    def nextRunTime(self) -> float:
+        return self.schedule["lastRunTime"] + self.schedule["intervalMinutes"] * 60
+
+    def isIdle(self) -> bool:
+        """自上次备份以来没有玩家在线过"""
+        return (
+            self.onlinePlayers() == 0
+            and self.schedule["lastActivityTime"] <= self.schedule["lastBackupTime"]
+        )
+
+    def check(self):
+        if self.schedule["enabled"] and time() >= self.nextRunTime():
+            self.runNow(force=False)
+
+    def runNow(self, force: bool = True):
+        if self.thread is not None and self.thread.isRunning():
+            return
+        startTime = time()
+        self.schedule["lastRunTime"] = startTime
+        if not force and self.schedule["skipWhenIdle"] and self.isIdle():
+            self.save()
+            self.backupSkipped.emit("自上次备份以来没有玩家上线，跳过本次定时备份")
+            MCSL2Logger.info(f"服务器“{self.serverConfig.serverName}”无玩家活动，跳过定时备份")
+            return
+        self.save()
+        self.thread = incrementalBackup(
+            self.serverConfig,
+            self.parent(),
+            savesOnly=self.schedule["savesOnly"],
+            bridge=self.bridgeGetter(),
+            retention=(
+                self.schedule["keepHourly"],
+                self.schedule["keepDaily"],
+                self.schedule["keepWeekly"],
+            ),
+        )
+        self.thread.successSignal.connect(lambda _: self.onBackupFinished(startTime))
+
+    def onBackupFinished(self, startTime: float):
+        # 备份期间的玩家活动算作下一次备份的变化
+        self.schedule["lastBackupTime"] = startTime
+        self.save()
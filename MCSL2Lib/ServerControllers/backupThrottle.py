@@ -0,0 +1,147 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Throttle backup I/O so that the running server keeps its tick rate.
+"""
+
+import os
+import sys
+import threading
+from threading import Lock
+from time import monotonic, sleep
+from typing import BinaryIO, Callable, Dict, Optional
+
+import psutil
+
+# 服务器报告“Can't keep up!”后暂停备份的时长
+LAG_PAUSE_SECONDS = 5.0
+# Windows: THREAD_MODE_BACKGROUND_BEGIN，同时降低线程的CPU与I/O优先级
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
+
+class BackupThrottle:
+    """
+    备份限速器，可被多个工作线程共享。\n
+    1.降低工作线程的CPU与I/O优先级\n
+    2.限制读取速度(字节/秒)\n
+    3.服务器卡顿时暂停备份
+    """
+
+    def __init__(
+        self,
+        maxBytesPerSecond: int = 0,
+        lowPriority: bool = True,
+        isCancelled: Optional[Callable[[], bool]] = None,
+    ):
+        self.rate = maxBytesPerSecond
+        self.lowPriority = lowPriority
+        self.isCancelled = isCancelled
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """开始新一轮备份前清空统计"""
+        self.startTime = monotonic()
+        self.bytesRead = 0
+        self.nextFreeTime = 0.0
+        self.pausedUntil = 0.0
+        self.pausedSeconds = 0.0
+        self.rateLimitedSeconds = 0.0
+
+    def enterWorker(self) -> bool:
+        """在工作线程开始时调用，降低当前线程的优先级，返回是否成功"""
+        if not self.lowPriority:
+            return False
+        try:
+            if sys.platform == "win32":
+                import ctypes
+
+                kernel32 = ctypes.windll.kernel32
+                kernel32.SetThreadPriority(
+                    kernel32.GetCurrentThread(), _THREAD_MODE_BACKGROUND_BEGIN
+                )
+            elif sys.platform.startswith("linux"):
+                # Linux上nice与ionice都是按线程生效的
+                tid = threading.get_native_id()
+                os.setpriority(os.PRIO_PROCESS, tid, 19)
+                psutil.Process(tid).ionice(psutil.IOPRIO_CLASS_IDLE)
+            else:
+                return False
+        except (OSError, AttributeError, psutil.Error):
+            return False
+        return True
+
+    def pause(self, seconds: float = LAG_PAUSE_SECONDS):
+        """暂停备份seconds秒，重复调用会顺延"""
+        with self.lock:
+            now = monotonic()
+            until = now + seconds
+            if until > self.pausedUntil:
+                self.pausedSeconds += until - max(now, self.pausedUntil)
+                self.pausedUntil = until
+
+    def _sleep(self, seconds: float):
+        end = monotonic() + seconds
+        while True:
+            remaining = end - monotonic()
+            if remaining <= 0 or (self.isCancelled is not None and self.isCancelled()):
+                return
+            sleep(min(remaining, 0.2))
+
+    def consume(self, size: int):
+        """读取size字节后调用，必要时阻塞当前线程"""
+        while True:
+            with self.lock:
+                pausedFor = self.pausedUntil - monotonic()
+            if pausedFor <= 0:
+                break
+            self._sleep(pausedFor)
+            if self.isCancelled is not None and self.isCancelled():
+                return
+        with self.lock:
+            self.bytesRead += size
+            if not self.rate:
+                return
+            now = monotonic()
+            # 虚拟调度：每次读取在共享时间线上预约size/rate秒
+            start = max(self.nextFreeTime, now)
+            self.nextFreeTime = start + size / self.rate
+            wait = start - now
+        if wait > 0:
+            self._sleep(wait)
+            with self.lock:
+                self.rateLimitedSeconds += wait
+
+    def report(self) -> Dict:
+        elapsed = max(monotonic() - self.startTime, 1e-6)
+        return {
+            "bytesRead": self.bytesRead,
+            "seconds": round(elapsed, 3),
+            "throughput": self.bytesRead / elapsed,
+            "pausedSeconds": round(self.pausedSeconds, 3),
+            "rateLimitedSeconds": round(self.rateLimitedSeconds, 3),
+        }
+
+
+class ThrottledReader:
+    """读取时经过限速器的文件包装"""
+
+    def __init__(self, f: BinaryIO, throttle: Optional[BackupThrottle]):
+        self.f = f
+        self.throttle = throttle
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        if self.throttle is not None:
+            self.throttle.consume(len(data))
+        return data
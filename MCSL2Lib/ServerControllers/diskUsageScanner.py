@@ -0,0 +1,252 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Background disk usage and file count scanner for server directories.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from json import JSONDecodeError, dumps, loads
+from os import cpu_count, makedirs, path as osp, replace, scandir, stat
+from threading import Lock
+from time import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from MCSL2Lib.ServerControllers.backupRepository import BACKUP_REPOSITORY_ROOT
+from MCSL2Lib.utils import MCSL2Logger
+
+DISK_USAGE_CACHE_PATH = "MCSL2/MCSL2_DiskUsageCache.json"
+DISK_USAGE_CATEGORIES = ("world", "logs", "mods", "libraries", "backups", "other")
+
+# 服务器目录下的顶层文件夹 -> 分类，含有level.dat的文件夹算作存档
+_CATEGORY_OF_DIR = {
+    "logs": "logs",
+    "crash-reports": "logs",
+    "debug": "logs",
+    "mods": "mods",
+    "plugins": "mods",
+    "libraries": "libraries",
+    "versions": "libraries",
+    "cache": "libraries",
+    ".fabric": "libraries",
+}
+
+# 目录的修改时间只反映直接子项的增删，不反映文件内容的变化（如区块文件原地变大），
+# 超过此时间(秒)的缓存条目即使修改时间没变也重新列出
+CACHE_MAX_AGE = 3600
+
+# 缓存条目：[目录修改时间(ns), 直接子文件总大小, 直接子文件数, 子文件夹名, 扫描时间]
+_MTIME, _BYTES, _FILES, _SUBDIRS, _SCANNED_AT = range(5)
+
+
+class DiskUsageScanner:
+    """
+    统计服务器目录的磁盘占用，按存档/日志/模组/库/备份/其他分类。\n
+    每个文件夹的统计结果按其修改时间缓存，重新扫描时修改时间没变的文件夹不再列出，
+    只需对子文件夹逐个stat，因此只会深入有变化的子树。\n
+    各顶层文件夹交给线程池并行扫描。
+    """
+
+    def __init__(
+        self,
+        cachePath: str = DISK_USAGE_CACHE_PATH,
+        threads: int = 0,
+        maxAge: float = CACHE_MAX_AGE,
+    ):
+        self.cachePath = cachePath
+        self.threads = threads if threads > 0 else min(8, cpu_count() or 1)
+        self.maxAge = maxAge
+        self.lock = Lock()
+        self.cache: Dict[str, list] = {}
+        self._seen: Set[str] = set()
+        # 上一次扫描中重新列出与复用缓存的文件夹数
+        self.listedDirs = 0
+        self.reusedDirs = 0
+        self.loadCache()
+
+    # region 缓存
+    def loadCache(self):
+        try:
+            with open(self.cachePath, "r", encoding="utf-8") as f:
+                cache = loads(f.read())
+        except (FileNotFoundError, JSONDecodeError):
+            return
+        if isinstance(cache, dict):
+            self.cache = {
+                k: v for k, v in cache.items() if isinstance(v, list) and len(v) == 5
+            }
+
+    def saveCache(self):
+        makedirs(osp.dirname(self.cachePath) or ".", exist_ok=True)
+        with self.lock:
+            data = dumps(self.cache, separators=(",", ":"))
+        with open(f"{self.cachePath}.tmp", "w", encoding="utf-8") as f:
+            f.write(data)
+        replace(f"{self.cachePath}.tmp", self.cachePath)
+
+    # endregion
+
+    def _listDir(self, path: str, mtime: int) -> list:
+        size = files = 0
+        subdirs = []
+        with scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.is_file(follow_symlinks=False):
+                        size += entry.stat(follow_symlinks=False).st_size
+                        files += 1
+                except OSError:
+                    continue
+        return [mtime, size, files, subdirs, time()]
+
+    def scanTree(
+        self, root: str, isCancelled: Optional[Callable[[], bool]] = None
+    ) -> Tuple[int, int]:
+        """统计root下所有文件的(总大小, 文件数)，不跟随符号链接"""
+        totalSize = totalFiles = 0
+        listed = reused = 0
+        now = time()
+        stack = [root]
+        while stack:
+            if isCancelled is not None and isCancelled():
+                break
+            path = stack.pop()
+            try:
+                mtime = stat(path, follow_symlinks=False).st_mtime_ns
+                with self.lock:
+                    node = self.cache.get(path)
+                if (
+                    node is None
+                    or node[_MTIME] != mtime
+                    or now - node[_SCANNED_AT] > self.maxAge
+                ):
+                    node = self._listDir(path, mtime)
+                    listed += 1
+                else:
+                    reused += 1
+            except OSError:
+                continue
+            with self.lock:
+                self.cache[path] = node
+                self._seen.add(path)
+            totalSize += node[_BYTES]
+            totalFiles += node[_FILES]
+            stack.extend(osp.join(path, d) for d in node[_SUBDIRS])
+        with self.lock:
+            self.listedDirs += listed
+            self.reusedDirs += reused
+        return totalSize, totalFiles
+
+    @staticmethod
+    def categoryOf(path: str, name: str) -> str:
+        if osp.isfile(osp.join(path, "level.dat")):
+            return "world"
+        return _CATEGORY_OF_DIR.get(name.lower(), "other")
+
+    def scanServer(
+        self,
+        serverName: str,
+        pool: ThreadPoolExecutor,
+        isCancelled: Optional[Callable[[], bool]] = None,
+    ) -> Dict[str, int]:
+        """
+        返回各分类的占用字节数，以及total(总字节数)与files(总文件数)。\n
+        顶层的零散文件计入other。
+        """
+        usage = dict.fromkeys(DISK_USAGE_CATEGORIES, 0)
+        usage["files"] = 0
+        futures = []
+        serverDir = osp.join("Servers", serverName)
+        try:
+            with scandir(serverDir) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            futures.append((
+                                self.categoryOf(entry.path, entry.name),
+                                pool.submit(self.scanTree, entry.path, isCancelled),
+                            ))
+                        elif entry.is_file(follow_symlinks=False):
+                            usage["other"] += entry.stat(follow_symlinks=False).st_size
+                            usage["files"] += 1
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        futures.append((
+            "backups",
+            pool.submit(self.scanTree, osp.join(BACKUP_REPOSITORY_ROOT, serverName), isCancelled),
+        ))
+        for category, future in futures:
+            size, files = future.result()
+            usage[category] += size
+            usage["files"] += files
+        usage["total"] = sum(usage[c] for c in DISK_USAGE_CATEGORIES)
+        return usage
+
+    def scan(
+        self,
+        serverNames: List[str],
+        onResult: Optional[Callable[[str, Dict], None]] = None,
+        isCancelled: Optional[Callable[[], bool]] = None,
+        prune: bool = True,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        依次统计各服务器，每统计完一个就调用onResult。\n
+        prune为True时，扫描结束后丢弃本次没有经过的缓存条目（已删除的服务器、文件夹）。
+        """
+        self.listedDirs = self.reusedDirs = 0
+        self._seen = set()
+        results = {}
+        with ThreadPoolExecutor(self.threads, thread_name_prefix="MCSL2DiskUsage") as pool:
+            for name in serverNames:
+                usage = self.scanServer(name, pool, isCancelled)
+                # 取消时丢弃不完整的结果，也不清理缓存
+                if isCancelled is not None and isCancelled():
+                    return results
+                results[name] = usage
+                if onResult is not None:
+                    onResult(name, results[name])
+        if prune:
+            with self.lock:
+                self.cache = {k: v for k, v in self.cache.items() if k in self._seen}
+        try:
+            self.saveCache()
+        except OSError as e:
+            MCSL2Logger.error(exc=e, msg="保存磁盘占用缓存失败")
+        return results
+
+
+class DiskUsageScanThread(QThread):
+    """在后台统计服务器的磁盘占用，每统计完一个服务器发出一次usageReady"""
+
+    # (服务器名, 占用)
+    usageReady = pyqtSignal(str, dict)
+
+    def __init__(self, scanner: DiskUsageScanner, serverNames: List[str], parent=None):
+        super().__init__(parent)
+        self.scanner = scanner
+        self.serverNames = serverNames
+
+    def run(self):
+        try:
+            self.scanner.scan(
+                self.serverNames,
+                onResult=self.usageReady.emit,
+                isCancelled=self.isInterruptionRequested,
+            )
+        except Exception as e:
+            MCSL2Logger.error(exc=e, msg="统计服务器磁盘占用失败")
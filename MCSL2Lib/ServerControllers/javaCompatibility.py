@@ -0,0 +1,222 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Work out which Java a server jar needs and match it against the detected Javas.
+"""
+
+import re
+from json import JSONDecodeError, loads
+from os import path as osp, stat
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+from zipfile import BadZipFile, ZipFile
+
+from MCSL2Lib.ProgramControllers.javaDetector import Java, identifyJava
+
+# class文件主版本号与Java版本相差44（52 -> Java 8）
+_CLASS_MAJOR_OFFSET = 44
+_CLASS_MAGIC = b"\xca\xfe\xba\xbe"
+
+# (最低MC版本, 需要的最低Java)，从新到旧排列
+_MC_JAVA_MINIMUM = (
+    ((1, 20, 5), 21),
+    ((1, 18, 0), 17),
+    ((1, 17, 0), 16),
+    ((0, 0, 0), 8),
+)
+
+# 1.13之前的Forge只能在Java 8上运行
+_LEGACY_FORGE_MC_VERSION = (1, 13, 0)
+
+_MC_VERSION_PATTERN = re.compile(r"(?<![\d.])1\.(\d+)(?:\.(\d+))?(?![\d.])")
+
+
+class JavaRequirement:
+    """服务器对Java主版本号的要求，maximum为None表示没有上限"""
+
+    def __init__(self, minimum: int = 8, maximum: Optional[int] = None, source: str = ""):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.source = source
+
+    def accepts(self, major: int) -> bool:
+        return major >= self.minimum and (self.maximum is None or major <= self.maximum)
+
+    def merge(self, other: Optional["JavaRequirement"]) -> "JavaRequirement":
+        """需要同时满足两个要求"""
+        if other is None:
+            return self
+        maxima = [m for m in (self.maximum, other.maximum) if m is not None]
+        return JavaRequirement(
+            max(self.minimum, other.minimum),
+            min(maxima) if maxima else None,
+            "、".join(dict.fromkeys(s for s in f"{self.source}、{other.source}".split("、") if s)),
+        )
+
+    def __str__(self):
+        if self.maximum is None:
+            return f"Java {self.minimum}及以上"
+        if self.maximum == self.minimum:
+            return f"Java {self.minimum}"
+        return f"Java {self.minimum}~{self.maximum}"
+
+
+def javaMajorVersion(version: str) -> int:
+    """Java版本号 -> 主版本号，如1.8.0_392 -> 8，17.0.9 -> 17，无法识别时返回0"""
+    parts = re.findall(r"\d+", str(version))
+    if not parts:
+        return 0
+    if parts[0] == "1" and len(parts) > 1:
+        return int(parts[1])
+    return int(parts[0])
+
+
+def parseMCVersion(text: str) -> Optional[Tuple[int, int, int]]:
+    """从文本中找出形如1.20.4的MC版本号"""
+    if not text or not (m := _MC_VERSION_PATTERN.search(str(text))):
+        return None
+    return 1, int(m.group(1)), int(m.group(2) or 0)
+
+
+def mcVersionRequirement(mcVersion: str, serverType: str = "") -> Optional[JavaRequirement]:
+    """按MC版本推断Java要求"""
+    if (version := parseMCVersion(mcVersion)) is None:
+        return None
+    minimum = next(java for since, java in _MC_JAVA_MINIMUM if version >= since)
+    maximum = 8 if "forge" in serverType.lower() and version < _LEGACY_FORGE_MC_VERSION else None
+    return JavaRequirement(minimum, maximum, f"MC {'.'.join(map(str, version))}")
+
+
+def _classFileJava(data: bytes) -> int:
+    if len(data) < 8 or data[:4] != _CLASS_MAGIC:
+        return 0
+    return int.from_bytes(data[6:8], "big") - _CLASS_MAJOR_OFFSET
+
+
+def _readManifest(jar: ZipFile) -> Dict[str, str]:
+    try:
+        text = jar.read("META-INF/MANIFEST.MF").decode("utf-8", "replace")
+    except KeyError:
+        return {}
+    # 续行以一个空格开头
+    text = text.replace("\r\n", "\n").replace("\n ", "")
+    manifest = {}
+    for line in text.split("\n"):
+        key, sep, value = line.partition(":")
+        if sep:
+            manifest[key.strip()] = value.strip()
+    return manifest
+
+
+def _inspectJar(jarPath: str) -> Optional[JavaRequirement]:
+    requirement = None
+    with ZipFile(jarPath) as jar:
+        names = set(jar.namelist())
+
+        # 主类的class文件版本就是运行它所需的最低Java
+        mainClass = _readManifest(jar).get("Main-Class", "")
+        if (classPath := mainClass.replace(".", "/") + ".class") in names:
+            with jar.open(classPath) as f:
+                if (java := _classFileJava(f.read(8))) > 0:
+                    requirement = JavaRequirement(java, source="主类")
+
+        # 原版与Paper等核心自带的version.json
+        if "version.json" in names:
+            try:
+                info = loads(jar.read("version.json"))
+            except (JSONDecodeError, UnicodeDecodeError):
+                info = {}
+            if isinstance(info, dict):
+                java = info.get("java_version") or (info.get("javaVersion") or {}).get(
+                    "majorVersion"
+                )
+                if isinstance(java, int) and java > 0:
+                    requirement = JavaRequirement(java, source="version.json").merge(requirement)
+                if (byId := mcVersionRequirement(str(info.get("id", "")))) is not None:
+                    requirement = byId.merge(requirement)
+
+        # Fabric服务端启动器
+        if "install.properties" in names:
+            for line in jar.read("install.properties").decode("utf-8", "replace").splitlines():
+                key, _, value = line.partition("=")
+                if key.strip() == "game-version" and (
+                    byGame := mcVersionRequirement(value.strip(), "fabric")
+                ) is not None:
+                    requirement = byGame.merge(requirement)
+    return requirement
+
+
+class _JarRequirementCache:
+    """按(路径, 大小, 修改时间)缓存核心的Java要求，避免每次启动都打开jar"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.entries: Dict[str, Tuple[Tuple[int, int], Optional[JavaRequirement]]] = {}
+
+    def get(self, jarPath: str) -> Optional[JavaRequirement]:
+        try:
+            st = stat(jarPath)
+        except OSError:
+            return None
+        key = (st.st_size, st.st_mtime_ns)
+        with self.lock:
+            if (entry := self.entries.get(jarPath)) is not None and entry[0] == key:
+                return entry[1]
+        try:
+            requirement = _inspectJar(jarPath)
+        except (OSError, BadZipFile, KeyError, RuntimeError):
+            requirement = None
+        with self.lock:
+            self.entries[jarPath] = (key, requirement)
+        return requirement
+
+
+jarRequirementCache = _JarRequirementCache()
+
+
+def readJarRequirement(jarPath: str) -> Optional[JavaRequirement]:
+    """读取核心jar的Java要求，不是有效的jar时返回None"""
+    return jarRequirementCache.get(jarPath)
+
+
+def serverJavaRequirement(
+    corePath: str, serverType: str = "", extraData: Optional[Dict] = None
+) -> Optional[JavaRequirement]:
+    """
+    综合核心jar、服务器类型与MC版本得出Java要求，什么都推断不出时返回None\n
+    MC版本依次取extra_data中的mc_version与核心文件名
+    """
+    requirement = readJarRequirement(corePath)
+    coreFileName = osp.basename(corePath.replace("\\", "/"))
+    mcVersion = (extraData or {}).get("mc_version") or coreFileName
+    # 手动添加的核心没有服务器类型，用文件名判断是否为Forge
+    byVersion = mcVersionRequirement(str(mcVersion), f"{serverType or ''} {coreFileName}")
+    if byVersion is not None:
+        requirement = byVersion.merge(requirement)
+    return requirement
+
+
+def findJava(path: str, javas: Iterable[Java]) -> Optional[Java]:
+    """在已检测到的Java中查找，找不到时才识别该路径"""
+    for java in javas:
+        if java.path == path:
+            return java
+    return identifyJava(path) if path else None
+
+
+def pickCompatibleJava(requirement: JavaRequirement, javas: Iterable[Java]) -> Optional[Java]:
+    """选出满足要求的Java，优先选主版本号最低的（与核心编译目标最接近，兼容性最好）"""
+    compatible = [j for j in javas if requirement.accepts(javaMajorVersion(j.version))]
+    if not compatible:
+        return None
+    return min(compatible, key=lambda j: (javaMajorVersion(j.version), j.path))
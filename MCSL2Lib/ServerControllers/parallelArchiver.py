@@ -0,0 +1,381 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Multi-threaded backup archiver.
+"""
+
+import tarfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from os import path as osp, remove, replace, cpu_count
+from struct import pack
+from tempfile import SpooledTemporaryFile
+from threading import Lock
+from time import localtime, monotonic
+from typing import BinaryIO, Callable, List, NamedTuple, Optional
+
+from MCSL2Lib.ServerControllers.backupRepository import walkSources
+from MCSL2Lib.ServerControllers.backupThrottle import BackupThrottle
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_FORMATS = ["zip", "tar.zst"]
+
+_BLOCK_SIZE = 1024 * 1024
+_SPOOL_SIZE = 16 * 1024 * 1024
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP_FLAG_UTF8 = 0x800
+_ZIP_STORED = 0
+_ZIP_DEFLATED = 8
+_ZIP_VERSION = 20
+_ZIP64_VERSION = 45
+_ZIP_CREATE_SYSTEM = 3  # Unix，便于记录权限位
+
+
+class ArchiveCancelled(Exception):
+    pass
+
+
+def availableFormats() -> List[str]:
+    return ARCHIVE_FORMATS if zstandard is not None else ARCHIVE_FORMATS[:1]
+
+
+def formatFromPath(path: str) -> str:
+    return "tar.zst" if path.endswith(".tar.zst") else "zip"
+
+
+def _dosDateTime(mtime: float):
+    t = localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return (
+        (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday,
+    )
+
+
+class _ZipEntry(NamedTuple):
+    name: bytes
+    method: int
+    crc: int
+    compressSize: int
+    fileSize: int
+    dosTime: int
+    dosDate: int
+    externalAttr: int
+    data: Optional[BinaryIO]
+
+
+class _ProgressReader:
+    """统计读取字节数的文件包装，用于tar写入"""
+
+    def __init__(self, f: BinaryIO, onRead: Callable[[int], None]):
+        self.f = f
+        self.onRead = onRead
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.onRead(len(data))
+        return data
+
+
+class ParallelArchiver:
+    """
+    多线程打包器。\n
+    zip：每个文件由线程池中的线程独立压缩（zlib压缩时会释放GIL），再按顺序写入压缩包；\n
+    tar.zst：由zstd自身的多线程压缩。
+    """
+
+    def __init__(
+        self,
+        archiveFormat: str = "zip",
+        level: int = 6,
+        threads: int = 0,
+        progress: Optional[Callable[[int, int], None]] = None,
+        isCancelled: Optional[Callable[[], bool]] = None,
+        throttle: Optional[BackupThrottle] = None,
+    ):
+        if archiveFormat not in availableFormats():
+            raise ValueError(f"不支持的压缩格式：{archiveFormat}")
+        self.archiveFormat = archiveFormat
+        self.level = level
+        self.threads = threads if threads > 0 else (cpu_count() or 1)
+        self.progress = progress
+        self.isCancelled = isCancelled
+        self.throttle = throttle
+        self.skipped: List[str] = []
+        self.totalBytes = 0
+        self.doneBytes = 0
+        self._progressLock = Lock()
+        self._lastProgressTime = 0.0
+
+    def _onRead(self, size: int):
+        if self.throttle is not None:
+            self.throttle.consume(size)
+        with self._progressLock:
+            self.doneBytes += size
+            now = monotonic()
+            if self.progress is None or now - self._lastProgressTime < 0.1:
+                return
+            self._lastProgressTime = now
+        self.progress(self.doneBytes, self.totalBytes)
+
+    def _checkCancelled(self):
+        if self.isCancelled is not None and self.isCancelled():
+            raise ArchiveCancelled("备份已取消")
+
+    def archive(self, archivePath: str, baseDir: str, sources: List[str]) -> List[str]:
+        """将baseDir下的sources打包到archivePath，返回因无法读取而跳过的文件"""
+        files, dirs = walkSources(baseDir, sources)
+        self.totalBytes = sum(st.st_size for _, st in files)
+        self.doneBytes = 0
+        self.skipped = []
+        tmpArchivePath = f"{archivePath}.part"
+        try:
+            with open(tmpArchivePath, "wb") as out:
+                if self.archiveFormat == "zip":
+                    self._writeZip(out, baseDir, files, dirs)
+                else:
+                    self._writeTarZst(out, baseDir, files, dirs)
+            replace(tmpArchivePath, archivePath)
+        except BaseException:
+            try:
+                remove(tmpArchivePath)
+            except OSError:
+                pass
+            raise
+        if self.progress is not None:
+            self.progress(self.doneBytes, self.totalBytes)
+        return self.skipped
+
+    # region zip
+    def _compressFile(self, rel: str, path: str, st) -> Optional[_ZipEntry]:
+        spool = SpooledTemporaryFile(max_size=_SPOOL_SIZE)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15) if self.level else None
+        crc = fileSize = 0
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    self._checkCancelled()
+                    block = f.read(_BLOCK_SIZE)
+                    if not block:
+                        break
+                    crc = zlib.crc32(block, crc)
+                    fileSize += len(block)
+                    spool.write(compressor.compress(block) if compressor else block)
+                    self._onRead(len(block))
+            if compressor:
+                spool.write(compressor.flush())
+        except (PermissionError, FileNotFoundError):
+            # 被其他程序独占或在备份期间被删除的文件
+            spool.close()
+            return None
+        except BaseException:
+            spool.close()
+            raise
+        dosTime, dosDate = _dosDateTime(st.st_mtime)
+        return _ZipEntry(
+            rel.encode("utf-8"),
+            _ZIP_DEFLATED if compressor else _ZIP_STORED,
+            crc,
+            spool.tell(),
+            fileSize,
+            dosTime,
+            dosDate,
+            (st.st_mode & 0xFFFF) << 16,
+            spool,
+        )
+
+    def _writeZip(self, out: BinaryIO, baseDir: str, files, dirs):
+        central = []
+        for rel in dirs:
+            if rel:
+                dosTime, dosDate = _dosDateTime(osp.getmtime(osp.join(baseDir, rel)))
+                entry = _ZipEntry(
+                    f"{rel}/".encode("utf-8"),
+                    _ZIP_STORED,
+                    0,
+                    0,
+                    0,
+                    dosTime,
+                    dosDate,
+                    (0o40755 << 16) | 0x10,
+                    None,
+                )
+                central.append((entry, self._writeLocalEntry(out, entry)))
+        with ThreadPoolExecutor(
+            self.threads,
+            thread_name_prefix="MCSL2Archiver",
+            initializer=self.throttle.enterWorker if self.throttle is not None else None,
+        ) as pool:
+            pending = deque()
+            try:
+                for rel, st in files:
+                    self._checkCancelled()
+                    pending.append(
+                        (rel, pool.submit(self._compressFile, rel, osp.join(baseDir, rel), st))
+                    )
+                    # 限制同时在内存中的压缩结果数量
+                    while len(pending) > self.threads * 2:
+                        self._flushZipEntry(out, pending.popleft(), central)
+                while pending:
+                    self._flushZipEntry(out, pending.popleft(), central)
+            except BaseException:
+                for _, future in pending:
+                    future.cancel()
+                raise
+        self._writeCentralDirectory(out, central)
+
+    def _flushZipEntry(self, out: BinaryIO, item, central: list):
+        rel, future = item
+        entry = future.result()
+        if entry is None:
+            self.skipped.append(rel)
+            return
+        central.append((entry, self._writeLocalEntry(out, entry)))
+
+    @staticmethod
+    def _writeLocalEntry(out: BinaryIO, entry: _ZipEntry) -> int:
+        offset = out.tell()
+        zip64 = entry.fileSize >= _ZIP64_LIMIT or entry.compressSize >= _ZIP64_LIMIT
+        extra = pack("<HHQQ", 1, 16, entry.fileSize, entry.compressSize) if zip64 else b""
+        out.write(
+            pack(
+                "<4s5HL2L2H",
+                b"PK\x03\x04",
+                _ZIP64_VERSION if zip64 else _ZIP_VERSION,
+                _ZIP_FLAG_UTF8,
+                entry.method,
+                entry.dosTime,
+                entry.dosDate,
+                entry.crc,
+                _ZIP64_LIMIT if zip64 else entry.compressSize,
+                _ZIP64_LIMIT if zip64 else entry.fileSize,
+                len(entry.name),
+                len(extra),
+            )
+        )
+        out.write(entry.name)
+        out.write(extra)
+        if entry.data is not None:
+            entry.data.seek(0)
+            while True:
+                block = entry.data.read(_BLOCK_SIZE)
+                if not block:
+                    break
+                out.write(block)
+            entry.data.close()
+        return offset
+
+    @staticmethod
+    def _writeCentralDirectory(out: BinaryIO, central: list):
+        start = out.tell()
+        for entry, offset in central:
+            zip64Fields = []
+            fileSize, compressSize, headerOffset = entry.fileSize, entry.compressSize, offset
+            if fileSize >= _ZIP64_LIMIT:
+                zip64Fields.append(fileSize)
+                fileSize = _ZIP64_LIMIT
+            if compressSize >= _ZIP64_LIMIT:
+                zip64Fields.append(compressSize)
+                compressSize = _ZIP64_LIMIT
+            if headerOffset >= _ZIP64_LIMIT:
+                zip64Fields.append(headerOffset)
+                headerOffset = _ZIP64_LIMIT
+            extra = (
+                pack(f"<HH{len(zip64Fields)}Q", 1, 8 * len(zip64Fields), *zip64Fields)
+                if zip64Fields
+                else b""
+            )
+            version = _ZIP64_VERSION if zip64Fields else _ZIP_VERSION
+            out.write(
+                pack(
+                    "<4s4B4HL2L5H2L",
+                    b"PK\x01\x02",
+                    version,
+                    _ZIP_CREATE_SYSTEM,
+                    version,
+                    0,
+                    _ZIP_FLAG_UTF8,
+                    entry.method,
+                    entry.dosTime,
+                    entry.dosDate,
+                    entry.crc,
+                    compressSize,
+                    fileSize,
+                    len(entry.name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    entry.externalAttr,
+                    headerOffset,
+                )
+            )
+            out.write(entry.name)
+            out.write(extra)
+        end = out.tell()
+        count, size = len(central), end - start
+        if count >= 0xFFFF or size >= _ZIP64_LIMIT or start >= _ZIP64_LIMIT:
+            out.write(
+                pack(
+                    "<4sQ2H2L4Q",
+                    b"PK\x06\x06",
+                    44,
+                    _ZIP64_VERSION,
+                    _ZIP64_VERSION,
+                    0,
+                    0,
+                    count,
+                    count,
+                    size,
+                    start,
+                )
+            )
+            out.write(pack("<4sLQL", b"PK\x06\x07", 0, end, 1))
+            count, size, start = (
+                min(count, 0xFFFF),
+                min(size, _ZIP64_LIMIT),
+                min(start, _ZIP64_LIMIT),
+            )
+        out.write(pack("<4s4H2LH", b"PK\x05\x06", 0, 0, count, count, size, start, 0))
+
+    # endregion
+
+    # region tar.zst
+    def _writeTarZst(self, out: BinaryIO, baseDir: str, files, dirs):
+        compressor = zstandard.ZstdCompressor(
+            level=self.level, threads=self.threads, write_checksum=True
+        )
+        with compressor.stream_writer(out, closefd=False) as writer:
+            with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                for rel in dirs:
+                    if rel:
+                        tar.add(osp.join(baseDir, rel), arcname=rel, recursive=False)
+                for rel, _ in files:
+                    self._checkCancelled()
+                    path = osp.join(baseDir, rel)
+                    try:
+                        f = open(path, "rb")
+                    except (PermissionError, FileNotFoundError):
+                        self.skipped.append(rel)
+                        continue
+                    with f:
+                        info = tar.gettarinfo(arcname=rel, fileobj=f)
+                        tar.addfile(info, _ProgressReader(f, self._onRead))
+
+    # endregion
@@ -0,0 +1,60 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Read Minecraft region (.mca) file headers.
+"""
+
+import hashlib
+from mmap import mmap, ACCESS_READ
+from struct import unpack_from
+from typing import NamedTuple, Optional, Tuple
+
+# 区域文件头：4KiB区块位置表 + 4KiB区块时间戳表，每个区域32x32=1024个区块
+REGION_HEADER_SIZE = 8192
+REGION_CHUNK_COUNT = 1024
+REGION_FILE_SUFFIXES = (".mca", ".mcr")
+
+
+class RegionHeader(NamedTuple):
+    digest: str
+    timestamps: Tuple[int, ...]
+
+    @property
+    def maxTimestamp(self) -> int:
+        return max(self.timestamps)
+
+    @property
+    def chunkCount(self) -> int:
+        return sum(1 for t in self.timestamps if t)
+
+    def changedChunks(self, since: float) -> int:
+        """时间戳不早于since的区块数，即上次备份以来被保存过的区块"""
+        since = int(since)
+        return sum(1 for t in self.timestamps if t and t >= since)
+
+
+def isRegionFile(path: str) -> bool:
+    return path.endswith(REGION_FILE_SUFFIXES)
+
+
+def readRegionHeader(path: str) -> Optional[RegionHeader]:
+    """通过mmap只读取区域文件的8KiB文件头，文件过小或无法读取时返回None"""
+    try:
+        with open(path, "rb") as f:
+            with mmap(f.fileno(), REGION_HEADER_SIZE, access=ACCESS_READ) as m:
+                digest = hashlib.blake2b(m[:REGION_HEADER_SIZE], digest_size=16).hexdigest()
+                timestamps = unpack_from(f">{REGION_CHUNK_COUNT}I", m, 4096)
+    except (OSError, ValueError):
+        # 空文件或不足8KiB的文件无法映射
+        return None
+    return RegionHeader(digest, timestamps)
@@ -33,6 +33,7 @@ from PyQt5.QtCore import (
 from PyQt5.QtNetwork import QNetworkRequest, QNetworkAccessManager
 
 from MCSL2Lib.ProgramControllers.settingsController import cfg
+from MCSL2Lib.ProgramControllers.serverRegistry import serverRegistry
 from MCSL2Lib.utils import MCSL2Logger
 from MCSL2Lib.utils import ServicesUrl
 from MCSL2Lib.variables import ConfigureServerVariables, EditServerVariables
@@ -461,29 +462,19 @@ class ForgeInstaller(Installer):
                         editServerVariables.jvmArg.extend(forgeArgs)
                 # 写入全局配置
                 try:
-                    with open(
-                        r"MCSL2/MCSL2_ServerList.json", "r", encoding="utf-8"
-                    ) as globalServerListFile:
-                        # old
-                        globalServerList = loads(globalServerListFile.read())
-                    d = globalServerList["MCSLServerList"][
-                        len(globalServerList["MCSLServerList"]) - 1
-                        if self.isEditing is None
-                        else self.isEditing
-                    ]
+                    index = (
+                        serverRegistry.count() - 1 if self.isEditing is None else self.isEditing
+                    )
+                    d = serverRegistry.get(index)
                     d["jvm_arg"].extend(forgeArgs)
                     d.update({
                         "icon": "Anvil.png",
                         "server_type": "forge",
                     })
-                    globalServerList["MCSLServerList"].pop(
-                        -1 if self.isEditing is None else self.isEditing
-                    )
-                    globalServerList["MCSLServerList"].append(d)
-                    with open(
-                        r"MCSL2/MCSL2_ServerList.json", "w+", encoding="utf-8"
-                    ) as newGlobalServerListFile:
-                        newGlobalServerListFile.write(dumps(globalServerList, indent=4))
+                    serverRegistry.remove(index)
+                    serverRegistry.add(d)
+                    if not serverRegistry.flush():
+                        raise OSError("写入全局服务器配置失败")
                 except Exception as e:
                     raise e
 
@@ -15,14 +15,46 @@
 Communicate with Minecraft servers.
 """
 
+from datetime import datetime
+from typing import Optional
 from PyQt5.QtCore import QObject, pyqtSignal, QTimer, pyqtSlot, Qt, QThread
 from PyQt5.QtWidgets import QFileDialog
 from psutil import NoSuchProcess, Process, AccessDenied
+from MCSL2Lib.ProgramControllers.settingsController import cfg
+from MCSL2Lib.ServerControllers.backupRepository import (
+    SCHEDULED_LABEL_PREFIX,
+    BackupRepository,
+    BackupRepositoryError,
+    isSavesOnlyLabel,
+    isScheduledLabel,
+)
+from MCSL2Lib.ServerControllers.backupRestorer import (
+    ParallelExtractor,
+    RestoreError,
+    recoverInterruptedRestore,
+    stagingDirOf,
+    swapIntoPlace,
+)
+from MCSL2Lib.ServerControllers.backupThrottle import LAG_PAUSE_SECONDS, BackupThrottle
+from MCSL2Lib.ServerControllers.parallelArchiver import (
+    ArchiveCancelled,
+    ParallelArchiver,
+    availableFormats,
+    formatFromPath,
+)
 from MCSL2Lib.ServerControllers.processCreator import _ServerProcessBridge
 from MCSL2Lib.variables import ServerVariables
-from os import path as osp, mkdir
-from qfluentwidgets import InfoBar, InfoBarPosition
-from shutil import make_archive, copytree, rmtree
+from MCSL2Lib.utils import MCSL2Logger
+from os import path as osp
+from shutil import rmtree
+from qfluentwidgets import (
+    ComboBox,
+    InfoBar,
+    InfoBarPosition,
+    MessageBox,
+    PushButton,
+    StateToolTip,
+)
 
 
 class MinecraftServerResMonitorUtil(QObject):
@@ -101,118 +133,691 @@ def readServerProperties(serverConfig: ServerVariables):
         serverConfig.serverProperties.update({"msg": "File not found"})
 
 
-class MakeArchiveThread(QThread):
-    successSignal = pyqtSignal()
-    errorSignal = pyqtSignal()
+def formatBytes(size: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.2f}{unit}"
+        size /= 1024
+    return f"{size:.2f}TB"
+
+
+class ServerSaveGuard(QObject):
+    """
+    备份运行中的服务器前，通过save-off/save-all flush暂停自动保存并把存档完整写入磁盘，
+    备份结束后再save-on恢复，保证备份到的存档是一致的。
+    """
+
+    ready = pyqtSignal()
+    failed = pyqtSignal(str)
 
-    def __init__(self, a, b, c, parent=None):
+    savedKeywords = ("Saved the game", "Saved the world")
+
+    def __init__(self, bridge: Optional[_ServerProcessBridge], timeout: int = 60000, parent=None):
         super().__init__(parent)
-        self.a = a
-        self.b = b
-        self.c = c
+        self.bridge = bridge
+        self.holding = False
+        self.timeoutTimer = QTimer(self)
+        self.timeoutTimer.setSingleShot(True)
+        self.timeoutTimer.setInterval(timeout)
+        self.timeoutTimer.timeout.connect(self.onTimeout)
+
+    def hold(self):
+        """服务器未运行时直接就绪，否则等待“Saved the game”"""
+        if self.bridge is None or not self.bridge.isServerRunning():
+            self.ready.emit()
+            return
+        self.holding = True
+        self.bridge.serverLogOutput.connect(self.onServerLogOutput)
+        self.bridge.serverClosed.connect(self.onServerClosed)
+        self.bridge.sendCommand("save-off")
+        self.bridge.sendCommand("save-all flush")
+        self.timeoutTimer.start()
+
+    def release(self):
+        """恢复服务器自动保存"""
+        self.timeoutTimer.stop()
+        self._disconnect()
+        if self.holding and self.bridge.isServerRunning():
+            self.bridge.sendCommand("save-on")
+        self.holding = False
+
+    def _disconnect(self):
+        if self.bridge is None:
+            return
+        try:
+            self.bridge.serverLogOutput.disconnect(self.onServerLogOutput)
+        except (AttributeError, TypeError):
+            pass
+        try:
+            self.bridge.serverClosed.disconnect(self.onServerClosed)
+        except (AttributeError, TypeError):
+            pass
+
+    @pyqtSlot(str)
+    def onServerLogOutput(self, line: str):
+        if any(keyword in line for keyword in self.savedKeywords):
+            self.timeoutTimer.stop()
+            try:
+                self.bridge.serverLogOutput.disconnect(self.onServerLogOutput)
+            except (AttributeError, TypeError):
+                pass
+            self.ready.emit()
+
+    @pyqtSlot(int)
+    def onServerClosed(self, _):
+        # 服务器关闭时已经完整保存了存档
+        if self.timeoutTimer.isActive():
+            self.timeoutTimer.stop()
+            self._disconnect()
+            self.holding = False
+            self.ready.emit()
+
+    def onTimeout(self):
+        self.release()
+        self.failed.emit("等待服务器保存存档超时")
+
+
+def _createThrottle(thread: QThread) -> BackupThrottle:
+    """按设置创建备份限速器"""
+    return BackupThrottle(
+        maxBytesPerSecond=cfg.get(cfg.backupMaxReadSpeed) * 1024 * 1024,
+        lowPriority=cfg.get(cfg.backupLowPriority),
+        isCancelled=thread.isInterruptionRequested,
+    )
+
+
+def _watchServerLag(
+    bridge: Optional[_ServerProcessBridge], throttle: BackupThrottle, thread: QThread
+):
+    """服务器输出“Can't keep up!”时暂停备份，备份线程结束后断开"""
+    if bridge is None or not cfg.get(cfg.backupPauseWhenLagging):
+        return
+
+    def onServerLogOutput(line: str):
+        if "Can't keep up" in line and thread.isRunning():
+            throttle.pause(LAG_PAUSE_SECONDS)
+
+    def disconnect():
+        try:
+            bridge.serverLogOutput.disconnect(onServerLogOutput)
+        except (AttributeError, TypeError):
+            pass
+
+    bridge.serverLogOutput.connect(onServerLogOutput)
+    thread.finished.connect(disconnect)
+
+
+def _throttleReport(report: dict) -> str:
+    msg = f"平均读取速度{formatBytes(report['throughput'])}/s"
+    if report["pausedSeconds"]:
+        msg += f"，因服务器卡顿暂停{report['pausedSeconds']:.1f}秒"
+    if report["rateLimitedSeconds"]:
+        msg += f"，限速等待{report['rateLimitedSeconds']:.1f}秒"
+    return msg + "。"
+
+
+class CancellableThread(QThread):
+    """
+    开始前也能取消的线程。\n
+    Qt5会忽略对还没开始的线程的requestInterruption；等待服务器保存存档或关闭期间取消时，
+    记下取消并发出cancelled，之后的start不再启动线程。
+    """
+
+    cancelled = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cancelledBeforeStart = False
+
+    def requestInterruption(self):
+        if self.isRunning() or self.isFinished():
+            super().requestInterruption()
+        elif not self.cancelledBeforeStart:
+            self.cancelledBeforeStart = True
+            self.cancelled.emit()
+
+    def start(self, *args):
+        if not self.cancelledBeforeStart:
+            super().start(*args)
+
+
+class MakeArchiveThread(CancellableThread):
+    """多线程压缩，直接从服务器目录流式写入压缩包，不再复制到临时目录"""
+
+    progressSignal = pyqtSignal("qint64", "qint64")
+    successSignal = pyqtSignal(list, dict)
+    errorSignal = pyqtSignal(str)
+
+    def __init__(self, archivePath: str, baseDir: str, sources: list, parent=None):
+        super().__init__(parent)
+        self.archivePath = archivePath
+        self.baseDir = baseDir
+        self.sources = sources
+        self.throttle = _createThrottle(self)
+        self.setObjectName("MakeArchiveThread")
 
     def run(self):
+        self.throttle.reset()
+        self.throttle.enterWorker()
         try:
-            make_archive(
-                self.a,
-                self.b,
-                self.c,
-            )
-            self.successSignal.emit()
-        except Exception:
-            self.errorSignal.emit()
+            skipped = ParallelArchiver(
+                archiveFormat=formatFromPath(self.archivePath),
+                level=cfg.get(cfg.backupCompressLevel),
+                threads=cfg.get(cfg.backupThreads),
+                progress=self.progressSignal.emit,
+                isCancelled=self.isInterruptionRequested,
+                throttle=self.throttle,
+            ).archive(self.archivePath, self.baseDir, self.sources)
+            if skipped:
+                MCSL2Logger.warning(f"备份时跳过了以下无法读取的文件：{skipped}")
+            report = self.throttle.report()
+            MCSL2Logger.info(f"备份完毕：{report}")
+            self.successSignal.emit(skipped, report)
+        except ArchiveCancelled as e:
+            self.errorSignal.emit(str(e))
+        except Exception as e:
+            MCSL2Logger.error(exc=e, msg="备份失败")
+            self.errorSignal.emit(str(e))
 
 
-def backupServer(serverName: str, parent):
-    try:
-        s = QFileDialog.getSaveFileName(
-            parent,
-            f"MCSL2 - 备份服务器“{serverName}”",
-            f"{serverName}_backup.zip",
-            "Zip压缩包(*.zip)",
-        )[0]
-        if s == "":
-            return
-        tmpArchiveThread = MakeArchiveThread(
-            (s).replace(".zip", ""), "zip", osp.abspath(f"Servers/{serverName}"), parent
+def _startArchive(
+    archivePath: str,
+    baseDir: str,
+    sources: list,
+    successMsg: str,
+    parent,
+    bridge: Optional[_ServerProcessBridge] = None,
+):
+    guard = ServerSaveGuard(bridge, parent=parent)
+    tmpArchiveThread = MakeArchiveThread(archivePath, baseDir, sources, parent)
+    stateToolTip = StateToolTip("备份中", "正在等待服务器保存存档...", parent)
+    stateToolTip.move(stateToolTip.getSuitablePos())
+    stateToolTip.show()
+    # 关闭提示即取消备份
+    stateToolTip.closedSignal.connect(tmpArchiveThread.requestInterruption)
+    tmpArchiveThread.progressSignal.connect(
+        lambda done, total: stateToolTip.setContent(
+            f"{formatBytes(done)} / {formatBytes(total)}（{done * 100 // max(total, 1)}%）"
         )
-        tmpArchiveThread.successSignal.connect(
-            lambda: InfoBar.success(
-                title="备份完毕",
-                content=f"已保存至{s}",
-                orient=Qt.Horizontal,
-                isClosable=True,
-                position=InfoBarPosition.TOP,
-                duration=1500,
-                parent=parent,
-            )
+    )
+    tmpArchiveThread.finished.connect(lambda: stateToolTip.setState(True))
+    guard.failed.connect(lambda: stateToolTip.setState(True))
+    _watchServerLag(bridge, tmpArchiveThread.throttle, tmpArchiveThread)
+    tmpArchiveThread.successSignal.connect(
+        lambda skipped, report: InfoBar.success(
+            title="备份完毕",
+            content=successMsg
+            + f"\n{_throttleReport(report)}"
+            + (f"\n跳过了{len(skipped)}个无法读取的文件。" if skipped else ""),
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=1500,
+            parent=parent,
         )
-        tmpArchiveThread.start()
-    except Exception:
-        InfoBar.success(
+    )
+    tmpArchiveThread.errorSignal.connect(
+        lambda msg: InfoBar.error(
             title="备份失败",
-            content=str(Exception.args),
+            content=msg,
             orient=Qt.Horizontal,
             isClosable=True,
             position=InfoBarPosition.TOP,
             duration=4000,
             parent=parent,
         )
+    )
+    _guardThread(guard, tmpArchiveThread, "备份失败", parent)
+    return tmpArchiveThread
 
 
-def backupSaves(serverConfig: ServerVariables, parent):
-    try:
-        readServerProperties(serverConfig)
-        levelName = serverConfig.serverProperties.get("level-name")
-        levelNameList = [levelName, f"{levelName}_nether", f"{levelName}_the_end"]
-        if osp.exists(f"MCSL2/BackupTemp_{serverConfig.serverName}/"):
-            rmtree(f"MCSL2/BackupTemp_{serverConfig.serverName}/")
-        s = QFileDialog.getSaveFileName(
-            parent,
-            f"MCSL2 - 备份服务器“{serverConfig.serverName}”的存档",
-            f"{serverConfig.serverName}_{levelName}_backup.zip",
-            "Zip压缩包(*.zip)",
-        )[0]
-        if s == "":
-            return
-        mkdir(f"MCSL2/BackupTemp_{serverConfig.serverName}/")
-        for dir in levelNameList:
-            try:
-                copytree(
-                    osp.abspath(f"Servers/{serverConfig.serverName}/{dir}/"),
-                    osp.abspath(f"MCSL2/BackupTemp_{serverConfig.serverName}/{dir}/"),
+def _getArchiveSavePath(parent, title: str, defaultName: str) -> str:
+    """询问压缩包保存路径，默认格式跟随设置"""
+    filters = ["Zip压缩包(*.zip)"]
+    if "tar.zst" in availableFormats():
+        filters.append("Zstandard压缩包(*.tar.zst)")
+    archiveFormat = cfg.get(cfg.backupArchiveFormat)
+    if archiveFormat not in availableFormats():
+        archiveFormat = "zip"
+    s, selectedFilter = QFileDialog.getSaveFileName(
+        parent,
+        title,
+        f"{defaultName}.{archiveFormat}",
+        ";;".join(filters),
+        filters[availableFormats().index(archiveFormat)],
+    )
+    if s == "":
+        return ""
+    if not s.endswith((".zip", ".tar.zst")):
+        s += ".tar.zst" if "tar.zst" in selectedFilter else ".zip"
+    return s
+
+
+def _guardThread(guard: ServerSaveGuard, thread: CancellableThread, errorTitle: str, parent):
+    """等服务器保存完存档后再启动备份线程，备份结束或开始前被取消时恢复自动保存"""
+    thread.finished.connect(guard.release)
+    thread.finished.connect(guard.deleteLater)
+    thread.cancelled.connect(guard.release)
+    thread.cancelled.connect(guard.deleteLater)
+    guard.ready.connect(thread.start)
+    guard.failed.connect(guard.deleteLater)
+    guard.failed.connect(
+        lambda msg: InfoBar.error(
+            title=errorTitle,
+            content=msg,
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=4000,
+            parent=parent,
+        )
+    )
+    guard.hold()
+
+
+def backupServer(serverName: str, parent, bridge: Optional[_ServerProcessBridge] = None):
+    s = _getArchiveSavePath(parent, f"MCSL2 - 备份服务器“{serverName}”", f"{serverName}_backup")
+    if s == "":
+        return
+    return _startArchive(
+        s,
+        osp.abspath(f"Servers/{serverName}"),
+        [""],
+        f"已保存至{s}",
+        parent,
+        bridge,
+    )
+
+
+def backupSaves(
+    serverConfig: ServerVariables, parent, bridge: Optional[_ServerProcessBridge] = None
+):
+    readServerProperties(serverConfig)
+    levelName = serverConfig.serverProperties.get("level-name", "world")
+    serverDir = osp.abspath(f"Servers/{serverConfig.serverName}")
+    levelNameList = [
+        dir
+        for dir in [levelName, f"{levelName}_nether", f"{levelName}_the_end"]
+        if osp.isdir(osp.join(serverDir, dir))
+    ]
+    s = _getArchiveSavePath(
+        parent,
+        f"MCSL2 - 备份服务器“{serverConfig.serverName}”的存档",
+        f"{serverConfig.serverName}_{levelName}_backup",
+    )
+    if s == "":
+        return
+    existsDir = "\n".join(levelNameList)
+    return _startArchive(
+        s,
+        serverDir,
+        levelNameList,
+        f"已保存至{s}。\n备份了以下文件夹：\n{existsDir}",
+        parent,
+        bridge,
+    )
+
+
+class IncrementalBackupThread(CancellableThread):
+    """增量备份线程"""
+
+    progressSignal = pyqtSignal("qint64", "qint64")
+    successSignal = pyqtSignal(dict)
+    errorSignal = pyqtSignal(str)
+
+    def __init__(
+        self,
+        serverName: str,
+        sources: list,
+        label: str,
+        retention: Optional[tuple] = None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.serverName = serverName
+        self.sources = sources
+        self.label = label
+        # 定时备份的(小时, 天, 周)保留数量，为None时按“保留最新N个”清理
+        self.retention = retention
+        self.throttle = _createThrottle(self)
+        self.setObjectName("IncrementalBackupThread")
+
+    def run(self):
+        self.throttle.reset()
+        self.throttle.enterWorker()
+        try:
+            repo = BackupRepository(self.serverName)
+            manifest = repo.createSnapshot(
+                osp.abspath(f"Servers/{self.serverName}"),
+                self.sources,
+                label=self.label,
+                progress=self.progressSignal.emit,
+                isCancelled=self.isInterruptionRequested,
+                throttle=self.throttle,
+            )
+            manifest["throttle"] = self.throttle.report()
+            if self.retention is not None:
+                removed, _, freedBytes = repo.pruneScheduledSnapshots(*self.retention)
+            else:
+                removed, _, freedBytes = repo.pruneSnapshots(cfg.get(cfg.backupKeepSnapshots))
+            if removed:
+                MCSL2Logger.info(
+                    f"服务器“{self.serverName}”清理了{len(removed)}个旧快照，"
+                    f"释放{formatBytes(freedBytes)}"
                 )
-            except FileNotFoundError:
-                levelNameList.remove(dir)
-                continue
-        existsDir = "\n".join(levelNameList)
-        tmpArchiveThread = MakeArchiveThread(
-            s.replace(".zip", ""),
-            "zip",
-            osp.abspath(f"MCSL2/BackupTemp_{serverConfig.serverName}/"),
-            parent,
+            manifest.pop("files")
+            manifest.pop("dirs")
+            self.successSignal.emit(manifest)
+        except Exception as e:
+            MCSL2Logger.error(exc=e, msg="增量备份失败")
+            self.errorSignal.emit(str(e))
+
+
+def incrementalBackup(
+    serverConfig: ServerVariables,
+    parent,
+    savesOnly: bool = False,
+    bridge: Optional[_ServerProcessBridge] = None,
+    retention: Optional[tuple] = None,
+):
+    """
+    增量备份整个服务器或仅存档，只写入有变化的数据。\n
+    retention为(小时, 天, 周)时作为定时备份，备份后在同一线程中按GFS策略清理旧快照。
+    """
+    if savesOnly:
+        readServerProperties(serverConfig)
+        levelName = serverConfig.serverProperties.get("level-name", "world")
+        sources = [levelName, f"{levelName}_nether", f"{levelName}_the_end"]
+    else:
+        sources = [""]
+    label = "saves" if savesOnly else "server"
+    if retention is not None:
+        label = SCHEDULED_LABEL_PREFIX + label
+    thread = IncrementalBackupThread(serverConfig.serverName, sources, label, retention, parent)
+    thread.successSignal.connect(
+        lambda manifest: InfoBar.success(
+            title="定时备份完毕" if retention is not None else "增量备份完毕",
+            content=f"快照{manifest['id']}：共{manifest['stats']['files']}个文件，"
+            f"{manifest['stats']['changedRegionChunks']}个区块有变化，"
+            f"新写入{formatBytes(manifest['stats']['storedBytes'])}，"
+            f"用时{manifest['stats']['seconds']}秒，"
+            f"{_throttleReport(manifest['throttle'])}",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=3000,
+            parent=parent,
         )
-        tmpArchiveThread.successSignal.connect(
-            lambda: InfoBar.success(
-                title="备份完毕",
-                content=f"已保存至{s}。\n备份了以下文件夹：\n{existsDir}",
+    )
+    thread.errorSignal.connect(
+        lambda msg: InfoBar.error(
+            title="增量备份失败",
+            content=msg,
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=4000,
+            parent=parent,
+        )
+    )
+    _watchServerLag(bridge, thread.throttle, thread)
+    _guardThread(ServerSaveGuard(bridge, parent=parent), thread, "增量备份失败", parent)
+    if retention is not None:
+        return thread
+    InfoBar.info(
+        title="增量备份",
+        content="正在备份，请稍后...",
+        orient=Qt.Horizontal,
+        isClosable=True,
+        position=InfoBarPosition.TOP,
+        duration=1500,
+        parent=parent,
+    )
+    return thread
+
+
+class PruneSnapshotsThread(QThread):
+    """清理旧快照及不再被引用的数据块的线程"""
+
+    successSignal = pyqtSignal(list, "qint64", "qint64")
+    errorSignal = pyqtSignal(str)
+
+    def __init__(self, serverName: str, keepCount: int, parent=None):
+        super().__init__(parent)
+        self.serverName = serverName
+        self.keepCount = keepCount
+        self.setObjectName("PruneSnapshotsThread")
+
+    def run(self):
+        try:
+            self.successSignal.emit(
+                *BackupRepository(self.serverName).pruneSnapshots(self.keepCount)
+            )
+        except Exception as e:
+            if not isinstance(e, BackupRepositoryError):
+                MCSL2Logger.error(exc=e, msg="清理增量备份快照失败")
+            self.errorSignal.emit(str(e))
+
+
+def showBackupSnapshots(serverName: str, parent, restore=None):
+    """
+    列出服务器的增量备份快照，并提供还原快照与清理旧快照的按钮。\n
+    restore(snapshotId)用于还原快照，默认直接调用restoreBackup。
+    """
+    repo = BackupRepository(serverName)
+    snapshots = repo.listSnapshots()
+    if snapshots:
+        content = "\n".join(
+            f"{s['id']}  {datetime.fromtimestamp(s['time']).strftime('%Y-%m-%d %H:%M:%S')}  "
+            f"{'定时' if isScheduledLabel(s['label']) else ''}"
+            f"{'仅存档' if isSavesOnlyLabel(s['label']) else '服务器'}  "
+            f"{formatBytes(s['stats']['totalBytes'])}"
+            f"（新增{formatBytes(s['stats']['storedBytes'])}）"
+            for s in snapshots
+        )
+    else:
+        content = "此服务器还没有增量备份快照。"
+    w = MessageBox(f"服务器“{serverName}”的增量备份快照", content, parent)
+    w.yesButton.setText("关闭")
+    w.cancelButton.hide()
+    keepCount = cfg.get(cfg.backupKeepSnapshots)
+    pruneBtn = PushButton(f"仅保留最新{keepCount}个", parent=w)
+    pruneBtn.setEnabled(len(snapshots) > keepCount)
+    snapshotComboBox = ComboBox(w)
+    snapshotComboBox.addItems([s["id"] for s in reversed(snapshots)])
+    snapshotComboBox.setEnabled(bool(snapshots))
+    restoreBtn = PushButton("还原此快照", parent=w)
+    restoreBtn.setEnabled(bool(snapshots))
+
+    def prune():
+        w.close()
+        thread = PruneSnapshotsThread(serverName, keepCount, parent)
+        thread.successSignal.connect(
+            lambda removed, removedChunks, freedBytes: InfoBar.success(
+                title="清理完毕",
+                content=f"删除了{len(removed)}个快照、{removedChunks}个数据块，"
+                f"释放{formatBytes(freedBytes)}。",
                 orient=Qt.Horizontal,
                 isClosable=True,
                 position=InfoBarPosition.TOP,
-                duration=1500,
+                duration=3000,
                 parent=parent,
             )
         )
-        tmpArchiveThread.successSignal.connect(
-            lambda: rmtree(osp.abspath(f"MCSL2/BackupTemp_{serverConfig.serverName}/"))
-        )
-        tmpArchiveThread.errorSignal.connect(
-            lambda: rmtree(osp.abspath(f"MCSL2/BackupTemp_{serverConfig.serverName}/"))
+        thread.errorSignal.connect(
+            lambda msg: InfoBar.error(
+                title="清理失败",
+                content=msg,
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=4000,
+                parent=parent,
+            )
         )
-        tmpArchiveThread.start()
-    except Exception as e:
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def restoreSnapshot():
+        w.close()
+        if restore is not None:
+            restore(snapshotComboBox.currentText())
+        else:
+            restoreBackup(serverName, parent, snapshotId=snapshotComboBox.currentText())
+
+    pruneBtn.clicked.connect(prune)
+    restoreBtn.clicked.connect(restoreSnapshot)
+    w.buttonLayout.insertWidget(0, pruneBtn, 1, Qt.AlignVCenter)
+    w.buttonLayout.insertWidget(0, restoreBtn, 1, Qt.AlignVCenter)
+    w.buttonLayout.insertWidget(0, snapshotComboBox, 1, Qt.AlignVCenter)
+    w.exec_()
+
+
+class RestoreBackupThread(CancellableThread):
+    """
+    还原备份的线程。\n
+    先多线程解压到Servers/<name>旁的暂存目录并校验，全部成功后再重命名替换，
+    中途失败或取消都不会改动服务器目录。
+    """
+
+    progressSignal = pyqtSignal("qint64", "qint64")
+    successSignal = pyqtSignal()
+    errorSignal = pyqtSignal(str)
+
+    def __init__(
+        self,
+        serverName: str,
+        archivePath: str = "",
+        snapshotId: str = "",
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.serverName = serverName
+        self.archivePath = archivePath
+        self.snapshotId = snapshotId
+        self.setObjectName("RestoreBackupThread")
+
+    def run(self):
+        serverDir = osp.abspath(f"Servers/{self.serverName}")
+        stagingDir = stagingDirOf(serverDir)
+        try:
+            recoverInterruptedRestore(serverDir)
+            threads = cfg.get(cfg.backupThreads)
+            if self.snapshotId:
+                manifest = BackupRepository(self.serverName).extractSnapshot(
+                    self.snapshotId,
+                    stagingDir,
+                    threads=threads,
+                    progress=self.progressSignal.emit,
+                    isCancelled=self.isInterruptionRequested,
+                )
+                # 仅存档的快照只替换存档文件夹
+                entries = (
+                    [s for s in manifest["sources"] if osp.isdir(osp.join(stagingDir, s))]
+                    if isSavesOnlyLabel(manifest["label"])
+                    else None
+                )
+            else:
+                topLevel = ParallelExtractor(
+                    threads=threads,
+                    progress=self.progressSignal.emit,
+                    isCancelled=self.isInterruptionRequested,
+                ).extract(self.archivePath, stagingDir)
+                # backupServer的压缩包根目录下有文件，backupSaves的只有存档文件夹
+                entries = (
+                    None
+                    if any(osp.isfile(osp.join(stagingDir, name)) for name in topLevel)
+                    else topLevel
+                )
+            if self.isInterruptionRequested():
+                raise RestoreError("还原已取消")
+            swapIntoPlace(serverDir, stagingDir, entries)
+            self.successSignal.emit()
+        except Exception as e:
+            rmtree(stagingDir, ignore_errors=True)
+            if not isinstance(e, RestoreError):
+                MCSL2Logger.error(exc=e, msg="还原备份失败")
+            self.errorSignal.emit(str(e))
+
+
+def _stopServerThen(bridge: Optional[_ServerProcessBridge], callback):
+    """服务器未运行时直接调用callback，否则先关闭服务器"""
+    if bridge is None or not bridge.isServerRunning():
+        callback()
+        return
+
+    def onServerClosed(_):
         try:
-            rmtree(osp.abspath(f"MCSL2/BackupTemp_{serverConfig.serverName}\\"))
-        except Exception:
+            bridge.serverClosed.disconnect(onServerClosed)
+        except (AttributeError, TypeError):
             pass
-        raise e
+        callback()
+
+    bridge.serverClosed.connect(onServerClosed)
+    bridge.stopServer()
+
+
+def restoreBackup(
+    serverName: str,
+    parent,
+    bridge: Optional[_ServerProcessBridge] = None,
+    snapshotId: str = "",
+):
+    """从压缩包或增量备份快照还原服务器，服务器运行中时会先将其关闭"""
+    archivePath = ""
+    if not snapshotId:
+        filters = ["备份压缩包(*.zip *.tar.zst)"]
+        archivePath = QFileDialog.getOpenFileName(
+            parent, f"MCSL2 - 还原服务器“{serverName}”", "", ";;".join(filters)
+        )[0]
+        if archivePath == "":
+            return
+    running = bridge is not None and bridge.isServerRunning()
+    w = MessageBox(
+        "确认还原？",
+        f"将用{'快照' + snapshotId if snapshotId else osp.basename(archivePath)}"
+        f"覆盖服务器“{serverName}”的文件，此操作无法撤销。"
+        + ("\n服务器正在运行，还原前会先关闭服务器。" if running else ""),
+        parent,
+    )
+    w.yesButton.setText("还原")
+    w.cancelButton.setText("取消")
+    if not w.exec():
+        return
+    thread = RestoreBackupThread(serverName, archivePath, snapshotId, parent)
+    stateToolTip = StateToolTip(
+        "还原中", "正在关闭服务器..." if running else "正在解压...", parent
+    )
+    stateToolTip.move(stateToolTip.getSuitablePos())
+    stateToolTip.show()
+    stateToolTip.closedSignal.connect(thread.requestInterruption)
+    thread.progressSignal.connect(
+        lambda done, total: stateToolTip.setContent(
+            f"{formatBytes(done)} / {formatBytes(total)}（{done * 100 // max(total, 1)}%）"
+        )
+    )
+    thread.finished.connect(lambda: stateToolTip.setState(True))
+    thread.successSignal.connect(
+        lambda: InfoBar.success(
+            title="还原完毕",
+            content=f"服务器“{serverName}”已还原。",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=3000,
+            parent=parent,
+        )
+    )
+    thread.errorSignal.connect(
+        lambda msg: InfoBar.error(
+            title="还原失败",
+            content=f"{msg}\n服务器文件未被改动。",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=4000,
+            parent=parent,
+        )
+    )
+    _stopServerThen(bridge, thread.start)
+    return thread
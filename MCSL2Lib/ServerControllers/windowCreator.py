@@ -70,19 +70,27 @@ from qframelesswindow import TitleBar
 from MCSL2Lib.ProgramControllers.interfaceController import EraseStackedWidget, MySmoothScrollArea
 from MCSL2Lib.Resources.icons import *  # noqa: F401 F403
 from MCSL2Lib.ProgramControllers.settingsController import cfg
+from MCSL2Lib.ProgramControllers.catalogPrefetcher import catalogPrefetcher
 from MCSL2Lib.ServerControllers.processCreator import _MinecraftEULA, ServerLauncher
+from MCSL2Lib.ServerControllers.backupScheduler import BackupScheduler
 from MCSL2Lib.ServerControllers.serverErrorHandler import ServerErrorHandler
 from MCSL2Lib.ServerControllers.serverUtils import (
     MinecraftServerResMonitorUtil,
     readServerProperties,
     backupServer,
     backupSaves,
+    incrementalBackup,
+    restoreBackup,
+    showBackupSnapshots,
 )
+from json import dumps, loads
 from os import path as osp
 import sys
 from re import search
 from typing import Dict
 from MCSL2Lib.Widgets.playersControllerMainWidget import playersController
+from MCSL2Lib.Widgets.scheduledBackupWidget import ScheduledBackupWidget
+from MCSL2Lib.Widgets.serverManagerWidget import ServerCardButton
 from MCSL2Lib.utils import MCSL2Logger, openLocalFile
 from MCSL2Lib.variables import GlobalMCSL2Variables, ServerVariables
 
@@ -262,8 +270,8 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
         self,
         config: ServerVariables,
         launcher: ServerLauncher,
-        manageBtn: PrimaryPushButton,
-        manageBackupBtn: PushButton,
+        manageBtn: ServerCardButton,
+        manageBackupBtn: ServerCardButton,
     ):
         self._isMicaEnabled = False
         super().__init__()
@@ -340,6 +348,62 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
 
         super().closeEvent(a0)
 
+    def restoreBackup(self, snapshotId: str = ""):
+        """还原备份，还原期间禁止启动服务器"""
+        thread = restoreBackup(
+            self.serverConfig.serverName,
+            parent=self,
+            bridge=self.serverBridge,
+            snapshotId=snapshotId,
+        )
+        if thread is None:
+            return
+        restoreLockedBtns = (self.toggleServerBtn, self.exitServer, self.restoreBackupBtn)
+        for btn in restoreLockedBtns:
+            btn.setEnabled(False)
+        thread.finished.connect(lambda: [btn.setEnabled(True) for btn in restoreLockedBtns])
+
+    def exportScheduleConfig(self):
+        s = QFileDialog.getSaveFileName(
+            self,
+            "MCSL2 - 导出计划任务",
+            f"{self.serverConfig.serverName}_schedule.json",
+            "JSON文件(*.json)",
+        )[0]
+        if s == "":
+            return
+        schedule = {
+            k: v
+            for k, v in self.backupScheduler.schedule.items()
+            if not k.startswith("last")
+        }
+        with open(s, "w", encoding="utf-8") as f:
+            f.write(dumps(schedule, indent=4))
+
+    def importScheduleConfig(self):
+        s = QFileDialog.getOpenFileName(self, "MCSL2 - 导入计划任务", "", "JSON文件(*.json)")[0]
+        if s == "":
+            return
+        try:
+            with open(s, "r", encoding="utf-8") as f:
+                schedule = loads(f.read())
+            if not isinstance(schedule, dict):
+                raise ValueError("格式错误")
+        except (OSError, ValueError) as e:
+            InfoBar.error(
+                title="导入失败",
+                content=str(e),
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=3000,
+                parent=self,
+            )
+            return
+        self.backupScheduler.setSchedule(
+            {k: v for k, v in schedule.items() if not k.startswith("last")}
+        )
+
     def genRunScript(self, save=False):
         script = (
             f"cd \"{osp.abspath('Servers' + self.serverConfig.serverName)}\"\n"
@@ -446,7 +510,7 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
         self.overviewSeparator = VerticalSeparator(self.overviewPage)
         self.overviewSeparator.setMinimumSize(QSize(5, 0))
         self.overviewSeparator.setMaximumSize(QSize(5, 16777215))
-        self.overviewPageLayout.addWidget(self.overviewSeparator, 0, 1, 7, 1)
+        self.overviewPageLayout.addWidget(self.overviewSeparator, 0, 1, 8, 1)
         self.backupServerBtn = PushButton(self.overviewPage)
         self.backupServerBtn.setFixedSize(QSize(160, 32))
         self.overviewPageLayout.addWidget(self.backupServerBtn, 2, 2, 1, 1)
@@ -462,6 +526,15 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
         self.backupSavesBtn = PushButton(self.overviewPage)
         self.backupSavesBtn.setFixedSize(QSize(160, 32))
         self.overviewPageLayout.addWidget(self.backupSavesBtn, 1, 2, 1, 1)
+        self.incrementalBackupBtn = PushButton(self.overviewPage)
+        self.incrementalBackupBtn.setFixedSize(QSize(160, 32))
+        self.overviewPageLayout.addWidget(self.incrementalBackupBtn, 5, 2, 1, 1)
+        self.backupSnapshotsBtn = PushButton(self.overviewPage)
+        self.backupSnapshotsBtn.setFixedSize(QSize(160, 32))
+        self.overviewPageLayout.addWidget(self.backupSnapshotsBtn, 6, 2, 1, 1)
+        self.restoreBackupBtn = PushButton(self.overviewPage)
+        self.restoreBackupBtn.setFixedSize(QSize(160, 32))
+        self.overviewPageLayout.addWidget(self.restoreBackupBtn, 7, 2, 1, 1)
         self.overviewScrollArea = MySmoothScrollArea(self.overviewPage)
         self.overviewScrollArea.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.overviewScrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -559,7 +632,7 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
         spacerItem1 = QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding)
         self.verticalLayout_3.addItem(spacerItem1)
         self.overviewScrollArea.setWidget(self.scrollAreaWidgetContents)
-        self.overviewPageLayout.addWidget(self.overviewScrollArea, 0, 0, 7, 1)
+        self.overviewPageLayout.addWidget(self.overviewScrollArea, 0, 0, 8, 1)
         self.stackedWidget.addWidget(self.overviewPage)
 
     def setupCommandPage(self):
@@ -666,6 +739,19 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
         self.scheduleTasksWidgetContents = QWidget()
         self.scheduleTasksWidgetContents.setGeometry(QRect(0, 0, 668, 537))
         self.scheduleTasksScrollArea.setWidget(self.scheduleTasksWidgetContents)
+        self.scheduleTasksContentsLayout = QVBoxLayout(self.scheduleTasksWidgetContents)
+        self.scheduleTasksContentsLayout.setContentsMargins(0, 0, 0, 0)
+        self.backupScheduler = BackupScheduler(
+            self.serverConfig,
+            bridgeGetter=lambda: self.serverBridge,
+            onlinePlayers=lambda: len(self.playersList),
+            parent=self,
+        )
+        self.scheduledBackupWidget = ScheduledBackupWidget(
+            self.backupScheduler, self.scheduleTasksWidgetContents
+        )
+        self.scheduleTasksContentsLayout.addWidget(self.scheduledBackupWidget)
+        self.scheduleTasksContentsLayout.addStretch(1)
         self.scheduleTasksPageLayout.addWidget(self.scheduleTasksScrollArea, 2, 0, 1, 4)
         self.exportScheduleConfigBtn = PushButton(self.scheduleTasksPage)
         self.scheduleTasksPageLayout.addWidget(self.exportScheduleConfigBtn, 1, 2, 1, 1)
@@ -678,6 +764,8 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
         sizePolicy.setHeightForWidth(self.addScheduleTaskBtn.sizePolicy().hasHeightForWidth())
         self.addScheduleTaskBtn.setSizePolicy(sizePolicy)
         self.scheduleTasksPageLayout.addWidget(self.addScheduleTaskBtn, 1, 0, 1, 1)
+        # 目前只支持定时备份
+        self.addScheduleTaskBtn.hide()
         self.importScheduleConfigBtn = PushButton(self.scheduleTasksPage)
         self.scheduleTasksPageLayout.addWidget(self.importScheduleConfigBtn, 1, 1, 1, 1)
         self.stackedWidget.addWidget(self.scheduleTasksPage)
@@ -776,6 +864,9 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
         self.backupServerBtn.setText("备份服务器")
         self.openServerFolder.setText("打开服务器目录")
         self.backupSavesBtn.setText("备份存档")
+        self.incrementalBackupBtn.setText("增量备份")
+        self.backupSnapshotsBtn.setText("备份快照")
+        self.restoreBackupBtn.setText("还原备份")
         self.genRunScriptBtn.setText("生成启动脚本")
         self.toggleServerBtn.setText("启动服务器")
         self.serverResMonitorTitle.setText("服务器资源占用")
@@ -822,8 +913,25 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
             lambda: backupServer(serverName=self.serverConfig.serverName, parent=self)
         )
         self.backupSavesBtn.clicked.connect(
-            lambda: backupSaves(serverConfig=self.serverConfig, parent=self)
+            lambda: backupSaves(
+                serverConfig=self.serverConfig, parent=self, bridge=self.serverBridge
+            )
+        )
+        self.incrementalBackupBtn.clicked.connect(
+            lambda: incrementalBackup(
+                serverConfig=self.serverConfig, parent=self, bridge=self.serverBridge
+            )
+        )
+        self.backupSnapshotsBtn.clicked.connect(
+            lambda: showBackupSnapshots(
+                serverName=self.serverConfig.serverName,
+                parent=self,
+                restore=lambda snapshotId: self.restoreBackup(snapshotId),
+            )
         )
+        self.restoreBackupBtn.clicked.connect(lambda: self.restoreBackup())
+        self.exportScheduleConfigBtn.clicked.connect(self.exportScheduleConfig)
+        self.importScheduleConfigBtn.clicked.connect(self.importScheduleConfig)
         self.copyResultBtn.clicked.connect(
             lambda: QApplication.clipboard().setText(self.resultTextEdit.toPlainText())
         )
@@ -864,7 +972,6 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
             icon=FIF.SEARCH_MIRROR,
         )
         self.serverSegmentedWidget.setCurrentItem("overviewPage")
-        self.serverSegmentedWidget.items["scheduleTasksPage"].setEnabled(False)
 
     def initWindow(self):
         """初始化窗口"""
@@ -947,6 +1054,8 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
         w.exec_()
 
     def startServer(self):
+        # 启动服务器时停止后台预取列表
+        catalogPrefetcher.cancel()
         if self.serverBridge is not None:
             if not self.serverBridge.isServerRunning():
                 t = self.serverBridge.startServer()
@@ -1022,7 +1131,7 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
             pass
         self.toggleServerBtn.clicked.connect(self.runQuickMenu_StopServer)
         self.exitServer.clicked.connect(self.runQuickMenu_StopServer)
-        self.backupSavesBtn.setEnabled(False)
+        # 存档备份会通过save-off/save-all flush与运行中的服务器协调，无需禁用
         self.backupServerBtn.setEnabled(False)
         self.manageBackupBtn.setEnabled(False)
         InfoBar.info(
@@ -1050,6 +1159,7 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
         self.exitServer.clicked.connect(self.startServer)
         self.backupSavesBtn.setEnabled(True)
         self.backupServerBtn.setEnabled(True)
+        self.incrementalBackupBtn.setEnabled(True)
         self.manageBackupBtn.setEnabled(True)
 
     def registerCommandOutput(self):
@@ -1259,6 +1369,7 @@ class ServerWindow(BackgroundAnimationWidget, FramelessWindow):
 
     def recordPlayers(self, serverOutput: str):
         if "logged in with entity id" in serverOutput:
+            self.backupScheduler.markPlayerActivity()
             try:
                 self.playersList.append(str(str(serverOutput).split("INFO]: ")[1].split("[/")[0]))
                 return
@@ -0,0 +1,119 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Scheduled backup card on the server window's schedule page.
+"""
+
+from datetime import datetime
+from time import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QGridLayout
+from qfluentwidgets import (
+    BodyLabel,
+    CaptionLabel,
+    PushButton,
+    SimpleCardWidget,
+    SpinBox,
+    StrongBodyLabel,
+    SwitchButton,
+)
+
+from MCSL2Lib.ServerControllers.backupScheduler import BackupScheduler
+
+
+class ScheduledBackupWidget(SimpleCardWidget):
+    def __init__(self, scheduler: BackupScheduler, parent=None):
+        super().__init__(parent)
+        self.setObjectName("scheduledBackupWidget")
+        self.scheduler = scheduler
+
+        self.gridLayout = QGridLayout(self)
+        self.gridLayout.setContentsMargins(20, 16, 20, 16)
+        self.titleLabel = StrongBodyLabel("定时备份", self)
+        self.gridLayout.addWidget(self.titleLabel, 0, 0, 1, 1)
+        self.enabledSwitch = SwitchButton(self)
+        self.gridLayout.addWidget(self.enabledSwitch, 0, 1, 1, 1, Qt.AlignRight)
+
+        self.intervalSpinBox = self._addSpinBox("备份间隔(分钟)", 1, 5, 10080)
+        self.savesOnlySwitch = self._addSwitch("仅备份存档", 2)
+        self.skipWhenIdleSwitch = self._addSwitch("自上次备份以来无玩家上线时跳过", 3)
+        self.keepHourlySpinBox = self._addSpinBox("保留每小时的快照(个)", 4, 0, 1000)
+        self.keepDailySpinBox = self._addSpinBox("保留每天的快照(个)", 5, 0, 1000)
+        self.keepWeeklySpinBox = self._addSpinBox("保留每周的快照(个)", 6, 0, 1000)
+
+        self.statusLabel = CaptionLabel(self)
+        self.gridLayout.addWidget(self.statusLabel, 7, 0, 1, 1)
+        self.runNowBtn = PushButton("立即备份", self)
+        self.gridLayout.addWidget(self.runNowBtn, 7, 1, 1, 1, Qt.AlignRight)
+
+        self.refresh()
+        self.enabledSwitch.checkedChanged.connect(lambda v: self._apply("enabled", v))
+        self.intervalSpinBox.valueChanged.connect(lambda v: self._apply("intervalMinutes", v))
+        self.savesOnlySwitch.checkedChanged.connect(lambda v: self._apply("savesOnly", v))
+        self.skipWhenIdleSwitch.checkedChanged.connect(lambda v: self._apply("skipWhenIdle", v))
+        self.keepHourlySpinBox.valueChanged.connect(lambda v: self._apply("keepHourly", v))
+        self.keepDailySpinBox.valueChanged.connect(lambda v: self._apply("keepDaily", v))
+        self.keepWeeklySpinBox.valueChanged.connect(lambda v: self._apply("keepWeekly", v))
+        self.runNowBtn.clicked.connect(lambda: self.scheduler.runNow(force=True))
+        self.scheduler.scheduleChanged.connect(self.refresh)
+
+    def _addSwitch(self, text: str, row: int) -> SwitchButton:
+        self.gridLayout.addWidget(BodyLabel(text, self), row, 0, 1, 1)
+        switch = SwitchButton(self)
+        self.gridLayout.addWidget(switch, row, 1, 1, 1, Qt.AlignRight)
+        return switch
+
+    def _addSpinBox(self, text: str, row: int, minimum: int, maximum: int) -> SpinBox:
+        self.gridLayout.addWidget(BodyLabel(text, self), row, 0, 1, 1)
+        spinBox = SpinBox(self)
+        spinBox.setRange(minimum, maximum)
+        self.gridLayout.addWidget(spinBox, row, 1, 1, 1, Qt.AlignRight)
+        return spinBox
+
+    def _apply(self, key: str, value):
+        if self.scheduler.schedule[key] != value:
+            self.scheduler.setSchedule({key: value})
+
+    def refresh(self):
+        schedule = self.scheduler.schedule
+        for widget, key in (
+            (self.enabledSwitch, "enabled"),
+            (self.savesOnlySwitch, "savesOnly"),
+            (self.skipWhenIdleSwitch, "skipWhenIdle"),
+        ):
+            widget.blockSignals(True)
+            widget.setChecked(schedule[key])
+            widget.blockSignals(False)
+        for widget, key in (
+            (self.intervalSpinBox, "intervalMinutes"),
+            (self.keepHourlySpinBox, "keepHourly"),
+            (self.keepDailySpinBox, "keepDaily"),
+            (self.keepWeeklySpinBox, "keepWeekly"),
+        ):
+            widget.blockSignals(True)
+            widget.setValue(schedule[key])
+            widget.blockSignals(False)
+        lastBackup = (
+            datetime.fromtimestamp(schedule["lastBackupTime"]).strftime("%Y-%m-%d %H:%M")
+            if schedule["lastBackupTime"]
+            else "从未"
+        )
+        nextRun = (
+            datetime.fromtimestamp(max(self.scheduler.nextRunTime(), time())).strftime(
+                "%Y-%m-%d %H:%M"
+            )
+            if schedule["enabled"]
+            else "未启用"
+        )
+        self.statusLabel.setText(f"上次备份：{lastBackup}    下次执行：{nextRun}")
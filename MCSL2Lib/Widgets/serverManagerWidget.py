@@ -11,182 +11,477 @@
 #
 ################################################################################
 """
-A single widget template for managing exist Minecraft servers.
+Virtualized list of exist Minecraft servers for the server manager page.
 """
 
-from PyQt5.QtCore import QSize
-from PyQt5.QtWidgets import QWidget, QSizePolicy, QGridLayout, QSpacerItem, QVBoxLayout, QHBoxLayout
-from qfluentwidgets import (
-    BodyLabel,
-    SimpleCardWidget,
-    PixmapLabel,
-    PrimaryPushButton,
-    PushButton,
-    StrongBodyLabel,
-    SubtitleLabel,
-    isDarkTheme,
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import (
+    QAbstractListModel,
+    QEvent,
+    QModelIndex,
+    QRect,
+    QRectF,
+    QSize,
+    QSortFilterProxyModel,
+    Qt,
+    pyqtSignal,
+)
+from PyQt5.QtGui import QColor, QFont, QPainter, QPixmap, QPixmapCache
+from PyQt5.QtWidgets import QAbstractItemView, QFrame, QListView, QStyledItemDelegate
+from qfluentwidgets import SmoothScrollDelegate, getFont, isDarkTheme, themeColor
+
+from MCSL2Lib.ProgramControllers.serverRegistry import ServerRegistry, serverRegistry
+from MCSL2Lib.ServerControllers.serverUtils import formatBytes
+
+SERVER_CARD_SIZE = QSize(550, 215)
+SERVER_ICON_SIZE = 70
+
+# 卡片上显示的磁盘占用分类
+SERVER_DISK_USAGE_LABELS = (
+    ("world", "存档"),
+    ("logs", "日志"),
+    ("mods", "模组"),
+    ("libraries", "库"),
+    ("backups", "备份"),
 )
 
-from MCSL2Lib.variables import GlobalMCSL2Variables
+# (按钮, 默认文字, 宽度)，按钮名与服务器管理页的操作名一致
+SERVER_CARD_BUTTONS = (
+    ("run", "启动", 72),
+    ("edit", "编辑", 64),
+    ("backup", "备份", 64),
+    ("openDataFolder", "打开文件夹", 100),
+    ("delete", "删除", 64),
+)
+
+
+def serverIconPixmap(icon: str, size: int = SERVER_ICON_SIZE, ratio: float = 1.0) -> QPixmap:
+    """
+    按需加载服务器图标。\n
+    缩放后的图标放在全局QPixmapCache里，使用同一图标的服务器共用一份，
+    只有被绘制到屏幕上的卡片才会触发加载。
+    """
+    key = f"MCSL2ServerIcon/{icon}/{size}@{ratio}"
+    pixmap = QPixmapCache.find(key)
+    if pixmap is not None and not pixmap.isNull():
+        return pixmap
+    pixmap = QPixmap(f":/built-InIcons/{icon}")
+    if not pixmap.isNull():
+        pixmap = pixmap.scaled(
+            int(size * ratio), int(size * ratio), Qt.KeepAspectRatio, Qt.SmoothTransformation
+        )
+        pixmap.setDevicePixelRatio(ratio)
+        QPixmapCache.insert(key, pixmap)
+    return pixmap
 
 
-class SingleServerManager(SimpleCardWidget):
-    """单独的服务器管理Widget模板"""
+class ServerListModel(QAbstractListModel):
+    """
+    服务器列表模型，行号即serverRegistry中的索引。\n
+    跟随serverRegistry的信号增量插入、删除、更新行，只有列表整体变化时才重置。
+    """
 
-    def __init__(self, mem, coreFileName, javaPath, serverName, icon, btnSlot, i, parent=None):
+    ConfigRole = Qt.UserRole + 1
+    SearchRole = Qt.UserRole + 2
+    ButtonStatesRole = Qt.UserRole + 3
+    DiskUsageRole = Qt.UserRole + 4
+
+    def __init__(self, registry: ServerRegistry = serverRegistry, parent=None):
         super().__init__(parent)
+        self.registry = registry
+        self._servers: List[Dict] = registry.servers()
+        # 服务器名 -> 按钮 -> (是否可用, 文字)，由服务器窗口在运行期间修改
+        self._buttonStates: Dict[str, Dict[str, Tuple[bool, str]]] = {}
+        # 服务器名 -> 磁盘占用，由DiskUsageScanThread在后台统计
+        self._diskUsage: Dict[str, Dict[str, int]] = {}
+        registry.serverAdded.connect(self.onServerAdded)
+        registry.serverUpdated.connect(self.onServerUpdated)
+        registry.serverRemoved.connect(self.onServerRemoved)
+        registry.serversReset.connect(self.onServersReset)
+
+    # region 模型接口
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._servers)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid() or not 0 <= index.row() < len(self._servers):
+            return None
+        config = self._servers[index.row()]
+        if role == Qt.DisplayRole:
+            return config.get("name", "")
+        if role == self.ConfigRole:
+            return config
+        if role == self.SearchRole:
+            return " ".join(
+                str(config.get(k, "")) for k in ("name", "core_file_name", "java_path")
+            ).lower()
+        if role == self.ButtonStatesRole:
+            return self._buttonStates.get(config.get("name", ""), {})
+        if role == self.DiskUsageRole:
+            return self._diskUsage.get(config.get("name", ""))
+        return None
+
+    def flags(self, index: QModelIndex):
+        return Qt.ItemIsEnabled if index.isValid() else Qt.NoItemFlags
+
+    # endregion
+
+    # region 跟随serverRegistry
+    def onServerAdded(self, index: int, config: Dict):
+        self.beginInsertRows(QModelIndex(), index, index)
+        self._servers.insert(index, config)
+        self.endInsertRows()
+
+    def onServerUpdated(self, index: int, config: Dict):
+        self._servers[index] = config
+        modelIndex = self.index(index)
+        self.dataChanged.emit(modelIndex, modelIndex)
+
+    def onServerRemoved(self, index: int, name: str):
+        self.beginRemoveRows(QModelIndex(), index, index)
+        self._servers.pop(index)
+        self.endRemoveRows()
 
-        self.setObjectName("singleServerManagerWidget")
-
-        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.sizePolicy().hasHeightForWidth())
-        self.setSizePolicy(sizePolicy)
-        self.setFixedSize(QSize(550, 215))
-        self.gridLayout = QGridLayout(self)
-        self.gridLayout.setObjectName("gridLayout")
-        self.serverName = SubtitleLabel(self)
-        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.serverName.sizePolicy().hasHeightForWidth())
-        self.serverName.setSizePolicy(sizePolicy)
-        self.serverName.setWordWrap(True)
-        self.serverName.setObjectName("serverName")
-        self.gridLayout.addWidget(self.serverName, 0, 1, 1, 1)
-        self.btnWidget = QWidget(self)
-        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.btnWidget.sizePolicy().hasHeightForWidth())
-        self.btnWidget.setSizePolicy(sizePolicy)
-        self.btnWidget.setObjectName("btnWidget")
-        self.horizontalLayout = QHBoxLayout(self.btnWidget)
-        self.horizontalLayout.setObjectName("horizontalLayout")
-        self.runBtn = PrimaryPushButton(self.btnWidget)
-        self.runBtn.setObjectName("selectBtn")
-        self.horizontalLayout.addWidget(self.runBtn)
-        self.editBtn = PushButton(self.btnWidget)
-        self.editBtn.setObjectName("editBtn")
-        self.horizontalLayout.addWidget(self.editBtn)
-        self.backupBtn = PushButton(self.btnWidget)
-        self.backupBtn.setObjectName("backupBtn")
-        self.horizontalLayout.addWidget(self.backupBtn)
-        self.openDataFolderBtn = PushButton(self.btnWidget)
-        self.openDataFolderBtn.setObjectName("openDataFolderBtn")
-        self.horizontalLayout.addWidget(self.openDataFolderBtn)
-        self.deleteBtn = PushButton(self.btnWidget)
-
-        self.deleteBtn.setStyleSheet(
-            GlobalMCSL2Variables.darkWarnBtnStyleSheet
-            if isDarkTheme()
-            else GlobalMCSL2Variables.lightWarnBtnStyleSheet
+    def onServersReset(self):
+        self.beginResetModel()
+        self._servers = self.registry.servers()
+        self.endResetModel()
+
+    # endregion
+
+    # region 按钮状态
+    def rowOf(self, serverName: str) -> int:
+        for i, config in enumerate(self._servers):
+            if config.get("name") == serverName:
+                return i
+        return -1
+
+    def buttonState(self, serverName: str, button: str) -> Tuple[bool, str]:
+        default = next(text for name, text, _ in SERVER_CARD_BUTTONS if name == button)
+        return self._buttonStates.get(serverName, {}).get(button, (True, default))
+
+    def setButtonState(
+        self,
+        serverName: str,
+        button: str,
+        enabled: Optional[bool] = None,
+        text: Optional[str] = None,
+    ):
+        oldEnabled, oldText = self.buttonState(serverName, button)
+        self._buttonStates.setdefault(serverName, {})[button] = (
+            oldEnabled if enabled is None else enabled,
+            oldText if text is None else text,
         )
-        self.deleteBtn.setObjectName("deleteBtn")
-        self.horizontalLayout.addWidget(self.deleteBtn)
-        self.gridLayout.addWidget(self.btnWidget, 2, 1, 1, 2)
-        self.serverInfoWidget = QWidget(self)
-        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.serverInfoWidget.sizePolicy().hasHeightForWidth())
-        self.serverInfoWidget.setSizePolicy(sizePolicy)
-        self.serverInfoWidget.setMinimumSize(QSize(100, 70))
-        self.serverInfoWidget.setObjectName("serverInfoWidget")
-        self.gridLayout_2 = QGridLayout(self.serverInfoWidget)
-        self.gridLayout_2.setObjectName("gridLayout_2")
-        self.coreFileNameTitle = StrongBodyLabel(self.serverInfoWidget)
-        sizePolicy = QSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.coreFileNameTitle.sizePolicy().hasHeightForWidth())
-        self.coreFileNameTitle.setSizePolicy(sizePolicy)
-        self.coreFileNameTitle.setObjectName("coreFileNameTitle")
-        self.gridLayout_2.addWidget(self.coreFileNameTitle, 0, 0, 1, 1)
-        self.memTitle = StrongBodyLabel(self.serverInfoWidget)
-        sizePolicy = QSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.memTitle.sizePolicy().hasHeightForWidth())
-        self.memTitle.setSizePolicy(sizePolicy)
-        self.memTitle.setObjectName("memTitle")
-        self.gridLayout_2.addWidget(self.memTitle, 2, 0, 1, 1)
-        self.mem = BodyLabel(self.serverInfoWidget)
-        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.mem.sizePolicy().hasHeightForWidth())
-        self.mem.setSizePolicy(sizePolicy)
-        self.mem.setObjectName("mem")
-        self.gridLayout_2.addWidget(self.mem, 2, 1, 1, 1)
-        self.coreFileName = BodyLabel(self.serverInfoWidget)
-        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.coreFileName.sizePolicy().hasHeightForWidth())
-        self.coreFileName.setSizePolicy(sizePolicy)
-        self.coreFileName.setObjectName("coreFileName")
-        self.gridLayout_2.addWidget(self.coreFileName, 0, 1, 1, 1)
-        self.javaPathTitle = StrongBodyLabel(self.serverInfoWidget)
-        sizePolicy = QSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.javaPathTitle.sizePolicy().hasHeightForWidth())
-        self.javaPathTitle.setSizePolicy(sizePolicy)
-        self.javaPathTitle.setObjectName("javaPathTitle")
-        self.gridLayout_2.addWidget(self.javaPathTitle, 1, 0, 1, 1)
-        self.javaPath = BodyLabel(self.serverInfoWidget)
-        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.javaPath.sizePolicy().hasHeightForWidth())
-        self.javaPath.setSizePolicy(sizePolicy)
-        self.javaPath.setObjectName("javaPath")
-        self.gridLayout_2.addWidget(self.javaPath, 1, 1, 1, 1)
-        self.gridLayout.addWidget(self.serverInfoWidget, 1, 1, 1, 1)
-        self.widget = QWidget(self)
-        self.widget.setObjectName("widget")
-        self.verticalLayout = QVBoxLayout(self.widget)
-        self.verticalLayout.setObjectName("verticalLayout")
-        self.Icon = PixmapLabel(self.widget)
-        sizePolicy = QSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-        sizePolicy.setHorizontalStretch(0)
-        sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.Icon.sizePolicy().hasHeightForWidth())
-        self.Icon.setSizePolicy(sizePolicy)
-        self.Icon.setFixedSize(QSize(70, 70))
-        self.Icon.setObjectName("Icon")
-        self.verticalLayout.addWidget(self.Icon)
-        spacerItem = QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding)
-        self.verticalLayout.addItem(spacerItem)
-        self.gridLayout.addWidget(self.widget, 0, 0, 3, 1)
-
-        self.runBtn.setText("启动")
-        self.editBtn.setText("编辑")
-        self.backupBtn.setText("备份")
-        self.openDataFolderBtn.setText("打开文件夹")
-        self.deleteBtn.setText("删除")
-        self.coreFileNameTitle.setText("核心：")
-        self.memTitle.setText("内存设置：")
-        self.javaPathTitle.setText(self.tr("Java："))
-
-        self.serverName.setWordWrap(True)
-        self.mem.setText(mem)
-        self.coreFileName.setText(coreFileName)
-        self.javaPath.setText(javaPath)
-        self.serverName.setText(serverName)
-        self.Icon.setPixmap(icon)
-        self.Icon.setFixedSize(QSize(70, 70))
-
-        self.runBtn.clicked.connect(btnSlot)
-        self.editBtn.clicked.connect(btnSlot)
-        self.deleteBtn.clicked.connect(btnSlot)
-        self.backupBtn.clicked.connect(btnSlot)
-        self.openDataFolderBtn.clicked.connect(btnSlot)
-
-        self.runBtn.setObjectName(f"runBtn{str(i)}")
-        self.editBtn.setObjectName(f"editBtn{str(i)}")
-        self.deleteBtn.setObjectName(f"deleteBtn{str(i)}")
-        self.backupBtn.setObjectName(f"backupBtn{str(i)}")
-        self.openDataFolderBtn.setObjectName(f"openDataFolderBtn{str(i)}")
+        row = self.rowOf(serverName)
+        if row >= 0:
+            modelIndex = self.index(row)
+            self.dataChanged.emit(modelIndex, modelIndex, [self.ButtonStatesRole])
+
+    def buttonHandle(self, serverName: str, button: str) -> "ServerCardButton":
+        return ServerCardButton(self, serverName, button)
+
+    # endregion
+
+    def setDiskUsage(self, serverName: str, usage: Dict[str, int]):
+        self._diskUsage[serverName] = usage
+        row = self.rowOf(serverName)
+        if row >= 0:
+            modelIndex = self.index(row)
+            self.dataChanged.emit(modelIndex, modelIndex, [self.DiskUsageRole])
+
+
+class ServerCardButton:
+    """
+    卡片上某个按钮的句柄。\n
+    卡片是绘制出来的，没有真正的按钮控件；服务器窗口通过它的setEnabled/setText
+    在服务器运行期间禁用“启动”“备份”按钮。
+    """
+
+    def __init__(self, model: ServerListModel, serverName: str, button: str):
+        self.model = model
+        self.serverName = serverName
+        self.button = button
+
+    def isEnabled(self) -> bool:
+        return self.model.buttonState(self.serverName, self.button)[0]
+
+    def setEnabled(self, enabled: bool):
+        self.model.setButtonState(self.serverName, self.button, enabled=enabled)
+
+    def text(self) -> str:
+        return self.model.buttonState(self.serverName, self.button)[1]
+
+    def setText(self, text: str):
+        self.model.setButtonState(self.serverName, self.button, text=text)
+
+
+class ServerFilterProxyModel(QSortFilterProxyModel):
+    """按空格分隔的关键词过滤服务器，所有关键词都要命中名称、核心或Java路径"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.terms: List[str] = []
+
+    def setFilterText(self, text: str):
+        self.terms = text.lower().split()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, sourceRow: int, sourceParent: QModelIndex) -> bool:
+        if not self.terms:
+            return True
+        searchText = self.sourceModel().index(sourceRow, 0, sourceParent).data(
+            ServerListModel.SearchRole
+        )
+        return all(term in searchText for term in self.terms)
+
+
+class ServerCardDelegate(QStyledItemDelegate):
+    """绘制服务器卡片，并对绘制出来的按钮做点击检测"""
+
+    # (按钮, 视图中的索引)
+    buttonClicked = pyqtSignal(str, QModelIndex)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hoverRow = -1
+        self.hoverButton = ""
+        self.pressedRow = -1
+        self.pressedButton = ""
+        self.titleFont = getFont(20, QFont.DemiBold)
+        self.strongFont = getFont(14, QFont.DemiBold)
+        self.bodyFont = getFont(14)
+
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        return SERVER_CARD_SIZE
+
+    @staticmethod
+    def buttonRects(rect: QRect) -> List[Tuple[str, str, QRect]]:
+        x = rect.x() + 102
+        y = rect.bottom() - 16 - 32
+        rects = []
+        for button, text, width in SERVER_CARD_BUTTONS:
+            rects.append((button, text, QRect(x, y, width, 32)))
+            x += width + 8
+        return rects
+
+    def buttonAt(self, rect: QRect, pos) -> str:
+        for button, _, buttonRect in self.buttonRects(rect):
+            if buttonRect.contains(pos):
+                return button
+        return ""
+
+    def setHover(self, row: int, button: str) -> bool:
+        """返回悬停状态是否变化"""
+        if (row, button) == (self.hoverRow, self.hoverButton):
+            return False
+        self.hoverRow, self.hoverButton = row, button
+        return True
+
+    # region 绘制
+    def paint(self, painter: QPainter, option, index: QModelIndex):
+        config = index.data(ServerListModel.ConfigRole)
+        if config is None:
+            return
+        states = index.data(ServerListModel.ButtonStatesRole) or {}
+        dark = isDarkTheme()
+        rect = option.rect
+        textColor = QColor(255, 255, 255) if dark else QColor(0, 0, 0)
+
+        painter.save()
+        painter.setRenderHints(
+            QPainter.Antialiasing | QPainter.TextAntialiasing | QPainter.SmoothPixmapTransform
+        )
+        painter.setPen(QColor(0, 0, 0, 48) if dark else QColor(0, 0, 0, 19))
+        painter.setBrush(QColor(255, 255, 255, 13) if dark else QColor(255, 255, 255, 170))
+        painter.drawRoundedRect(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5), 5, 5)
+
+        ratio = painter.device().devicePixelRatioF() if painter.device() else 1.0
+        icon = serverIconPixmap(config.get("icon", ""), SERVER_ICON_SIZE, ratio)
+        if not icon.isNull():
+            painter.drawPixmap(
+                QRect(rect.x() + 16, rect.y() + 16, SERVER_ICON_SIZE, SERVER_ICON_SIZE), icon
+            )
+
+        textLeft = rect.x() + 102
+        textWidth = rect.width() - 102 - 16
+        painter.setPen(textColor)
+        painter.setFont(self.titleFont)
+        painter.drawText(
+            QRect(textLeft, rect.y() + 12, textWidth, 34),
+            Qt.AlignLeft | Qt.AlignVCenter,
+            painter.fontMetrics().elidedText(config.get("name", ""), Qt.ElideRight, textWidth),
+        )
+
+        unit = config.get("memory_unit", "")
+        rows = (
+            ("核心：", config.get("core_file_name", "")),
+            ("Java：", config.get("java_path", "")),
+            (
+                "内存设置：",
+                f"{config.get('min_memory', '')}{unit}~{config.get('max_memory', '')}{unit}",
+            ),
+        )
+        usage = index.data(ServerListModel.DiskUsageRole)
+        if usage is None:
+            rows += (("磁盘占用：", "正在统计..."),)
+        else:
+            details = " · ".join(
+                f"{label} {formatBytes(usage.get(key, 0))}"
+                for key, label in SERVER_DISK_USAGE_LABELS
+                if usage.get(key)
+            )
+            rows += (
+                (
+                    "磁盘占用：",
+                    f"{formatBytes(usage.get('total', 0))}"
+                    + (f"（{details}）" if details else "")
+                    + f"，{usage.get('files', 0)}个文件",
+                ),
+            )
+        for i, (title, value) in enumerate(rows):
+            y = rect.y() + 54 + i * 26
+            painter.setFont(self.strongFont)
+            painter.drawText(QRect(textLeft, y, 80, 24), Qt.AlignLeft | Qt.AlignVCenter, title)
+            painter.setFont(self.bodyFont)
+            painter.drawText(
+                QRect(textLeft + 80, y, textWidth - 80, 24),
+                Qt.AlignLeft | Qt.AlignVCenter,
+                painter.fontMetrics().elidedText(
+                    str(value), Qt.ElideRight if i == 3 else Qt.ElideMiddle, textWidth - 80
+                ),
+            )
+
+        painter.setFont(self.bodyFont)
+        for button, defaultText, buttonRect in self.buttonRects(rect):
+            enabled, text = states.get(button, (True, defaultText))
+            hovered = enabled and index.row() == self.hoverRow and button == self.hoverButton
+            pressed = hovered and index.row() == self.pressedRow and button == self.pressedButton
+            self._paintButton(painter, buttonRect, button, text, enabled, hovered, pressed, dark)
+        painter.restore()
+
+    @staticmethod
+    def _paintButton(
+        painter: QPainter,
+        rect: QRect,
+        button: str,
+        text: str,
+        enabled: bool,
+        hovered: bool,
+        pressed: bool,
+        dark: bool,
+    ):
+        r = QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5)
+        if button == "run":
+            if enabled:
+                background = themeColor()
+                if pressed:
+                    background = background.darker(110)
+                elif hovered:
+                    background = background.lighter(110)
+                foreground = QColor(0, 0, 0) if dark else QColor(255, 255, 255)
+            else:
+                background = QColor(255, 255, 255, 40) if dark else QColor(0, 0, 0, 56)
+                foreground = QColor(255, 255, 255, 150) if dark else QColor(255, 255, 255)
+            painter.setPen(Qt.NoPen)
+        else:
+            if button == "delete":
+                background = QColor(255, 117, 117, 110 if hovered else 77)
+            elif dark:
+                background = QColor(255, 255, 255, 21 if hovered else 15)
+            else:
+                background = QColor(249, 249, 249, 128) if hovered else QColor(255, 255, 255, 179)
+            if pressed:
+                background.setAlpha(max(background.alpha() - 30, 10))
+            if enabled:
+                foreground = QColor(255, 255, 255) if dark else QColor(0, 0, 0)
+            else:
+                foreground = QColor(255, 255, 255, 92) if dark else QColor(0, 0, 0, 92)
+            painter.setPen(QColor(255, 255, 255, 14) if dark else QColor(0, 0, 0, 19))
+        painter.setBrush(background)
+        painter.drawRoundedRect(r, 5, 5)
+        painter.setPen(foreground)
+        painter.drawText(rect, Qt.AlignCenter, text)
+
+    # endregion
+
+    def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
+        eventType = event.type()
+        if eventType not in (
+            QEvent.MouseMove,
+            QEvent.MouseButtonPress,
+            QEvent.MouseButtonRelease,
+            QEvent.MouseButtonDblClick,
+        ):
+            return super().editorEvent(event, model, option, index)
+        button = self.buttonAt(option.rect, event.pos())
+        enabled = bool(button) and index.data(ServerListModel.ButtonStatesRole).get(
+            button, (True, "")
+        )[0]
+        if eventType == QEvent.MouseMove:
+            if self.setHover(index.row(), button if enabled else ""):
+                self.parent().viewport().update()
+            return False
+        if event.button() != Qt.LeftButton:
+            return False
+        if eventType in (QEvent.MouseButtonPress, QEvent.MouseButtonDblClick):
+            self.pressedRow, self.pressedButton = (index.row(), button) if enabled else (-1, "")
+            self.parent().viewport().update(option.rect)
+            return enabled
+        clicked = enabled and (index.row(), button) == (self.pressedRow, self.pressedButton)
+        self.pressedRow, self.pressedButton = -1, ""
+        self.parent().viewport().update(option.rect)
+        if clicked:
+            self.buttonClicked.emit(button, index)
+        return clicked
+
+
+class ServerListView(QListView):
+    """
+    服务器卡片列表。\n
+    只绘制可见区域内的卡片，卡片大小统一，布局时不需要逐个计算尺寸。
+    """
+
+    # (按钮, 服务器在serverRegistry中的索引)
+    buttonClicked = pyqtSignal(str, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("serverListView")
+        self.setViewMode(QListView.ListMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(100)
+        self.setSpacing(6)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setFrameShape(QFrame.NoFrame)
+        self.setMouseTracking(True)
+        self.setStyleSheet("QListView{background-color: transparent; border: none;}")
+        self.scrollDelegate = SmoothScrollDelegate(self, True)
+        self.cardDelegate = ServerCardDelegate(self)
+        self.setItemDelegate(self.cardDelegate)
+        self.cardDelegate.buttonClicked.connect(self.onCardButtonClicked)
+
+    def onCardButtonClicked(self, button: str, index: QModelIndex):
+        model = self.model()
+        if isinstance(model, QSortFilterProxyModel):
+            index = model.mapToSource(index)
+        self.buttonClicked.emit(button, index.row())
+
+    def mouseMoveEvent(self, e):
+        # 鼠标在卡片间隙中移动时不会经过委托，在这里清除悬停状态
+        if not self.indexAt(e.pos()).isValid() and self.cardDelegate.setHover(-1, ""):
+            self.viewport().update()
+        super().mouseMoveEvent(e)
+
+    def leaveEvent(self, e):
+        if self.cardDelegate.setHover(-1, ""):
+            self.viewport().update()
+        super().leaveEvent(e)
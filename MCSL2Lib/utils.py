@@ -18,7 +18,6 @@ import enum
 import functools
 import hashlib
 import inspect
-from json import dumps, loads
 from os import makedirs, path as osp
 from types import TracebackType
 from typing import Type, Optional, Iterable, Callable, Dict, List
@@ -40,10 +39,10 @@ class ServicesUrl:
 
 
 def readGlobalServerConfig() -> list:
-    """读取全局服务器配置, 返回的是一个list"""
-    with open(r"MCSL2/MCSL2_ServerList.json", "r", encoding="utf-8") as globalServerConfigFile:
-        globalServerList = loads(globalServerConfigFile.read())["MCSLServerList"]
-    return globalServerList
+    """读取全局服务器配置, 返回的是一个list。数据来自内存中的serverRegistry，不再每次读取文件"""
+    from MCSL2Lib.ProgramControllers.serverRegistry import serverRegistry
+
+    return serverRegistry.servers()
 
 
 def initializeMCSL2():
@@ -56,6 +55,7 @@ def initializeMCSL2():
         "Plugins",
         "MCSL2",
         "MCSL2/Aria2",
+        "MCSL2/Cache",
         "MCSL2/Downloads",
         "MCSL2/Logs",
     ]
@@ -75,31 +75,18 @@ def initializeMCSL2():
     )  # IO-Bound = 2*N, CPU-Bound = N + 1
 
     # fix changed icon
-    with open(r"MCSL2/MCSL2_ServerList.json", "r", encoding="utf-8") as globalServerListFile:
-        globalServerList = loads(globalServerListFile.read())
-    k = 0
-    updateSpigotIconList = [
-        singleConfig["icon"] for singleConfig in globalServerList["MCSLServerList"]
-    ]
-    for icon in updateSpigotIconList:
-        if icon == "Spigot.svg":
-            tmpConfig = globalServerList["MCSLServerList"][updateSpigotIconList.index(icon)]
-            globalServerList["MCSLServerList"].pop(updateSpigotIconList.index(icon))
+    from MCSL2Lib.ProgramControllers.serverRegistry import serverRegistry
+
+    for i, tmpConfig in enumerate(serverRegistry.servers()):
+        if tmpConfig.get("icon") == "Spigot.svg":
             tmpConfig["icon"] = "Spigot.png"
-            globalServerList["MCSLServerList"].append(tmpConfig)
+            serverRegistry.update(i, tmpConfig)
             MCSL2Logger.warning(
                 "检测到过时配置文件，已自动更新： {"
                 + f"\"name\": \"{tmpConfig['name']}\", \"icon\": \"{tmpConfig['icon']}\""
                 + "}"
             )
-            k += 1
-        else:
-            continue
-    if k >= 1:
-        with open(
-            r"MCSL2/MCSL2_ServerList.json", "w+", encoding="utf-8"
-        ) as newGlobalServerListFile:
-            newGlobalServerListFile.write(dumps(globalServerList, indent=4))
+    serverRegistry.flush()
 
 
 # 带有text的warning装饰器
@@ -15,7 +15,7 @@ These are the built-in variables of MCSL2.
 """
 
 from MCSL2Lib.ProgramControllers.settingsController import cfg
-from MCSL2Lib.utils import readGlobalServerConfig
+from MCSL2Lib.ProgramControllers.serverRegistry import serverRegistry
 from MCSL2Lib.singleton import Singleton
 
 
@@ -310,7 +310,7 @@ class ServerVariables:
         self.extraData = {}
 
     def initialize(self, index: int) -> "ServerVariables":
-        serverConfig: dict = readGlobalServerConfig()[index]
+        serverConfig: dict = serverRegistry.get(index)
         self.serverName = serverConfig["name"]
         self.coreFileName = serverConfig["core_file_name"]
         self.javaPath = serverConfig["java_path"]
@@ -47,6 +47,7 @@ from MCSL2Lib.ProgramControllers.aria2ClientController import (
     initializeAria2Configuration,
     Aria2BootThread,
 )
+from MCSL2Lib.ProgramControllers.catalogPrefetcher import catalogPrefetcher
 from MCSL2Lib.ProgramControllers.settingsController import cfg
 from MCSL2Lib.Pages.configurePage import ConfigurePage
 from MCSL2Lib.Pages.consoleCenterPage import ConsoleCenterPage
@@ -70,7 +71,6 @@ from MCSL2Lib.variables import (
     ConfigureServerVariables,
     EditServerVariables,
     ServerVariables,
-    SettingsVariables,
 )
 
 try:
@@ -82,7 +82,6 @@ except Exception:
 serverVariables = ServerVariables()
 configureServerVariables = ConfigureServerVariables()
 editServerVariables = EditServerVariables()
-settingsVariables = SettingsVariables()
 
 
 @Singleton
@@ -152,6 +151,8 @@ class Window(VerifyFluentWindowBase):
         if cfg.get(cfg.checkUpdateOnStart):
             self.settingsInterface.checkUpdate(parent=self)
         self.startAria2Client()
+        # 窗口空闲后在后台预取下载列表
+        catalogPrefetcher.schedule()
         self.splashScreen.finish()
         self.update()
         if self.previewFlag:
@@ -361,7 +362,7 @@ class Window(VerifyFluentWindowBase):
         )
         self.configureInterface.noobDownloadCorePrimaryPushBtn.clicked.connect(
             lambda: self.downloadInterface.downloadStackedWidget.setCurrentIndex(
-                settingsVariables.downloadSourceList.index(cfg.get(cfg.downloadSource))
+                self.downloadInterface.downloadSourceIndex()
             )
         )
         self.configureInterface.extendedDownloadCorePrimaryPushBtn.clicked.connect(
@@ -369,7 +370,7 @@ class Window(VerifyFluentWindowBase):
         )
         self.configureInterface.extendedDownloadCorePrimaryPushBtn.clicked.connect(
             lambda: self.downloadInterface.downloadStackedWidget.setCurrentIndex(
-                settingsVariables.downloadSourceList.index(cfg.get(cfg.downloadSource))
+                self.downloadInterface.downloadSourceIndex()
             )
         )
         self.selectJavaPage.backBtn.clicked.connect(lambda: self.switchTo(self.configureInterface))
@@ -431,7 +432,7 @@ class Window(VerifyFluentWindowBase):
         )
         self.serverManagerInterface.editDownloadCorePrimaryPushBtn.clicked.connect(
             lambda: self.downloadInterface.downloadStackedWidget.setCurrentIndex(
-                settingsVariables.downloadSourceList.index(cfg.get(cfg.downloadSource))
+                self.downloadInterface.downloadSourceIndex()
             )
         )
         self.selectNewJavaPage.backBtn.clicked.connect(
@@ -0,0 +1,141 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Benchmark of Akira Cloud directory parsing on a saved 20k-entry listing page.
+"""
+
+# 用法：在仓库根目录执行 python Tools/Benchmarks/akiraListingBenchmark.py
+# 生成一个与镜像站同样结构的大目录页并保存到临时目录，对比旧的解析方式与新的单元格扫描、
+# 解析缓存以及JSON格式目录，不访问网络
+
+import re
+import sys
+from html.parser import HTMLParser
+from json import dumps
+from os import path as osp
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import perf_counter
+
+sys.path.insert(0, osp.abspath(osp.join(osp.dirname(__file__), "..", "..")))
+
+from MCSL2Lib.ProgramControllers.DownloadAPI.AkiraCloud import (  # noqa: E402
+    AkiraCloudDownloadURLParser,
+)
+
+ENTRIES = 20000
+ROUNDS = 5
+
+
+def buildListing(entries: int) -> str:
+    rows = [
+        '<tr><td valign="top"><img src="/icons/back.gif" alt="[PARENTDIR]"></td>'
+        '<td><a href="/">Parent Directory</a></td><td>&nbsp;</td><td align="right"> - </td></tr>'
+    ]
+    for i in range(entries):
+        rows.append(
+            f'<tr><td valign="top"><img src="/icons/unknown.gif" alt="[   ]"></td>'
+            f'<td><a href="paper-1.20.{i % 7}-{i}.jar">paper-1.20.{i % 7}-{i}.jar</a></td>'
+            f'<td align="right">2024-01-{i % 28 + 1:02d} 12:{i % 60:02d}  </td>'
+            f'<td align="right">{40000 + i} KB</td></tr>'
+        )
+    return (
+        "<html><head><title>Index of /Paper</title></head><body><h1>Index of /Paper</h1>"
+        "<table><tr><th>Name</th><th>Last modified</th><th>Size</th></tr>"
+        + "".join(rows)
+        + "</table></body></html>"
+    )
+
+
+class OldAkiraHTMLParser(HTMLParser):
+    """旧实现：先收集所有单元格，最后用list.remove去掉无关条目"""
+
+    def __init__(self):
+        super().__init__()
+        self.inTable = False
+        self.inTd = False
+        self.currentData = []
+        self.allList = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.inTable = True
+        elif self.inTable and tag == "td":
+            self.inTd = True
+
+    def handle_data(self, data):
+        if self.inTd:
+            self.currentData.append(data.strip())
+
+    def handle_endtag(self, tag):
+        if tag == "table":
+            self.inTable = False
+        elif tag == "td":
+            self.inTd = False
+            if self.currentData:
+                self.allList.append(self.currentData[-1])
+                self.currentData = []
+
+    def feed(self, data: str) -> list:
+        super().feed(data)
+        for ignored in ("Parent Directory", "常用工具", "mirror.akiracloud.net"):
+            if ignored in self.allList:
+                self.allList.remove(ignored)
+        return self.allList
+
+
+def oldParse(content: str) -> list:
+    return [
+        item
+        for item in OldAkiraHTMLParser().feed(content)
+        if not re.search(re.compile(r"\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}|\d+\sKB"), item)
+    ]
+
+
+def timed(func):
+    start = perf_counter()
+    for _ in range(ROUNDS):
+        result = func()
+    return result, (perf_counter() - start) * 1000 / ROUNDS
+
+
+if __name__ == "__main__":
+    root = mkdtemp(prefix="MCSL2AkiraListingBenchmark")
+    try:
+        pagePath = osp.join(root, "listing.html")
+        with open(pagePath, "w", encoding="utf-8") as f:
+            f.write(buildListing(ENTRIES))
+        with open(pagePath, "r", encoding="utf-8") as f:
+            page = f.read()
+        jsonPage = dumps([
+            {"name": name, "type": "file", "mtime": "Mon, 01 Jan 2024 12:00:00 GMT", "size": 1}
+            for name in AkiraCloudDownloadURLParser.parseListing(page)
+        ])
+        print(f"目录页：{len(page) / 1048576:.1f}MB，{ENTRIES}个条目")
+
+        old, oldTime = timed(lambda: oldParse(page))
+        new, newTime = timed(lambda: AkiraCloudDownloadURLParser.parseListing(page))
+        # 旧实现会把上级目录一行的空白与"-"单元格也当作条目，新实现已过滤
+        assert [e for e in old if e not in ("", "-")] == new, "解析结果与旧实现不一致"
+        # 下载列表缓存没有变化时直接复用解析结果
+        AkiraCloudDownloadURLParser._getAPI = classmethod(lambda cls, path: page)
+        AkiraCloudDownloadURLParser.getListing("/Paper")
+        _, cachedTime = timed(lambda: AkiraCloudDownloadURLParser.getListing("/Paper"))
+        _, jsonTime = timed(lambda: AkiraCloudDownloadURLParser.parseListing(jsonPage))
+
+        print(f"旧实现（HTMLParser+逐项编译正则）：{oldTime:.1f}ms")
+        print(f"正则扫描单元格：{newTime:.1f}ms")
+        print(f"缓存命中：{cachedTime:.2f}ms")
+        print(f"JSON格式目录：{jsonTime:.1f}ms")
+    finally:
+        rmtree(root, ignore_errors=True)
@@ -0,0 +1,94 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Benchmark of Java discovery over a synthetic tree with about 100k entries.
+"""
+
+# 用法：在仓库根目录执行 python Tools/Benchmarks/javaDiscoveryBenchmark.py
+# 对比旧的listdir+isfile递归遍历与discoverPosixJava，只统计遍历，不执行java -version
+
+import os
+import sys
+from os import listdir, path as osp
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import perf_counter
+
+sys.path.insert(0, osp.abspath(osp.join(osp.dirname(__file__), "..", "..")))
+
+from MCSL2Lib.ProgramControllers.javaDetector import discoverPosixJava, findStr  # noqa: E402
+
+TOP_DIRS = 100
+SUB_DIRS = 10
+FILES_PER_DIR = 98
+JDKS = 20
+
+
+def buildTree(root: str) -> int:
+    """生成约10万个目录项，其中有JDKS个bin/java"""
+    entries = 0
+    for i in range(TOP_DIRS):
+        top = osp.join(root, f"lib{i}")
+        for j in range(SUB_DIRS):
+            sub = osp.join(top, f"java-data{j}")
+            os.makedirs(sub)
+            entries += 1
+            for k in range(FILES_PER_DIR):
+                open(osp.join(sub, f"file{k}.jar"), "wb").close()
+            entries += FILES_PER_DIR
+        entries += 1
+    for i in range(JDKS):
+        binDir = osp.join(root, f"lib{i * TOP_DIRS // JDKS}", f"jdk-{8 + i}", "bin")
+        os.makedirs(binDir)
+        with open(osp.join(binDir, "java"), "w") as f:
+            f.write("#!/bin/sh\n")
+        entries += 3
+    # 指回上级目录的符号链接，检验成环保护
+    os.symlink(root, osp.join(root, "lib0", "java-loop"))
+    return entries + 1
+
+
+def listdirWalk(path: str):
+    """旧实现：每个目录项一次osp.isfile，没有深度与成环保护"""
+    found = []
+    try:
+        for name in listdir(path):
+            p = osp.join(path, name)
+            if osp.isfile(p):
+                if p.endswith("bin/java"):
+                    found.append(p)
+            elif findStr(name.lower()) and "loop" not in name:
+                found.extend(listdirWalk(p))
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        pass
+    return found
+
+
+def timed(func):
+    start = perf_counter()
+    result = func()
+    return result, (perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    root = mkdtemp(prefix="MCSL2JavaDiscoveryBenchmark")
+    try:
+        print(f"生成了{buildTree(root)}个目录项")
+        old, oldTime = timed(lambda: listdirWalk(root))
+        os.environ["PATH"] = ""
+        os.environ.pop("JAVA_HOME", None)
+        new, newTime = timed(lambda: list(discoverPosixJava(roots=[(root, 5, True)])))
+        print(f"listdir+isfile：找到{len(old)}个，{oldTime:.1f}ms")
+        print(f"discoverPosixJava：找到{len(new)}个，{newTime:.1f}ms")
+    finally:
+        rmtree(root, ignore_errors=True)
@@ -0,0 +1,110 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Offscreen benchmark of the server manager list with 10/100/1000 servers.
+"""
+
+# 用法：在仓库根目录执行 python Tools/Benchmarks/serverListBenchmark.py
+# 运行时会切换到临时目录，不会改动真实的服务器列表
+
+import os
+import sys
+from json import dumps
+from tempfile import mkdtemp
+from time import perf_counter
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.chdir(mkdtemp(prefix="MCSL2ServerListBenchmark"))
+os.makedirs("MCSL2", exist_ok=True)
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+app = QApplication(sys.argv)
+
+from MCSL2Lib.ProgramControllers.serverRegistry import ServerRegistry  # noqa: E402
+from MCSL2Lib.Resources.icons import *  # noqa: E402 F401 F403
+from MCSL2Lib.Widgets.serverManagerWidget import (  # noqa: E402
+    ServerFilterProxyModel,
+    ServerListModel,
+    ServerListView,
+)
+
+ICONS = ["Anvil.png", "Cloth.png", "CobbleStone.png", "Egg.png", "Grass.png", "MCSL2.png"]
+
+
+def fakeServer(i: int) -> dict:
+    return {
+        "name": f"server-{i}",
+        "core_file_name": f"paper-1.20.{i % 5}.jar",
+        "java_path": f"/usr/lib/jvm/java-{8 + i % 14}/bin/java",
+        "min_memory": 1024,
+        "max_memory": 4096,
+        "memory_unit": "M",
+        "jvm_arg": [],
+        "output_decoding": "utf-8",
+        "input_encoding": "utf-8",
+        "icon": ICONS[i % len(ICONS)],
+        "server_type": "",
+        "extra_data": {},
+    }
+
+
+def timed(func) -> float:
+    start = perf_counter()
+    func()
+    app.processEvents()
+    return (perf_counter() - start) * 1000
+
+
+def benchmark(count: int):
+    path = f"MCSL2/ServerList-{count}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dumps({"MCSLServerList": [fakeServer(i) for i in range(count)]}))
+    registry = ServerRegistry(path=path)
+    registry.load()
+
+    view = ServerListView()
+    view.resize(1200, 800)
+
+    def build():
+        model = ServerListModel(registry, parent=view)
+        proxy = ServerFilterProxyModel(view)
+        proxy.setSourceModel(model)
+        view.setModel(proxy)
+        view.show()
+        view.viewport().grab()
+
+    results = {"首次显示": timed(build)}
+    proxy = view.model()
+    results["刷新"] = timed(lambda: (registry.load(), view.viewport().grab()))
+    results["增量添加"] = timed(
+        lambda: (registry.add(fakeServer(count)), view.viewport().grab())
+    )
+    results["增量删除"] = timed(lambda: (registry.remove(0), view.viewport().grab()))
+    results["过滤"] = timed(
+        lambda: (proxy.setFilterText("server-1 1.20.1"), view.viewport().grab())
+    )
+    results["清除过滤"] = timed(lambda: (proxy.setFilterText(""), view.viewport().grab()))
+    results["滚动到底部"] = timed(
+        lambda: (view.scrollToBottom(), view.viewport().grab())
+    )
+    registry.flush()
+    view.close()
+    view.deleteLater()
+    return results
+
+
+if __name__ == "__main__":
+    for n in (10, 100, 1000):
+        print(f"{n:>5}个服务器：" + "  ".join(f"{k} {v:.1f}ms" for k, v in benchmark(n).items()))
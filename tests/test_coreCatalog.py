@@ -0,0 +1,108 @@
+#     Copyright 2024, MCSL Team, mailto:services@mcsl.com.cn
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Merging of the same core build listed by several download mirrors.
+"""
+
+import unittest
+from os import path as osp
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from MCSL2Lib.ProgramControllers import coreCatalog as catalogModule
+from MCSL2Lib.ProgramControllers.coreCatalog import CoreCatalog
+
+SHA1 = "0123456789abcdef0123456789abcdef01234567"
+
+# 各镜像站对同一个构建提供的信息不同：FastMirror只有sha1，MCSLAPI只有大小，另外两个都没有
+MIRROR_ROWS = {
+    "FastMirror": [
+        {
+            "core": "Paper",
+            "mcVersion": "1.20.4",
+            "build": "build496",
+            "fileName": "Paper-1.20.4-build496.jar",
+            "sha1": SHA1,
+            "updateTime": "2024-04-01 12:00:00",
+            "url": "https://fastmirror/paper-1.20.4-496",
+        }
+    ],
+    "MCSLAPI": [
+        {
+            "fileName": "paper-1.20.4-496.jar",
+            "fallbackCore": "Paper",
+            "size": 41943040,
+            "url": "https://mcslapi/paper-1.20.4-496.jar",
+        }
+    ],
+    "PolarsAPI": [
+        {
+            "fileName": "paper-1.20.4-496.jar",
+            "fallbackCore": "Paper",
+            "url": "https://polars/paper-1.20.4-496.jar",
+        }
+    ],
+    "AkiraCloud": [
+        {
+            "fileName": "paper-1.20.4-496.jar",
+            "fallbackCore": "Paper",
+            "url": "https://akira/Paper/paper-1.20.4-496.jar",
+        }
+    ],
+}
+
+
+def _collectors(rows):
+    return {mirror: (lambda pool, isCancelled, r=r: r) for mirror, r in rows.items()}
+
+
+class CoreCatalogMergeTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = TemporaryDirectory()
+        self.catalog = CoreCatalog(osp.join(self.tempDir.name, "catalog.json.gz"))
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def rebuild(self, rows):
+        with mock.patch.dict(catalogModule._COLLECTORS, _collectors(rows)):
+            return self.catalog.rebuild()
+
+    def testSameBuildFromAllMirrorsIsMerged(self):
+        self.assertEqual(self.rebuild(MIRROR_ROWS), 1)
+        (entry,) = self.catalog.search("paper 1.20.4 latest")
+        self.assertEqual(
+            [mirror for mirror, _ in entry.urls],
+            ["FastMirror", "MCSLAPI", "PolarsAPI", "AkiraCloud"],
+        )
+        # 合并后保留各镜像站已知的大小与校验值
+        self.assertEqual(entry.sha1, SHA1)
+        self.assertEqual(entry.size, 41943040)
+
+    def testConflictingSizeIsNotMerged(self):
+        rows = dict(MIRROR_ROWS)
+        rows["PolarsAPI"] = []
+        rows["AkiraCloud"] = [
+            dict(MIRROR_ROWS["MCSLAPI"][0], size=1024, url="https://akira/paper-1.20.4-496.jar")
+        ]
+        self.assertEqual(self.rebuild(rows), 2)
+
+    def testConflictingSha1IsNotMerged(self):
+        rows = {mirror: [] for mirror in MIRROR_ROWS}
+        rows["FastMirror"] = MIRROR_ROWS["FastMirror"]
+        rows["PolarsAPI"] = [dict(MIRROR_ROWS["PolarsAPI"][0], sha1="f" * 40)]
+        self.assertEqual(self.rebuild(rows), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()